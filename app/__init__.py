@@ -2,25 +2,180 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from config import Config
+from app.db_routing import RoutingSession
 
 
-db = SQLAlchemy()
+# Las lecturas de las vistas marcadas con @read_replica pueden ir a una réplica (app/db_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    # Permite sobreescribir la configuración (pruebas, benchmarks)
+    app.config.update(config or {})
+
+    # Valores por defecto para opciones que config.py puede no definir
+    app.config.setdefault('TICKETS_PER_PAGE', 50)
+    app.config.setdefault('TICKETS_MAX_PER_PAGE', 200)
+    # None: el presupuesto de consultas por ruta solo se hace cumplir en modo TESTING
+    app.config.setdefault('QUERY_BUDGET_ENFORCE', None)
+    # Filas por lote al generar respuestas en streaming
+    app.config.setdefault('STREAM_BATCH_SIZE', 1000)
+    # Caché del user_loader de Flask-Login: máximo de usuarios y segundos de vida
+    app.config.setdefault('USER_CACHE_SIZE', 4096)
+    app.config.setdefault('USER_CACHE_TTL', 60)
+    # Listas de usuarios/técnicos de los formularios de tickets
+    app.config.setdefault('CHOICES_CACHE_TTL', 300)
+    app.config.setdefault('CHOICES_INLINE_LIMIT', 200)
+    # Filas por transacción en los endpoints en lote (?chunk= permite cambiarlo hasta el máximo)
+    app.config.setdefault('BULK_CHUNK_SIZE', 500)
+    app.config.setdefault('BULK_MAX_CHUNK_SIZE', 5000)
+    # Búsqueda de texto completo: 'auto', 'memory', 'mysql' o la ruta de una clase propia
+    app.config.setdefault('SEARCH_BACKEND', 'auto')
+    # Segundos entre reconstrucciones de los contadores del resumen (0 = desactivado)
+    app.config.setdefault('STATS_RECONCILE_INTERVAL', 0)
+    # Observabilidad: nivel de log, umbral del log de consultas lentas (segundos, 0 = desactivado)
+    # y endpoint /metrics en formato Prometheus
+    app.config.setdefault('LOG_LEVEL', 'INFO')
+    app.config.setdefault('SLOW_QUERY_THRESHOLD', 0.5)
+    app.config.setdefault('METRICS_ENABLED', True)
+    # Sincronización por deltas (GET /tickets/changes): entradas por página, segundos de espera
+    # antes de entregar una entrada, retención de la bitácora y segundos entre compactaciones (0 = nunca)
+    app.config.setdefault('CHANGES_PAGE_SIZE', 1000)
+    app.config.setdefault('CHANGES_MAX_PAGE_SIZE', 10000)
+    app.config.setdefault('CHANGES_SETTLE_SECONDS', 1)
+    app.config.setdefault('CHANGE_LOG_RETENTION', 7 * 24 * 3600)
+    app.config.setdefault('CHANGE_LOG_COMPACT_INTERVAL', 0)
+    # Dashboard en vivo (SSE, app/live.py): broker 'local' o 'redis' (con LIVE_BROKER_URL),
+    # eventos pendientes por cliente, conexiones máximas por proceso, segundos entre keepalives
+    # y duración máxima de cada conexión; los commits con más cambios se envían como 'reload'
+    app.config.setdefault('LIVE_BROKER', 'local')
+    app.config.setdefault('LIVE_BROKER_URL', None)
+    app.config.setdefault('LIVE_QUEUE_SIZE', 100)
+    app.config.setdefault('LIVE_MAX_CONNECTIONS', 1000)
+    app.config.setdefault('LIVE_KEEPALIVE', 15)
+    app.config.setdefault('LIVE_STREAM_TIMEOUT', 300)
+    app.config.setdefault('LIVE_MAX_EVENTS_PER_COMMIT', 200)
+    # Archivado de tickets cerrados (app/archive.py): segundos sin cambios antes de archivar,
+    # tickets por transacción y segundos entre ejecuciones de la tarea (0 = desactivada)
+    app.config.setdefault('ARCHIVE_CLOSED_AFTER', 90 * 24 * 3600)
+    app.config.setdefault('ARCHIVE_BATCH_SIZE', 500)
+    app.config.setdefault('ARCHIVE_INTERVAL', 0)
+    # Pool de conexiones de cada engine (None = valor por defecto de SQLAlchemy); pre-ping y
+    # reciclaje evitan usar conexiones cerradas por el servidor (wait_timeout de MySQL)
+    app.config.setdefault('DB_POOL_SIZE', None)
+    app.config.setdefault('DB_MAX_OVERFLOW', None)
+    app.config.setdefault('DB_POOL_TIMEOUT', None)
+    app.config.setdefault('DB_POOL_RECYCLE', 3600)
+    app.config.setdefault('DB_POOL_PRE_PING', True)
+    # Réplicas de lectura y segundos que un cliente lee del primario después de escribir
+    app.config.setdefault('SQLALCHEMY_REPLICA_URIS', [])
+    app.config.setdefault('DB_REPLICA_STICKY_SECONDS', 5)
+    # Historial de cambios de tickets (app/audit.py): commits pendientes en la cola, filas por
+    # INSERT, segundos máximos antes de escribir y espera de una petición con la cola llena
+    app.config.setdefault('AUDIT_ENABLED', True)
+    app.config.setdefault('AUDIT_QUEUE_SIZE', 10000)
+    app.config.setdefault('AUDIT_BATCH_SIZE', 500)
+    app.config.setdefault('AUDIT_FLUSH_INTERVAL', 1.0)
+    app.config.setdefault('AUDIT_PUT_TIMEOUT', 0.5)
+    app.config.setdefault('AUDIT_PAGE_SIZE', 50)
+    app.config.setdefault('AUDIT_MAX_PAGE_SIZE', 500)
+    # Hash de contraseñas (app/passwords.py): método de werkzeug con su costo, hilos del pool
+    # de hashing (None = núcleos) y hashes en espera antes de responder 503 (None = 8 por hilo).
+    # Los hashes con otros parámetros se actualizan en el siguiente inicio de sesión
+    app.config.setdefault('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    app.config.setdefault('PASSWORD_SALT_LENGTH', 16)
+    app.config.setdefault('PASSWORD_HASH_WORKERS', None)
+    app.config.setdefault('PASSWORD_HASH_MAX_PENDING', None)
+    # Limitador de inicios de sesión (app/rate_limit.py): intentos seguidos permitidos y
+    # fichas por segundo, por IP y por email
+    app.config.setdefault('LOGIN_RATE_LIMIT_ENABLED', True)
+    app.config.setdefault('LOGIN_BURST_PER_IP', 20)
+    app.config.setdefault('LOGIN_RATE_PER_IP', 1.0)
+    app.config.setdefault('LOGIN_BURST_PER_EMAIL', 5)
+    app.config.setdefault('LOGIN_RATE_PER_EMAIL', 0.1)
+    app.config.setdefault('LOGIN_RATE_LIMIT_MAX_KEYS', 100000)
+    # Caché de las filas renderizadas del dashboard (app/fragments.py): 'memory' (LRU de
+    # ROW_CACHE_SIZE filas por proceso), 'redis' (compartida, con ROW_CACHE_URL y
+    # ROW_CACHE_TTL segundos de vida) o la ruta de una clase propia
+    app.config.setdefault('ROW_CACHE_ENABLED', True)
+    app.config.setdefault('ROW_CACHE_BACKEND', 'memory')
+    app.config.setdefault('ROW_CACHE_URL', None)
+    app.config.setdefault('ROW_CACHE_SIZE', 10000)
+    app.config.setdefault('ROW_CACHE_TTL', 3600)
+    # API asíncrona (asgi.py, app/asgi_api.py): URI con driver asíncrono; None = la de
+    # SQLALCHEMY_DATABASE_URI con aiosqlite o aiomysql
+    app.config.setdefault('SQLALCHEMY_ASYNC_DATABASE_URI', None)
+    # Asignación automática de técnico (app/assignment.py): peso de cada prioridad en la
+    # carga de un técnico y cada cuántos segundos se reconcilia el índice con la BD (0 = nunca)
+    app.config.setdefault('ASSIGN_PRIORITY_WEIGHTS', {'Alta': 3, 'Media': 2, 'Baja': 1})
+    app.config.setdefault('ASSIGN_RECONCILE_INTERVAL', 0)
+    # Codificador JSON de la API y de jsonify (app/serializers.py): 'auto' (orjson si está
+    # instalado), 'orjson' o 'json'
+    app.config.setdefault('API_JSON_BACKEND', 'auto')
+    # Compresión de las respuestas de la API (app/compression.py): desde cuántos bytes, qué
+    # codificaciones en orden de preferencia (las que no estén instaladas se omiten) y su nivel
+    app.config.setdefault('API_COMPRESSION_ENABLED', True)
+    app.config.setdefault('API_COMPRESSION_MIN_SIZE', 1024)
+    app.config.setdefault('API_COMPRESSION_ALGORITHMS', ('zstd', 'br', 'gzip'))
+    app.config.setdefault('API_COMPRESSION_LEVELS', {'zstd': 3, 'br': 4, 'gzip': 6})
+    # Arranque (app/warmup.py): caché de bytecode de las plantillas en disco (None = directorio
+    # temporal de Jinja), calentamiento al iniciar wsgi.py/asgi.py y conexiones que abre por engine
+    app.config.setdefault('TEMPLATE_BYTECODE_CACHE', True)
+    app.config.setdefault('TEMPLATE_CACHE_DIR', None)
+    app.config.setdefault('WARMUP_ON_START', True)
+    app.config.setdefault('WARMUP_DB_CONNECTIONS', 4)
+
+    # Antes de todo lo demás, para que app.logger use el handler no bloqueante
+    from app import logging_setup
+    logging_setup.init_app(app)
+
+    from app import db_routing
+    db_routing.init_app(app)
 
     db.init_app(app)
     login_manager.init_app(app)
 
-    from app.routes import main 
-    # from app.test_routes import main
-    
+    # TEST_ROUTES = True carga los endpoints JSON de prueba (app/test_routes.py)
+    if app.config.get('TEST_ROUTES'):
+        from app.test_routes import main
+    else:
+        from app.routes import main
+
     from app.auth_routes import auth
 
     app.register_blueprint(main)
     app.register_blueprint(auth)
 
+    from app import metrics
+    metrics.init_app(app)
+
+    from app import user_cache
+    user_cache.init_app(app)
+
+    from app import passwords, rate_limit
+    passwords.init_app(app)
+    rate_limit.init_app(app)
+
+    from app import compression, serializers
+    serializers.init_app(app)
+    compression.init_app(app)
+
+    from app import warmup
+    warmup.init_app(app)
+
+    from app.cli import register_commands
+    register_commands(app)
+
+    # Manejadores de cambios de tickets que deben estar activos en ambos modos de rutas
+    from app import archive, assignment, audit, changelog, fragments, live, stats
+    audit.init_app(app)
+    from app.jobs import schedule
+    schedule(app, 'stats-reconcile', app.config['STATS_RECONCILE_INTERVAL'], stats.rebuild)
+    schedule(app, 'changelog-compact', app.config['CHANGE_LOG_COMPACT_INTERVAL'], changelog.compact_expired)
+    schedule(app, 'archive-closed', app.config['ARCHIVE_INTERVAL'], archive.archive_expired)
+    schedule(app, 'assign-reconcile', app.config['ASSIGN_RECONCILE_INTERVAL'], assignment.rebuild)
+
     return app
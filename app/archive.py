@@ -0,0 +1,84 @@
+import logging
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import and_, delete, func, insert, or_, select, union_all
+from app.models import db, Ticket, TicketArchive, utcnow
+from app.serializers import TICKET_FIELDS, ticket_columns
+from app.ticket_events import TICKET_COLUMNS, TicketChange, record
+
+logger = logging.getLogger(__name__)
+
+
+def closed_batch(cutoff, last_id, batch_size):
+    """
+    Siguiente lote de tickets cerrados sin cambios desde `cutoff` (índice ix_ticket_estado_updated).
+    Un ticket sin updated_at (anterior a esa columna) cuenta desde su fecha_creacion.
+    """
+    columns = [getattr(Ticket, key) for key in TICKET_COLUMNS]
+    # COALESCE(updated_at, fecha_creacion) < cutoff, escrito con OR para que el rango
+    # sobre updated_at (NULL incluido) siga usando el índice
+    old_enough = or_(Ticket.updated_at < cutoff, and_(Ticket.updated_at.is_(None), Ticket.fecha_creacion < cutoff))
+    return (select(*columns)
+            .where(Ticket.estado == 'Cerrado', old_enough, Ticket.id < last_id)
+            .order_by(Ticket.updated_at, Ticket.id)
+            .limit(batch_size))
+
+
+def archive_closed(age, batch_size=500):
+    """
+    Mueve a ticket_archive, por lotes, los tickets cerrados sin cambios en los últimos
+    `age` segundos. Cada lote (INSERT en el archivo y DELETE en ticket) se confirma por
+    separado: si se interrumpe, la siguiente ejecución continúa donde quedó.
+
+    Para el resto de la aplicación (contadores, marcadores, búsqueda, dashboard en vivo)
+    un ticket archivado sale de la tabla activa como si se eliminara; la bitácora de
+    cambios lo registra como 'archive' (sigue existiendo, en ticket_archive).
+    Retorna el número de tickets archivados.
+    """
+    cutoff = utcnow() - timedelta(seconds=age)
+    # El último ticket se conserva siempre: en MySQL 5.7 el AUTO_INCREMENT se recalcula
+    # al reiniciar y un ticket nuevo podría recibir el id de uno archivado
+    last_id = db.session.scalar(select(func.max(Ticket.id)))
+    if last_id is None:
+        return 0
+
+    moved = 0
+    while True:
+        # FOR UPDATE: un ticket reabierto mientras tanto no se archiva con su estado anterior
+        rows = db.session.execute(closed_batch(cutoff, last_id, batch_size).with_for_update()).all()
+        if not rows:
+            break
+        values = [row._asdict() for row in rows]
+        now = utcnow()
+        connection = db.session.connection()
+        connection.execute(insert(TicketArchive.__table__), [dict(v, archived_at=now) for v in values])
+        connection.execute(delete(Ticket.__table__).where(Ticket.id.in_([v['id'] for v in values])))
+        record(db.session, [TicketChange('delete', v['id'], v, reason='archive') for v in values])
+        db.session.commit()
+        moved += len(values)
+    logger.info('Tickets cerrados archivados: %s', moved)
+    return moved
+
+
+def archive_expired():
+    """
+    Archivado con la antigüedad y el tamaño de lote configurados; usado por la tarea periódica.
+    """
+    config = current_app.config
+    return archive_closed(config['ARCHIVE_CLOSED_AFTER'], config['ARCHIVE_BATCH_SIZE'])
+
+
+def with_archived():
+    """
+    Select de ticket_columns() sobre los tickets activos y los archivados, ordenado por id.
+    """
+    tickets = union_all(select(*ticket_columns()), select(*ticket_columns(TicketArchive))).subquery()
+    return select(*(tickets.c[field] for field in TICKET_FIELDS)).order_by(tickets.c.id)
+
+
+def get_ticket(id, session=None):
+    """
+    Ticket activo o archivado con ese id, o None.
+    """
+    session = session or db.session
+    return session.get(Ticket, id) or session.get(TicketArchive, id)
@@ -0,0 +1,305 @@
+import asyncio
+import logging
+from datetime import timezone
+from urllib.parse import parse_qsl
+from flask import current_app
+from sqlalchemy import select, text
+from werkzeug.datastructures import Headers, MIMEAccept, MultiDict
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_accept_header, parse_date, parse_etags, http_date
+from werkzeug.routing import Map, Rule
+from app import archive, async_db, audit, changelog, compression, markers, warmup
+from app.conditional import make_etag
+from app.models import Ticket
+from app.serializers import get_format, json_dumps, negotiate_format, ticket_columns, ticket_to_dict, unsupported_format
+
+logger = logging.getLogger(__name__)
+
+# Rutas servidas por la API asíncrona según el modo de la aplicación. Lo demás (HTML,
+# escrituras, API en lote) lo atiende la aplicación Flask: las escrituras dependen de los
+# eventos de la sesión síncrona (contadores, marcadores, bitácora, historial, en vivo).
+TEST_ROUTES_MAP = Map([
+    Rule('/tickets', endpoint='listar_tickets', methods=['GET']),
+    Rule('/tickets/changes', endpoint='cambios_tickets', methods=['GET']),
+    Rule('/tickets/<int:id>', endpoint='listar_un_ticket', methods=['GET']),
+    Rule('/tickets/<int:id>/historial', endpoint='historial_ticket', methods=['GET']),
+])
+# En el modo HTML GET /tickets es el formulario de nuevo ticket (con login): todas las
+# rutas pasan a Flask, con su autenticación y el alcance de cada rol
+ROUTES_MAP = Map([])
+
+
+class AsyncRequest:
+    """
+    Lo que las vistas asíncronas necesitan de una petición ASGI: ruta, argumentos y
+    cabeceras, con los mismos tipos que flask.request.
+    """
+
+    def __init__(self, scope):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query_string = scope.get('query_string', b'').decode('latin-1')
+        self.args = MultiDict(parse_qsl(self.query_string, keep_blank_values=True))
+        self.headers = Headers([(k.decode('latin-1'), v.decode('latin-1')) for k, v in scope['headers']])
+        self.accept_mimetypes = parse_accept_header(self.headers.get('Accept'), MIMEAccept)
+
+    @property
+    def full_path(self):
+        # Igual que flask.request.full_path (el ETag debe coincidir con el de la ruta síncrona)
+        return f'{self.path}?{self.query_string}'
+
+
+class AsyncResponse:
+    """
+    Respuesta de una vista asíncrona; `body` es bytes o un generador asíncrono de bytes.
+    """
+
+    def __init__(self, body=b'', status=200, headers=None, mimetype='application/json'):
+        self.body = body
+        self.status = status
+        self.headers = Headers(headers or {})
+        self.headers.setdefault('Content-Type', mimetype)
+
+    @classmethod
+    def json(cls, data, status=200, headers=None):
+        return cls(json_dumps()(data), status, headers)
+
+    async def compress(self, accept_encoding):
+        """
+        La misma compresión que compression.compress_response aplica a las respuestas
+        de Flask, también fragmento por fragmento si el cuerpo es un generador.
+        """
+        config = current_app.config
+        mimetype = self.headers['Content-Type'].split(';')[0].strip()
+        if (not config['API_COMPRESSION_ENABLED'] or self.status != 200
+                or mimetype not in compression.COMPRESSIBLE_MIMETYPES):
+            return
+        vary = self.headers.get('Vary')
+        self.headers['Vary'] = f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding'
+        name = compression.negotiate(accept_encoding)
+        if name is None:
+            return
+
+        min_size = config['API_COMPRESSION_MIN_SIZE']
+        if isinstance(self.body, bytes):
+            if len(self.body) < min_size:
+                return
+            encoder = compression.get_encoder(name)
+            self.body = encoder.compress(self.body) + encoder.finish()
+        else:
+            head, size = [], 0
+            async for chunk in self.body:
+                head.append(chunk)
+                size += len(chunk)
+                if size >= min_size:
+                    break
+            else:
+                # Terminó antes del umbral: se envía tal cual
+                self.body = b''.join(head)
+                return
+            self.body = _compress_stream(compression.get_encoder(name), head, self.body)
+
+        self.headers['Content-Encoding'] = name
+        etag = self.headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            self.headers['ETag'] = 'W/' + etag
+        compression.COMPRESSED.inc(encoding=name)
+
+    async def __call__(self, send):
+        raw_headers = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in self.headers.items()]
+        if isinstance(self.body, bytes):
+            raw_headers.append((b'content-length', str(len(self.body)).encode()))
+            await send({'type': 'http.response.start', 'status': self.status, 'headers': raw_headers})
+            await send({'type': 'http.response.body', 'body': self.body})
+            return
+        await send({'type': 'http.response.start', 'status': self.status, 'headers': raw_headers})
+        async for chunk in self.body:
+            if chunk:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+class AsyncTicketAPI:
+    """
+    Aplicación ASGI con los GET de la API JSON de tickets como vistas asíncronas, sobre
+    un engine asíncrono (app/async_db.py): mientras una consulta espera a la base, el
+    mismo proceso atiende otras peticiones en lugar de ocupar un hilo por cada una.
+
+    Las rutas que no son suyas pasan a la aplicación Flask (`flask_app`) a través de
+    asgiref. Cada petición se atiende dentro del contexto de `flask_app`, así que las
+    funciones compartidas leen la misma configuración.
+    """
+
+    def __init__(self, flask_app):
+        try:
+            from asgiref.wsgi import WsgiToAsgi
+            from sqlalchemy.ext.asyncio import async_sessionmaker
+        except ImportError as e:
+            raise RuntimeError('El modo ASGI requiere asgiref y greenlet (pip install "flask[async]" '
+                               '"sqlalchemy[asyncio]" aiosqlite uvicorn)') from e
+        self.flask_app = flask_app
+        self.fallback = WsgiToAsgi(flask_app)
+        self.url_map = TEST_ROUTES_MAP if flask_app.config.get('TEST_ROUTES') else ROUTES_MAP
+        self.engine = async_db.create_engine(flask_app)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.views = {
+            'listar_tickets': self.listar_tickets,
+            'cambios_tickets': self.cambios_tickets,
+            'listar_un_ticket': self.listar_un_ticket,
+            'historial_ticket': self.historial_ticket,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http':
+            return await self.fallback(scope, receive, send)
+        try:
+            endpoint, kwargs = self.url_map.bind('').match(scope['path'], scope['method'])
+        except HTTPException:
+            return await self.fallback(scope, receive, send)
+
+        request = AsyncRequest(scope)
+        with self.flask_app.app_context():
+            try:
+                response = await self.views[endpoint](request, **kwargs)
+                await response.compress(request.headers.get('Accept-Encoding'))
+            except Exception:
+                logger.exception('Error en %s %s', request.method, request.path)
+                response = AsyncResponse.json({'error': 'Error interno del servidor.'}, 500)
+            await response(send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if self.flask_app.config['WARMUP_ON_START']:
+                    await self._warm_up()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _warm_up(self):
+        # El servidor no acepta conexiones hasta completar el arranque: la parte síncrona
+        # corre en un hilo y el pool del engine asíncrono abre su primera conexión
+        await asyncio.to_thread(warmup.warm_up, self.flask_app)
+        try:
+            async with self.engine.connect() as connection:
+                await connection.execute(text('SELECT 1'))
+        except Exception:
+            logger.exception('Error en el calentamiento del engine asíncrono')
+
+    async def _run(self, func, *args):
+        # Las funciones síncronas de consulta (changelog, audit, archive...) reciben la
+        # sesión síncrona de la AsyncSession; sus consultas no bloquean el event loop
+        async with self.sessions() as session:
+            return await session.run_sync(lambda sync_session: func(*args, session=sync_session))
+
+    async def _stream_rows(self, query):
+        # Cursor del servidor leído por lotes: la memoria no crece con el número de tickets
+        batch_size = self.flask_app.config['STREAM_BATCH_SIZE']
+        async with self.engine.connect() as connection:
+            result = await connection.stream(query.execution_options(yield_per=batch_size))
+            async for rows in result.partitions():
+                yield rows
+
+    async def _encode(self, query, encoder, prefix='', suffix=''):
+        # Igual que serializers.encode_stream, con los lotes del cursor asíncrono
+        yield encoder.head(prefix)
+        first = True
+        async for rows in self._stream_rows(query):
+            if rows:
+                yield encoder.chunk(rows, first)
+                first = False
+        yield encoder.tail(suffix)
+
+    async def listar_tickets(self, request):
+        """
+        GET /tickets (TEST_ROUTES): misma respuesta y mismo ETag que listar_tickets de
+        app/test_routes.py.
+        """
+        scope = markers.scope_for(None)
+        version, updated_at = await self._run(markers.get, scope)
+        etag = make_etag([scope, version, updated_at, '', '', request.full_path, request.headers.get('Accept', '')])
+        headers = {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache', 'Vary': 'Accept'}
+        last_modified = updated_at.replace(tzinfo=timezone.utc) if updated_at else None
+        if last_modified:
+            headers['Last-Modified'] = http_date(last_modified)
+
+        # Cursor para GET /tickets/changes (changelog.current_cursor), leído antes que
+        # los tickets y enviado también con 304, como en la ruta síncrona
+        headers['X-Changes-Cursor'] = str(await self._run(changelog.current_cursor))
+
+        if_none_match = request.headers.get('If-None-Match')
+        since = parse_date(request.headers.get('If-Modified-Since'))
+        if if_none_match:
+            not_modified = parse_etags(if_none_match).contains_weak(etag)
+        else:
+            not_modified = bool(since and last_modified and last_modified.replace(microsecond=0) <= since)
+        if not_modified:
+            return AsyncResponse(b'', 304, headers)
+
+        if request.args.get('archivados') == '1':
+            query = archive.with_archived()
+        else:
+            query = select(*ticket_columns()).order_by(Ticket.id)
+
+        name = negotiate_format(request)
+        if name is None:
+            return AsyncResponse.json(unsupported_format(), 406)
+        encoder = get_format(name)
+        return AsyncResponse(self._encode(query, encoder), 200, headers, encoder.mimetype)
+
+    async def cambios_tickets(self, request):
+        since = request.args.get('since', type=int)
+        if since is None:
+            cursor = await self._run(changelog.current_cursor)
+            return AsyncResponse.json({'cursor': cursor, 'has_more': False, 'upserts': [], 'deleted': [], 'archived': []})
+
+        config = self.flask_app.config
+        limit = request.args.get('limit', config['CHANGES_PAGE_SIZE'], type=int)
+        limit = max(1, min(limit, config['CHANGES_MAX_PAGE_SIZE']))
+        try:
+            return AsyncResponse.json(await self._run(changelog.changes_since, since, limit))
+        except changelog.CursorExpired as e:
+            return AsyncResponse.json({'error': str(e), 'watermark': e.watermark}, 410)
+
+    async def listar_un_ticket(self, request, id):
+        data = await self._run(lambda id, session: _ticket_dict(archive.get_ticket(id, session)), id)
+        if data is None:
+            return AsyncResponse.json({'error': 'Ticket no encontrado.'}, 404)
+        return AsyncResponse.json(data)
+
+    async def historial_ticket(self, request, id):
+        config = self.flask_app.config
+        limite = request.args.get('limite', config['AUDIT_PAGE_SIZE'], type=int)
+        limite = max(1, min(limite, config['AUDIT_MAX_PAGE_SIZE']))
+        entradas, siguiente = await self._run(audit.history_page, id, request.args.get('antes', type=int), limite)
+        return AsyncResponse.json({'ticket_id': id, 'historial': entradas, 'siguiente': siguiente})
+
+
+async def _compress_stream(encoder, head, rest):
+    try:
+        yield encoder.compress(b''.join(head))
+        async for chunk in rest:
+            data = encoder.compress(chunk)
+            if data:
+                yield data
+        yield encoder.finish()
+    finally:
+        # Cierra el generador original (y su conexión) aunque el cliente se desconecte
+        await rest.aclose()
+
+
+def _ticket_dict(ticket):
+    # Dentro de la sesión: los atributos se leen antes de cerrarla
+    return ticket_to_dict(ticket) if ticket is not None else None
+
+
+def create_asgi_app(flask_app):
+    """
+    Aplicación ASGI de producción: la API de tickets asíncrona delante de `flask_app`.
+    """
+    return AsyncTicketAPI(flask_app)
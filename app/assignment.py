@@ -0,0 +1,165 @@
+import heapq
+import logging
+import threading
+from flask import current_app
+from sqlalchemy import func, select
+from app.models import db, Ticket
+from app import ticket_events
+from app.choices import assignee_choices
+from app.signals import usuario_cambiado
+from app.stats import ABIERTOS
+from app.warmup import on_warm_up
+
+logger = logging.getLogger(__name__)
+
+# Valor del <select> de técnico y de tecnico_id en la API que pide asignación automática
+AUTO = 0
+
+
+class LoadIndex:
+    """
+    Carga de tickets abiertos de cada técnico en un heap: la raíz es el técnico con menos
+    carga ponderada (suma del peso de la prioridad de sus tickets abiertos), luego con
+    menos tickets abiertos y luego el de menor id.
+
+    Cada cambio de carga agrega una entrada nueva al heap; las anteriores del mismo técnico
+    quedan obsoletas y se descartan al llegar a la raíz (o al compactar). Elegir técnico
+    es O(log n) amortizado y no consulta la base de datos.
+
+    `generation` se incrementa al empezar cada reconstrucción (justo antes de su consulta):
+    un cambio confirmado antes de ese momento ya está en la consulta y no se vuelve a sumar.
+    """
+
+    def __init__(self, weights):
+        self.weights = weights
+        self.built = False
+        self.generation = 0
+        self.lock = threading.Lock()
+        self._loads = {}
+        self._heap = []
+
+    def _weight(self, prioridad):
+        return self.weights.get(prioridad, 1)
+
+    def _push(self, tecnico_id):
+        weighted, count = self._loads[tecnico_id]
+        heapq.heappush(self._heap, (weighted, count, tecnico_id))
+        # Sin compactar, las entradas obsoletas crecerían con cada cambio
+        if len(self._heap) > 4 * len(self._loads) + 64:
+            self._heap = [(w, c, id) for id, (w, c) in self._loads.items()]
+            heapq.heapify(self._heap)
+
+    def replace(self, tecnico_ids, rows):
+        """
+        Reemplaza el índice: `tecnico_ids` son todos los técnicos y `rows` tuplas
+        (tecnico_id, prioridad, tickets abiertos).
+        """
+        loads = {id: [0, 0] for id in tecnico_ids}
+        for tecnico_id, prioridad, count in rows:
+            if tecnico_id in loads:
+                loads[tecnico_id][0] += self._weight(prioridad) * count
+                loads[tecnico_id][1] += count
+        self._loads = loads
+        self._heap = [(w, c, id) for id, (w, c) in loads.items()]
+        heapq.heapify(self._heap)
+        self.built = True
+
+    def _adjust(self, values, sign):
+        tecnico_id = values.get('tecnico_id')
+        if values.get('estado') not in ABIERTOS or tecnico_id not in self._loads:
+            return
+        load = self._loads[tecnico_id]
+        load[0] += sign * self._weight(values.get('prioridad'))
+        load[1] += sign
+        self._push(tecnico_id)
+
+    def apply_changes(self, changes):
+        # Se lee antes de esperar el lock: los cambios ya están confirmados. Si mientras
+        # tanto empezó una reconstrucción, su consulta los incluye
+        generation = self.generation
+        with self.lock:
+            if not self.built or generation != self.generation:
+                return
+            for change in changes:
+                if change.op in ('update', 'delete'):
+                    before = dict(change.values, **change.old) if change.op == 'update' else change.values
+                    self._adjust(before, -1)
+                if change.op in ('create', 'update'):
+                    self._adjust(change.values, +1)
+
+    def least_loaded(self):
+        """
+        Id del técnico con menos carga, o None si no hay técnicos.
+        """
+        with self.lock:
+            heap = self._heap
+            while heap:
+                weighted, count, tecnico_id = heap[0]
+                if self._loads.get(tecnico_id) == [weighted, count]:
+                    return tecnico_id
+                heapq.heappop(heap)
+            return None
+
+    def load(self, tecnico_id):
+        """
+        (carga ponderada, tickets abiertos) del técnico.
+        """
+        with self.lock:
+            return tuple(self._loads.get(tecnico_id, (0, 0)))
+
+
+_index = None
+
+
+def _get():
+    global _index
+    if _index is None:
+        _index = LoadIndex(current_app.config['ASSIGN_PRIORITY_WEIGHTS'])
+        ticket_events.on_commit(_index.apply_changes)
+    return _index
+
+
+def get_index():
+    """
+    Índice de carga del proceso; se construye desde la BD en el primer uso.
+    """
+    index = _get()
+    if not index.built:
+        rebuild()
+    return index
+
+
+@on_warm_up('assignment')
+def rebuild():
+    """
+    Reconstruye el índice con una consulta GROUP BY sobre los tickets abiertos (también
+    es la reconciliación periódica: corrige cambios hechos por fuera de la aplicación).
+    """
+    index = _get()
+    query = (select(Ticket.tecnico_id, Ticket.prioridad, func.count())
+             .where(Ticket.estado.in_(ABIERTOS))
+             .group_by(Ticket.tecnico_id, Ticket.prioridad))
+    # Con el lock tomado, los cambios confirmados mientras tanto esperan al índice nuevo,
+    # y los que la consulta ya incluye se descartan (ver LoadIndex.generation). Queda una
+    # ventana mínima entre el incremento y el inicio de la consulta; la reconciliación
+    # periódica corrige lo que se cuele por ahí
+    with index.lock:
+        tecnicos = [id for id, _ in assignee_choices.choices('Técnico')]
+        index.generation += 1
+        index.replace(tecnicos, db.session.execute(query).all())
+    logger.debug('Índice de carga de técnicos reconstruido (%s técnicos)', len(tecnicos))
+    return len(tecnicos)
+
+
+def least_loaded_tecnico():
+    """
+    Técnico al que asignar un ticket nuevo (el de menor carga), o None si no hay técnicos.
+    """
+    return get_index().least_loaded()
+
+
+@usuario_cambiado.connect
+def _on_usuario_cambiado(sender, user_id, **kwargs):
+    # Un técnico nuevo, eliminado o con otro rol: el índice se reconstruye en el próximo uso
+    if _index is not None:
+        _index.built = False
@@ -0,0 +1,41 @@
+from sqlalchemy.engine import make_url
+from app.db_routing import POOL_OPTIONS
+
+# Dialecto -> driver asíncrono usado si no se define SQLALCHEMY_ASYNC_DATABASE_URI
+ASYNC_DRIVERS = {
+    'sqlite': 'aiosqlite',
+    'mysql': 'aiomysql',
+}
+
+
+def async_url(url):
+    """
+    La URI de SQLALCHEMY_DATABASE_URI con el driver asíncrono del mismo dialecto
+    ('mysql+pymysql://...' -> 'mysql+aiomysql://...', 'sqlite:///...' -> 'sqlite+aiosqlite:///...').
+    """
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f'No hay driver asíncrono conocido para {url.get_backend_name()!r}: '
+                           'definir SQLALCHEMY_ASYNC_DATABASE_URI')
+    return url.set(drivername=f'{url.get_backend_name()}+{driver}')
+
+
+def create_engine(app):
+    """
+    Engine asíncrono de la base principal, con las mismas opciones de pool (DB_*) que el
+    engine síncrono. Requiere el driver: aiosqlite, aiomysql o asyncmy (este último con
+    SQLALCHEMY_ASYNC_DATABASE_URI = 'mysql+asyncmy://...').
+    """
+    try:
+        from sqlalchemy.ext.asyncio import create_async_engine
+    except ImportError as e:
+        raise RuntimeError('La API asíncrona requiere greenlet (pip install "sqlalchemy[asyncio]")') from e
+
+    config = app.config
+    url = config['SQLALCHEMY_ASYNC_DATABASE_URI'] or async_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = {option: config[key] for key, option in POOL_OPTIONS.items() if config.get(key) is not None}
+    try:
+        return create_async_engine(url, **options)
+    except ImportError as e:
+        raise RuntimeError(f'Falta el driver asíncrono de {url}: {e}') from e
@@ -0,0 +1,219 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from flask import current_app, g, has_app_context, has_request_context
+from sqlalchemy import insert, select
+from app.models import db, TicketHistory, utcnow
+from app import ticket_events
+from app.metrics import REGISTRY, Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Columnas que cambian con cualquier edición: no se registran como diferencias
+IGNORED_FIELDS = ('version', 'updated_at')
+
+# Marca de fin para el hilo de escritura
+_STOP = object()
+
+WRITTEN = REGISTRY.register(Counter(
+    'audit_entries_written_total', 'Entradas del historial de tickets escritas.', ()))
+SYNC_WRITES = REGISTRY.register(Counter(
+    'audit_sync_writes_total', 'Lotes del historial escritos en la petición por tener la cola llena.', ()))
+DROPPED = REGISTRY.register(Counter(
+    'audit_entries_dropped_total', 'Entradas del historial descartadas tras fallar su escritura.', ()))
+
+
+def _text(value):
+    if value is None:
+        return None
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def history_entries(changes, user_id, now):
+    """
+    Filas de ticket_history para `changes`: una por campo modificado en cada 'update',
+    una sola en 'create', 'delete' y 'archive'.
+    """
+    rows = []
+    for change in changes:
+        base = {'ticket_id': change.id, 'user_id': user_id, 'changed_at': now}
+        if change.op != 'update':
+            op = 'archive' if change.reason == 'archive' else change.op
+            rows.append(dict(base, op=op, field=None, old_value=None, new_value=None))
+            continue
+        for field, old in sorted(change.old.items()):
+            if field not in IGNORED_FIELDS:
+                rows.append(dict(base, op='update', field=field,
+                                 old_value=_text(old), new_value=_text(change.values.get(field))))
+    return rows
+
+
+class AuditWriter(threading.Thread):
+    """
+    Escribe el historial en segundo plano: las peticiones solo encolan sus filas y este
+    hilo las inserta por lotes de hasta `batch_size` filas, a lo sumo `interval` segundos
+    después de encolarse.
+
+    La cola está acotada a `queue_size` commits. Si se llena, quien encola espera hasta
+    `put_timeout` segundos y después escribe su lote él mismo: las peticiones se frenan
+    en lugar de perder historial. stop() escribe lo pendiente antes de terminar.
+    """
+
+    def __init__(self, app, queue_size=10000, batch_size=500, interval=1.0, put_timeout=0.5):
+        super().__init__(name='audit-writer', daemon=True)
+        self.app = app
+        self.queue = queue.Queue(queue_size)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.put_timeout = put_timeout
+        self._stopped = False
+
+    def enqueue(self, rows):
+        if not rows:
+            return
+        if not self._stopped:
+            try:
+                self.queue.put(rows, timeout=self.put_timeout)
+                return
+            except queue.Full:
+                logger.warning('Cola del historial llena: se escribe en la petición (%s filas)', len(rows))
+                SYNC_WRITES.inc()
+        self.write(rows)
+
+    def run(self):
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            # Desde el primer commit pendiente se junta hasta completar el lote o hasta
+            # `interval` segundos, lo que ocurra primero
+            deadline = time.monotonic() + self.interval
+            batch = []
+            while True:
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.extend(item)
+                remaining = deadline - time.monotonic()
+                if stopping or len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            self.write(batch)
+
+    def write(self, rows, attempts=3):
+        """
+        Inserta `rows` en una transacción propia (fuera de la sesión de la petición).
+        Reintenta ante errores; si todos fallan, las filas se descartan y se registra.
+        """
+        if not rows:
+            return
+        for attempt in range(1, attempts + 1):
+            try:
+                with self.app.app_context():
+                    with db.engine.begin() as connection:
+                        connection.execute(insert(TicketHistory.__table__), rows)
+                WRITTEN.inc(len(rows))
+                return
+            except Exception:
+                logger.exception('Error al escribir el historial (intento %s de %s)', attempt, attempts)
+                time.sleep(0.1 * attempt)
+        DROPPED.inc(len(rows))
+
+    def stop(self, timeout=10):
+        """
+        Escribe las filas pendientes y detiene el hilo (se llama al terminar el proceso).
+        """
+        if self._stopped:
+            return
+        self._stopped = True
+        if self.is_alive():
+            self.queue.put(_STOP)
+            self.join(timeout)
+        # Lo encolado justo después de la marca de fin
+        rows = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                rows.extend(item)
+        self.write(rows)
+
+
+# Hilos de escritura de cada aplicación creada en el proceso
+_writers = []
+
+
+def _pending_writers():
+    return [w for w in _writers if w.is_alive()]
+
+
+@atexit.register
+def _flush_all():
+    for writer in _pending_writers():
+        writer.stop()
+
+
+REGISTRY.register(Gauge(
+    'audit_queue_depth', 'Commits con historial pendiente de escribir.', (),
+    collect=lambda: {(): sum(w.queue.qsize() for w in _pending_writers())}))
+
+
+def _actor_id():
+    # Solo el usuario que Flask-Login ya cargó en la petición: después del commit la
+    # sesión no puede consultar la base de datos
+    user = g.get('_login_user') if has_request_context() else None
+    return user.id if user is not None and user.is_authenticated else None
+
+
+@ticket_events.on_commit
+def capture_changes(changes):
+    """
+    Encola el historial de los cambios confirmados; la petición no espera la escritura.
+    """
+    if not has_app_context():
+        return
+    writer = current_app.extensions.get('audit')
+    if writer is not None:
+        writer.enqueue(history_entries(changes, _actor_id(), utcnow()))
+
+
+def history_page(ticket_id, before=None, limit=50, session=None):
+    """
+    Entradas del historial de un ticket, de la más reciente a la más antigua, paginadas
+    por id (?antes=<id de la última entrada recibida>). Retorna (entradas, siguiente cursor).
+    Los cambios de los últimos instantes pueden no aparecer aún (escritura en segundo plano).
+    """
+    query = select(TicketHistory).where(TicketHistory.ticket_id == ticket_id)
+    if before is not None:
+        query = query.where(TicketHistory.id < before)
+    rows = (session or db.session).scalars(query.order_by(TicketHistory.id.desc()).limit(limit + 1)).all()
+    entries = [{
+        'id': row.id,
+        'op': row.op,
+        'field': row.field,
+        'old': row.old_value,
+        'new': row.new_value,
+        'user_id': row.user_id,
+        'changed_at': row.changed_at.isoformat(),
+    } for row in rows[:limit]]
+    return entries, (entries[-1]['id'] if len(rows) > limit else None)
+
+
+def init_app(app):
+    """
+    Inicia el hilo de escritura del historial (si AUDIT_ENABLED).
+    """
+    if not app.config['AUDIT_ENABLED']:
+        return
+    writer = AuditWriter(app, app.config['AUDIT_QUEUE_SIZE'], app.config['AUDIT_BATCH_SIZE'],
+                         app.config['AUDIT_FLUSH_INTERVAL'], app.config['AUDIT_PUT_TIMEOUT'])
+    app.extensions['audit'] = writer
+    _writers.append(writer)
+    writer.start()
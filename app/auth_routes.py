@@ -1,15 +1,29 @@
-from flask import Blueprint, render_template, redirect, url_for, flash
+from flask import Blueprint, render_template, redirect, url_for, flash, request
 from app.forms import LoginForm, RegisterForm
 from app.models import db, User, Role
+from app.signals import usuario_cambiado
+from app.passwords import REHASHED
+from app.rate_limit import login_retry_after, login_succeeded
 from flask_login import login_user, logout_user
 from flask import current_app
+import hashlib
+import hmac
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _email_ref(email):
+    # Referencia del email para el log: permite correlacionar intentos sin escribir el
+    # email (dato personal) ni permitir comprobar por fuerza bruta qué cuentas existen
+    key = current_app.config['SECRET_KEY'].encode()
+    return hmac.new(key, (email or '').strip().lower().encode(), hashlib.sha256).hexdigest()[:12]
 
 # Blueprint de autenticación: gestiona login, registro y logout
 auth = Blueprint('auth', __name__)
 
 @auth.route('/login', methods=['GET', 'POST'])
 def login():
-    print("Hola mundo")
     """
     Inicia sesión de un usuario existente si las credenciales son válidas.
     """
@@ -17,18 +31,34 @@ def login():
 
     if form.is_submitted():  #verifica si el formulario fue enviado
         if form.validate_on_submit():
+            # El limitador rechaza antes de consultar la base y de calcular el hash
+            retry_after = login_retry_after(request.remote_addr, form.email.data)
+            if retry_after:
+                logger.info('Inicio de sesión limitado para el email %s desde %s', _email_ref(form.email.data),
+                            request.remote_addr)
+                flash(f'Demasiados intentos. Espera {retry_after} segundo(s) e intenta de nuevo.', 'danger')
+                return render_template('login.html', form=form), 429, {'Retry-After': str(retry_after)}
+
             user = User.query.filter_by(email=form.email.data).first()
-            print(f"Form submitted with email: {form.email.data}")
             
             if user and user.check_password(form.password.data):
+                if user.password_needs_rehash():
+                    # Hash con parámetros anteriores a la política actual: se actualiza
+                    # ahora que se conoce la contraseña
+                    user.set_password(form.password.data)
+                    db.session.commit()
+                    usuario_cambiado.send(current_app._get_current_object(), user_id=user.id)
+                    REHASHED.inc()
+                login_succeeded(form.email.data)
                 login_user(user)
+                logger.debug('Inicio de sesión: usuario %s', user.id)
                 return redirect(url_for('main.dashboard'))
             
+            logger.info('Inicio de sesión fallido para el email %s', _email_ref(form.email.data))
             flash('Email o contraseña incorrectos.', 'danger')
         else:
             flash('Formulario inválido. Verifica tus datos.', 'danger')
 
-    print("Renderizando log in")
     return render_template('login.html', form=form)
 
 
@@ -51,14 +81,14 @@ def register():
             role=role
         )
         user.set_password(form.password.data)
-        print(f"user {user}")
 
         # Guarda en la base de datos
         db.session.add(user)
         db.session.commit()
+        usuario_cambiado.send(current_app._get_current_object(), user_id=user.id)
 
         # Muestra mensaje de éxito
-        print('User registered successfully.')
+        logger.info('Usuario registrado: %s (id %s, rol %s)', user.username, user.id, form.role.data)
         flash('User registered successfully.')
         return redirect(url_for('auth.login'))
     
@@ -0,0 +1,257 @@
+from datetime import datetime, timezone
+from itertools import groupby
+from sqlalchemy import delete, insert, select, text, update
+from sqlalchemy.exc import SQLAlchemyError
+from app.models import db, Ticket, User, utcnow
+from app.ticket_events import TICKET_COLUMNS, TicketChange, record
+from app.ticket_queries import ESTADOS, PRIORIDADES
+
+# Campos que se pueden escribir por la API en lote
+WRITABLE_FIELDS = ('asunto', 'descripcion', 'prioridad', 'estado', 'usuario_id', 'tecnico_id', 'fecha_creacion')
+REQUIRED_FIELDS = ('asunto', 'descripcion', 'prioridad', 'estado', 'usuario_id', 'tecnico_id')
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+
+def clean_ticket_data(data, partial=False):
+    """
+    Valida un ticket recibido como dict. Retorna (valores, None) o (None, mensaje de error).
+    Con partial=True (actualizaciones) solo se validan los campos presentes; un campo
+    requerido presente tampoco puede quedar vacío (NOT NULL revertiría el lote entero).
+    """
+    if not isinstance(data, dict):
+        return None, 'Se esperaba un objeto JSON'
+
+    values = {k: data[k] for k in WRITABLE_FIELDS if k in data}
+    required = [k for k in REQUIRED_FIELDS if k in values] if partial else REQUIRED_FIELDS
+    missing = [k for k in required if values.get(k) in (None, '')]
+    if missing:
+        return None, f"Campos requeridos: {', '.join(missing)}"
+
+    if 'prioridad' in values and values['prioridad'] not in PRIORIDADES:
+        return None, f"prioridad inválida: {values['prioridad']!r}"
+    if 'estado' in values and values['estado'] not in ESTADOS:
+        return None, f"estado inválido: {values['estado']!r}"
+    for key in ('usuario_id', 'tecnico_id'):
+        if key in values and (isinstance(values[key], bool) or not isinstance(values[key], int)):
+            return None, f'{key} debe ser un entero'
+    if 'fecha_creacion' in values:
+        try:
+            values['fecha_creacion'] = datetime.fromisoformat(values['fecha_creacion'])
+        except (TypeError, ValueError):
+            return None, 'fecha_creacion debe estar en formato ISO 8601'
+    return values, None
+
+
+def _existing_user_ids(rows):
+    ids = {row[key] for row in rows for key in ('usuario_id', 'tecnico_id') if key in row}
+    if not ids:
+        return set()
+    return set(db.session.scalars(select(User.id).where(User.id.in_(ids))))
+
+
+def _check_users(values, user_ids):
+    for key in ('usuario_id', 'tecnico_id'):
+        if key in values and values[key] not in user_ids:
+            return f'{key} {values[key]} no existe'
+    return None
+
+
+def _current_rows(ids):
+    # Valores actuales de los tickets del lote (para validar y registrar los cambios).
+    # FOR UPDATE bloquea las filas hasta confirmar el lote: la versión y los valores
+    # anteriores no pueden cambiar entre esta lectura y el UPDATE
+    columns = [getattr(Ticket, key) for key in TICKET_COLUMNS]
+    query = select(*columns).where(Ticket.id.in_(ids)).with_for_update()
+    return {row.id: row._asdict() for row in db.session.execute(query)}
+
+
+def _apply_chunk(chunk, results, write):
+    """
+    Ejecuta `write(chunk)` en una transacción. Si falla, se revierte el lote completo
+    y todos sus elementos se reportan con error.
+    """
+    try:
+        write(chunk)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        message = f'Lote revertido: {e.__class__.__name__}: {getattr(e, "orig", None) or e}'
+        for index, _ in chunk:
+            results[index] = {'index': index, 'status': 'error', 'error': message}
+
+
+def _insert_returning_ids(rows):
+    # Solo MySQL (sin RETURNING); no se ha probado contra un servidor real, las pruebas
+    # usan SQLite. Cada grupo de filas con las mismas columnas se envía como un único
+    # INSERT ... VALUES (...), (...): es un "simple insert" (se sabe de antemano cuántas
+    # filas tiene), así que InnoDB le asigna ids consecutivos con cualquier
+    # innodb_autoinc_lock_mode, y LAST_INSERT_ID() (lastrowid) es el de la primera fila.
+    # El paso entre ids es @@auto_increment_increment (mayor que 1 en algunos clústeres).
+    step = db.session.scalar(text('SELECT @@session.auto_increment_increment'))
+    ids = []
+    for _, group in groupby(rows, key=lambda row: tuple(row)):
+        group = list(group)
+        result = db.session.execute(insert(Ticket).values(group))
+        ids.extend(result.lastrowid + i * step for i in range(len(group)))
+    return ids
+
+
+def insert_tickets(rows):
+    """
+    Inserta los tickets `rows` (dicts de columnas ya validados) en la transacción actual y
+    registra sus cambios. No confirma. Retorna los ids asignados, en el mismo orden.
+    """
+    # Con RETURNING (SQLite, MariaDB, PostgreSQL) un solo executemany retorna los ids en el
+    # orden enviado. Sin RETURNING (MySQL) se calculan desde LAST_INSERT_ID() (_insert_returning_ids)
+    if db.engine.dialect.insert_executemany_returning_sort_by_parameter_order:
+        ids = db.session.scalars(
+            insert(Ticket).returning(Ticket.id, sort_by_parameter_order=True), rows
+        ).all()
+    else:
+        ids = _insert_returning_ids(rows)
+    record(db.session, [
+        TicketChange('create', id, dict({key: None for key in TICKET_COLUMNS}, **values, id=id))
+        for values, id in zip(rows, ids)
+    ])
+    return ids
+
+
+def bulk_create_tickets(items, chunk_size):
+    """
+    Inserta los tickets válidos de `items` con INSERT de varias filas (executemany),
+    una transacción por lote de `chunk_size`. Retorna un resultado por elemento, en orden.
+    """
+    results = [None] * len(items)
+    now = datetime.now(timezone.utc)
+
+    valid = []
+    for index, data in enumerate(items):
+        values, error = clean_ticket_data(data)
+        if error:
+            results[index] = {'index': index, 'status': 'error', 'error': error}
+        else:
+            values.setdefault('fecha_creacion', now)
+            valid.append((index, values))
+
+    def write(chunk):
+        ids = insert_tickets([values for _, values in chunk])
+        for (index, _), id in zip(chunk, ids):
+            results[index] = {'index': index, 'status': 'created', 'id': id}
+
+    for _, chunk in _chunks(valid, chunk_size):
+        user_ids = _existing_user_ids([values for _, values in chunk])
+        ok = []
+        for index, values in chunk:
+            error = _check_users(values, user_ids)
+            if error:
+                results[index] = {'index': index, 'status': 'error', 'error': error}
+            else:
+                ok.append((index, values))
+        if ok:
+            _apply_chunk(ok, results, write)
+    return results
+
+
+def bulk_update_tickets(items, chunk_size):
+    """
+    Aplica parches {"id": ..., campos...} con UPDATE por clave primaria en lote
+    (executemany), una transacción por lote. Retorna un resultado por elemento.
+    """
+    results = [None] * len(items)
+
+    valid = []
+    for index, data in enumerate(items):
+        values, error = clean_ticket_data(data, partial=True)
+        id = data.get('id') if isinstance(data, dict) else None
+        if not error and (isinstance(id, bool) or not isinstance(id, int)):
+            error = 'id debe ser un entero'
+        if not error and not values:
+            error = 'No hay campos para actualizar'
+        if error:
+            results[index] = {'index': index, 'status': 'error', 'error': error}
+        else:
+            valid.append((index, dict(values, id=id)))
+
+    current = {}
+
+    def write(chunk):
+        now = utcnow()
+        changes, rows = [], []
+        for index, values in chunk:
+            results[index] = {'index': index, 'status': 'updated', 'id': values['id']}
+            before = current[values['id']]
+            values = dict(values, version=before['version'] + 1, updated_at=now)
+            old = {k: before[k] for k, v in values.items() if before[k] != v}
+            # Un mismo id puede repetirse en el lote: el siguiente parche parte de este
+            current[values['id']] = dict(before, **values)
+            changes.append(TicketChange('update', values['id'], current[values['id']], old))
+            rows.append(values)
+        db.session.execute(update(Ticket), rows)
+        record(db.session, changes)
+
+    for _, chunk in _chunks(valid, chunk_size):
+        current = _current_rows([values['id'] for _, values in chunk])
+        existing = set(current)
+        user_ids = _existing_user_ids([values for _, values in chunk])
+        ok = []
+        for index, values in chunk:
+            error = _check_users(values, user_ids)
+            if values['id'] not in existing:
+                results[index] = {'index': index, 'status': 'not_found', 'id': values['id']}
+            elif error:
+                results[index] = {'index': index, 'status': 'error', 'id': values['id'], 'error': error}
+            else:
+                ok.append((index, values))
+        if ok:
+            _apply_chunk(ok, results, write)
+        else:
+            # Libera los bloqueos de _current_rows
+            db.session.rollback()
+    return results
+
+
+def bulk_delete_tickets(ids, chunk_size):
+    """
+    Elimina los tickets de `ids` con un DELETE ... WHERE id IN (...) por lote.
+    Retorna un resultado por elemento.
+    """
+    results = [None] * len(ids)
+
+    valid = []
+    for index, id in enumerate(ids):
+        if isinstance(id, bool) or not isinstance(id, int):
+            results[index] = {'index': index, 'status': 'error', 'error': 'id debe ser un entero'}
+        else:
+            valid.append((index, id))
+
+    current = {}
+
+    def write(chunk):
+        db.session.execute(
+            delete(Ticket).where(Ticket.id.in_([id for _, id in chunk])),
+            execution_options={'synchronize_session': False},
+        )
+        for index, id in chunk:
+            results[index] = {'index': index, 'status': 'deleted', 'id': id}
+        record(db.session, [TicketChange('delete', id, current[id]) for id in {id for _, id in chunk}])
+
+    for _, chunk in _chunks(valid, chunk_size):
+        current = _current_rows([id for _, id in chunk])
+        ok, seen = [], set()
+        for index, id in chunk:
+            if id in seen:
+                results[index] = {'index': index, 'status': 'deleted', 'id': id}
+            elif id in current:
+                seen.add(id)
+                ok.append((index, id))
+            else:
+                results[index] = {'index': index, 'status': 'not_found', 'id': id}
+        if ok:
+            _apply_chunk(ok, results, write)
+        else:
+            db.session.rollback()
+    return results
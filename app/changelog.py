@@ -0,0 +1,166 @@
+import logging
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+from app.models import db, Ticket, TicketArchive, TicketChangeLog, SyncWatermark, utcnow
+from app import ticket_events
+from app.serializers import ticket_columns, ticket_to_dict
+from app.upsert import upsert
+
+logger = logging.getLogger(__name__)
+
+WATERMARK = 'ticket_change'
+
+
+class CursorExpired(Exception):
+    """
+    El cursor es anterior a la última compactación: el cliente debe descargar todo de nuevo.
+    """
+
+    def __init__(self, since, watermark):
+        self.since = since
+        self.watermark = watermark
+        super().__init__(f'El cursor {since} es anterior a la marca de compactación {watermark}')
+
+
+@ticket_events.on_flush
+def append_changes(connection, changes):
+    """
+    Agrega una entrada por cambio a la bitácora, en la misma transacción que el cambio.
+    El 'delete' del archivado se registra como 'archive': el ticket sigue existiendo.
+    """
+    now = utcnow()
+    connection.execute(insert(TicketChangeLog.__table__), [
+        {'ticket_id': change.id, 'op': 'archive' if change.reason == 'archive' else change.op, 'changed_at': now}
+        for change in changes
+    ])
+
+
+def last_entry_id(session=None):
+    """
+    Id de la última entrada de la bitácora (0 si está vacía).
+    """
+    session = session or db.session
+    return session.scalar(select(func.max(TicketChangeLog.id))) or 0
+
+
+def current_cursor(session=None):
+    """
+    Cursor para empezar a sincronizar desde ahora: la última entrada anterior a la primera
+    más reciente que CHANGES_SETTLE_SECONDS (el mismo corte que changes_since). Una
+    transacción que aún no se confirmaba con un id menor queda después del cursor y se
+    entrega en la siguiente consulta, en lugar de saltarse para siempre.
+    """
+    session = session or db.session
+    query = select(func.max(TicketChangeLog.id))
+    settle = current_app.config['CHANGES_SETTLE_SECONDS']
+    if settle:
+        threshold = utcnow() - timedelta(seconds=settle)
+        first_recent = session.scalar(
+            select(func.min(TicketChangeLog.id)).where(TicketChangeLog.changed_at > threshold))
+        if first_recent is not None:
+            query = query.where(TicketChangeLog.id < first_recent)
+    return session.scalar(query) or 0
+
+
+def watermark(session=None):
+    session = session or db.session
+    return session.scalar(
+        select(SyncWatermark.change_id).where(SyncWatermark.name == WATERMARK)
+    ) or 0
+
+
+def changes_since(since, limit, session=None):
+    """
+    Cambios posteriores al cursor `since`, como máximo `limit` entradas de la bitácora.
+
+    Varias entradas del mismo ticket se resuelven a su estado actual: se retorna
+    {"cursor", "has_more", "upserts": [tickets], "deleted": [ids], "archived": [ids]};
+    los archivados salen de GET /tickets pero siguen en ?archivados=1. Las entradas más
+    recientes que CHANGES_SETTLE_SECONDS se entregan en la siguiente consulta, para no
+    saltarse las de transacciones que aún no se confirmaban con un id menor.
+    `session` permite usar otra sesión que db.session (p. ej. la de la API asíncrona).
+    """
+    session = session or db.session
+    mark = watermark(session)
+    if since < mark:
+        raise CursorExpired(since, mark)
+
+    query = (select(TicketChangeLog.id, TicketChangeLog.ticket_id, TicketChangeLog.op, TicketChangeLog.changed_at)
+             .where(TicketChangeLog.id > since)
+             .order_by(TicketChangeLog.id)
+             .limit(limit + 1))
+    entries = session.execute(query).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    settle = current_app.config['CHANGES_SETTLE_SECONDS']
+    if settle:
+        # Se corta en la primera entrada reciente para que el cursor nunca la salte
+        threshold = utcnow() - timedelta(seconds=settle)
+        for position, entry in enumerate(entries):
+            if entry.changed_at > threshold:
+                entries, has_more = entries[:position], True
+                break
+
+    # La última operación de cada ticket dentro de la página
+    latest = {}
+    for entry in entries:
+        latest[entry.ticket_id] = entry.op
+    upsert_ids = [id for id, op in latest.items() if op not in ('delete', 'archive')]
+    rows = []
+    if upsert_ids:
+        rows = session.execute(select(*ticket_columns()).where(Ticket.id.in_(upsert_ids)).order_by(Ticket.id)).all()
+    found = {row.id for row in rows}
+    # Si ya no está activo, hay un 'delete' o un 'archive' más adelante en la bitácora: se informa ahora
+    missing = [id for id in upsert_ids if id not in found]
+    archived = {id for id, op in latest.items() if op == 'archive'}
+    if missing:
+        archived.update(session.scalars(select(TicketArchive.id).where(TicketArchive.id.in_(missing))))
+    return {
+        'cursor': entries[-1].id if entries else since,
+        'has_more': has_more,
+        'upserts': [ticket_to_dict(row) for row in rows],
+        'deleted': sorted(id for id in latest if id not in found and id not in archived),
+        'archived': sorted(archived),
+    }
+
+
+def compact(retention, batch_size=10000):
+    """
+    Elimina por lotes las entradas con más de `retention` segundos y avanza la marca de
+    compactación. Cada lote se confirma por separado: si se interrumpe, la siguiente
+    ejecución continúa donde quedó. Retorna el número de entradas eliminadas.
+    """
+    cutoff = utcnow() - timedelta(seconds=retention)
+    last = db.session.scalar(select(func.max(TicketChangeLog.id)).where(TicketChangeLog.changed_at < cutoff))
+    # La última entrada se conserva siempre: en MySQL 5.7 el AUTO_INCREMENT de una
+    # tabla vacía se reinicia con el servidor y los cursores volverían atrás
+    last = min(last or 0, last_entry_id() - 1)
+    if last <= 0:
+        return 0
+
+    removed = 0
+    table = SyncWatermark.__table__
+    while True:
+        ids = db.session.scalars(
+            select(TicketChangeLog.id).where(TicketChangeLog.id <= last)
+            .order_by(TicketChangeLog.id).limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        connection = db.session.connection()
+        connection.execute(delete(TicketChangeLog.__table__).where(TicketChangeLog.id.in_(ids)))
+        # La marca avanza en la misma transacción que el borrado del lote
+        upsert(connection, table, {'name': WATERMARK, 'change_id': ids[-1], 'updated_at': utcnow()},
+               {'change_id': ids[-1], 'updated_at': utcnow()})
+        db.session.commit()
+        removed += len(ids)
+    logger.info('Bitácora de cambios compactada: %s entradas eliminadas (marca %s)', removed, last)
+    return removed
+
+
+def compact_expired():
+    """
+    Compactación con la retención configurada (CHANGE_LOG_RETENTION); usada por la tarea periódica.
+    """
+    return compact(current_app.config['CHANGE_LOG_RETENTION'])
@@ -0,0 +1,125 @@
+import bisect
+import hashlib
+import threading
+import time
+from flask import current_app, url_for
+from sqlalchemy import select
+from app import db
+from app.models import User
+from app.signals import usuario_cambiado
+from app.user_cache import roles
+
+
+class _ChoiceList:
+    """
+    Opciones (id, username) de un rol, ordenadas por nombre sin distinguir mayúsculas,
+    con un índice por nombre en minúsculas para búsquedas por prefijo.
+    """
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        # Se ordena aquí y no con ORDER BY: el orden de la base depende de su collation
+        # (binario en SQLite) y bisect necesita las claves ordenadas
+        self.choices = sorted(((id, username) for id, username in rows),
+                              key=lambda choice: (choice[1].casefold(), choice[1], choice[0]))
+        self.names = dict(self.choices)
+        self.ids = self.names.keys()
+        self.keys = [username.casefold() for _, username in self.choices]
+        # Igual en todos los procesos para el mismo contenido (forma parte de los ETag)
+        self.digest = hashlib.sha1(repr(self.choices).encode()).hexdigest()
+
+    def search(self, prefix, limit):
+        prefix = prefix.casefold()
+        start = bisect.bisect_left(self.keys, prefix)
+        end = start
+        while end < len(self.keys) and end - start < limit and self.keys[end].startswith(prefix):
+            end += 1
+        return self.choices[start:end]
+
+
+class AssigneeChoices:
+    """
+    Caché versionada de las listas (id, username) por rol que usan los formularios de tickets.
+
+    Solo carga dos columnas (no el objeto User completo ni el hash de la contraseña).
+    Cualquier alta, edición o baja de usuarios incrementa la versión y las listas se
+    recargan en el siguiente uso; CHOICES_CACHE_TTL limita cuánto tiempo puede quedar
+    desactualizada una lista por cambios hechos en otro proceso.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._lists = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, *args, **kwargs):
+        with self._lock:
+            self.version += 1
+
+    def _get(self, role_name):
+        entry = self._lists.get(role_name)
+        ttl = current_app.config['CHOICES_CACHE_TTL']
+        if entry is None or entry.version != self.version or time.monotonic() - entry.loaded_at > ttl:
+            version = self.version
+            rows = db.session.execute(
+                select(User.id, User.username)
+                .where(User.role_id == roles.id(role_name))
+            ).all()
+            entry = _ChoiceList(version, rows)
+            with self._lock:
+                self._lists[role_name] = entry
+        return entry
+
+    def choices(self, role_name):
+        return self._get(role_name).choices
+
+    def usernames(self, role_name):
+        """
+        Diccionario {id: username} de los usuarios del rol.
+        """
+        return self._get(role_name).names
+
+    def cached_usernames(self, role_name):
+        """
+        {id: username} de la última lista cargada del rol, aunque esté desactualizada, o {}
+        si nunca se cargó. No consulta la base: sirve después de confirmar una transacción.
+        """
+        entry = self._lists.get(role_name)
+        return entry.names if entry is not None else {}
+
+    def digest(self, role_name):
+        """
+        Huella del contenido de la lista del rol: cambia si cambia algún id o nombre.
+        """
+        return self._get(role_name).digest
+
+    def is_valid(self, role_name, user_id):
+        return user_id in self._get(role_name).ids
+
+    def search(self, role_name, prefix, limit=20):
+        return self._get(role_name).search(prefix, limit)
+
+
+assignee_choices = AssigneeChoices()
+usuario_cambiado.connect(assignee_choices.invalidate)
+
+
+def fill_choices(field, role_name):
+    """
+    Asigna a un SelectField todas las opciones del rol (necesarias para validar).
+    """
+    field.choices = assignee_choices.choices(role_name)
+
+
+def compact_choices(field, role_name):
+    """
+    Antes de renderizar: si el rol tiene más de CHOICES_INLINE_LIMIT usuarios, deja en el
+    <select> solo la opción seleccionada y activa la búsqueda por prefijo (typeahead.js).
+    """
+    if len(field.choices) <= current_app.config['CHOICES_INLINE_LIMIT']:
+        return
+    field.choices = [(id, username) for id, username in field.choices if id == field.data]
+    field.render_kw = dict(field.render_kw or {}, **{
+        'data-typeahead-url': url_for('main.buscar_usuarios', rol=role_name),
+    })
@@ -0,0 +1,178 @@
+import click
+from flask.cli import AppGroup
+from flask import current_app
+
+# Comandos de mantenimiento del esquema: `flask schema <comando>`
+schema_cli = AppGroup('schema', help='Migraciones y verificación del esquema de la base de datos.')
+
+
+@schema_cli.command('upgrade')
+@click.option('--target', type=int, default=None, help='Aplicar solo hasta esta versión.')
+def schema_upgrade(target):
+    """Aplica las migraciones pendientes."""
+    from app.migrations import upgrade
+
+    applied = upgrade(target=target)
+    for m in applied:
+        click.echo(f'  {m.version:04d}  {m.description}')
+    click.echo(f'{len(applied)} migración(es) aplicada(s).')
+
+
+@schema_cli.command('status')
+def schema_status():
+    """Muestra las migraciones pendientes."""
+    from app.migrations import pending_migrations
+
+    pending = pending_migrations()
+    for m in pending:
+        click.echo(f'  pendiente {m.version:04d}  {m.description}')
+    click.echo('Esquema al día.' if not pending else f'{len(pending)} migración(es) pendiente(s).')
+
+
+@schema_cli.command('explain')
+@click.option('--verbose', '-v', is_flag=True, help='Mostrar el plan completo de cada consulta.')
+def schema_explain(verbose):
+    """Verifica con EXPLAIN que las consultas del dashboard usan sus índices."""
+    from app.explain import check_indexes
+
+    failed = 0
+    for name, index, ok, plan in check_indexes():
+        click.echo(f"[{'OK' if ok else 'FALLA'}] {name}: {index}")
+        if verbose or not ok:
+            for line in plan:
+                click.echo(f'        {line}')
+        failed += not ok
+    if failed:
+        raise click.ClickException(f'{failed} consulta(s) no usan el índice esperado.')
+
+
+# Contadores del resumen del dashboard: `flask stats <comando>`
+stats_cli = AppGroup('stats', help='Contadores de tickets del resumen del dashboard.')
+
+
+@stats_cli.command('rebuild')
+def stats_rebuild():
+    """Reconstruye los contadores desde la tabla ticket (reconciliación)."""
+    from app import stats
+
+    click.echo(f'{stats.rebuild()} contador(es) reconstruido(s).')
+
+
+@stats_cli.command('markers')
+def stats_markers():
+    """Invalida los marcadores de cambios (ETag) de todos los listados de tickets."""
+    from app import markers
+
+    click.echo(f'{markers.rebuild()} marcador(es) reconstruido(s).')
+
+
+# Bitácora de cambios de tickets: `flask changes <comando>`
+changes_cli = AppGroup('changes', help='Bitácora de cambios de tickets (GET /tickets/changes).')
+
+
+@changes_cli.command('compact')
+@click.option('--retention', type=int, default=None,
+              help='Segundos de retención (por defecto CHANGE_LOG_RETENTION).')
+def changes_compact(retention):
+    """Elimina las entradas antiguas de la bitácora y avanza la marca de compactación."""
+    from app import changelog
+
+    if retention is None:
+        retention = current_app.config['CHANGE_LOG_RETENTION']
+    click.echo(f'{changelog.compact(retention)} entrada(s) eliminada(s).')
+
+
+# Archivado de tickets cerrados: `flask archive <comando>`
+archive_cli = AppGroup('archive', help='Archivado de tickets cerrados (tabla ticket_archive).')
+
+
+@archive_cli.command('run')
+@click.option('--age', type=int, default=None,
+              help='Segundos sin cambios antes de archivar (por defecto ARCHIVE_CLOSED_AFTER).')
+@click.option('--batch-size', type=int, default=None,
+              help='Tickets por transacción (por defecto ARCHIVE_BATCH_SIZE).')
+def archive_run(age, batch_size):
+    """Mueve los tickets cerrados antiguos de ticket a ticket_archive."""
+    from app import archive
+
+    if age is None:
+        age = current_app.config['ARCHIVE_CLOSED_AFTER']
+    if batch_size is None:
+        batch_size = current_app.config['ARCHIVE_BATCH_SIZE']
+    click.echo(f'{archive.archive_closed(age, batch_size)} ticket(s) archivado(s).')
+
+
+# Importación y exportación CSV de tickets: `flask tickets <comando>`
+tickets_cli = AppGroup('tickets', help='Importación y exportación de tickets en CSV.')
+
+
+@tickets_cli.command('export')
+@click.option('--output', '-o', type=click.File('w', encoding='utf-8', lazy=True), default='-',
+              help='Archivo de salida (por defecto la salida estándar).')
+@click.option('--archivados', is_flag=True, help='Incluir los tickets archivados.')
+def tickets_export(output, archivados):
+    """Exporta todos los tickets en CSV (mismo formato que /tickets/exportar)."""
+    from types import SimpleNamespace
+    from werkzeug.datastructures import MultiDict
+    from app.models import TicketArchive
+    from app.ticket_csv import export_query, iter_csv
+    from app.ticket_queries import TicketFilters
+
+    admin = SimpleNamespace(role_name='Admin')
+    filtros = TicketFilters(MultiDict({'orden': 'asc'}))
+    queries = [export_query(admin, filtros)]
+    if archivados:
+        queries.append(export_query(admin, filtros, TicketArchive))
+    for chunk in iter_csv(queries):
+        output.write(chunk)
+
+
+@tickets_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--chunk-size', type=int, default=None,
+              help='Filas por transacción (por defecto BULK_CHUNK_SIZE).')
+def tickets_import(path, chunk_size):
+    """Crea tickets desde un archivo CSV; las filas con errores se reportan y se omiten."""
+    from app.ticket_csv import import_tickets
+
+    with open(path, encoding='utf-8-sig', newline='') as stream:
+        report = import_tickets(stream, chunk_size)
+    for error in report.errors:
+        click.echo(f"  línea {error['linea']}: {error['error']}", err=True)
+    if report.error_count > len(report.errors):
+        click.echo(f'  ... y {report.error_count - len(report.errors)} error(es) más', err=True)
+    click.echo(f'{report.created} ticket(s) creado(s), {report.error_count} fila(s) con error.')
+
+
+# Arranque de los procesos: `flask templates compile`, `flask warmup`
+templates_cli = AppGroup('templates', help='Plantillas de Jinja precompiladas (caché de bytecode).')
+
+
+@templates_cli.command('compile')
+def templates_compile():
+    """Compila todas las plantillas y las guarda en la caché de bytecode (TEMPLATE_CACHE_DIR)."""
+    from app.warmup import precompile_templates
+
+    cache = current_app.jinja_env.bytecode_cache
+    if cache is None:
+        raise click.ClickException('TEMPLATE_BYTECODE_CACHE está desactivado.')
+    click.echo(f'{precompile_templates(current_app)} plantilla(s) compilada(s) en {cache.directory}.')
+
+
+@click.command('warmup')
+def warmup_command():
+    """Ejecuta el calentamiento de arranque y muestra cuánto tarda cada paso."""
+    from app.warmup import warm_up
+
+    for name, ms in warm_up(current_app._get_current_object()).items():
+        click.echo(f'  {name}: {ms} ms')
+
+
+def register_commands(app):
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(changes_cli)
+    app.cli.add_command(archive_cli)
+    app.cli.add_command(tickets_cli)
+    app.cli.add_command(templates_cli)
+    app.cli.add_command(warmup_command)
@@ -0,0 +1,187 @@
+import zlib
+from flask import Response, current_app, request, stream_with_context
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+from app.metrics import REGISTRY, Counter
+from app.serializers import COLUMNAR_MIMETYPE, JSON_MIMETYPE, MSGPACK_MIMETYPE, NDJSON_MIMETYPE, installed
+
+# Respuestas de la API que se comprimen (el HTML y los estáticos los comprime el proxy)
+COMPRESSIBLE_MIMETYPES = {JSON_MIMETYPE, NDJSON_MIMETYPE, COLUMNAR_MIMETYPE, MSGPACK_MIMETYPE}
+
+COMPRESSED = REGISTRY.register(Counter(
+    'api_compressed_responses_total', 'Respuestas de la API comprimidas, por codificación.', ('encoding',)))
+
+
+class GzipEncoder:
+    """
+    gzip con zlib. Cada fragmento se vacía (Z_SYNC_FLUSH) para que el cliente reciba
+    los lotes a medida que se generan.
+    """
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def compress(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    """
+    Brotli (Content-Encoding: br). Requiere el paquete brotli.
+    """
+
+    def __init__(self, level):
+        import brotli
+
+        self._compressor = brotli.Compressor(quality=level)
+
+    @classmethod
+    def available(cls):
+        return installed('brotli')
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    """
+    Zstandard (Content-Encoding: zstd). Requiere el paquete zstandard.
+    """
+
+    def __init__(self, level):
+        import zstandard
+
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    @classmethod
+    def available(cls):
+        return installed('zstandard')
+
+    def compress(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(self._flush_block)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+ENCODERS = {
+    'gzip': GzipEncoder,
+    'br': BrotliEncoder,
+    'zstd': ZstdEncoder,
+}
+
+
+def negotiate(accept_encoding, algorithms=None):
+    """
+    Primera codificación de API_COMPRESSION_ALGORITHMS (orden de preferencia del
+    servidor) instalada y aceptada por el cliente en Accept-Encoding, o None.
+    """
+    if not accept_encoding:
+        return None
+    accepted = parse_accept_header(accept_encoding, Accept)
+    for name in algorithms or current_app.config['API_COMPRESSION_ALGORITHMS']:
+        if name in ENCODERS and accepted[name] > 0 and ENCODERS[name].available():
+            return name
+    return None
+
+
+def get_encoder(name):
+    return ENCODERS[name](current_app.config['API_COMPRESSION_LEVELS'][name])
+
+
+def _request_encoding(mimetype):
+    # Codificación para la respuesta de la petición actual, o None si no se comprime
+    config = current_app.config
+    if not config['API_COMPRESSION_ENABLED'] or request.method == 'HEAD' or mimetype not in COMPRESSIBLE_MIMETYPES:
+        return None
+    return negotiate(request.headers.get('Accept-Encoding'))
+
+
+def prefetch(chunks, min_size):
+    """
+    Lee fragmentos hasta juntar `min_size` bytes. Retorna (fragmentos leídos, iterador
+    con el resto); el iterador es None si los fragmentos terminaron antes del umbral.
+    """
+    iterator = iter(chunks)
+    head, size = [], 0
+    for chunk in iterator:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= min_size:
+            return head, iterator
+    return head, None
+
+
+def compress_stream(encoder, head, rest):
+    try:
+        yield encoder.compress(b''.join(head))
+        for chunk in rest:
+            data = encoder.compress(chunk)
+            if data:
+                yield data
+        yield encoder.finish()
+    finally:
+        # Cierra el generador original (y su cursor) aunque el cliente se desconecte
+        if hasattr(rest, 'close'):
+            rest.close()
+
+
+def streamed_response(chunks, mimetype):
+    """
+    Respuesta en streaming con los fragmentos (bytes) de `chunks`, comprimida fragmento
+    por fragmento si llegan a API_COMPRESSION_MIN_SIZE bytes. Se llama desde la vista:
+    los primeros fragmentos se generan ahí, antes de decidir las cabeceras.
+    """
+    name = _request_encoding(mimetype)
+    if name is None:
+        return Response(stream_with_context(chunks), mimetype=mimetype)
+    head, rest = prefetch(chunks, current_app.config['API_COMPRESSION_MIN_SIZE'])
+    if rest is None:
+        # Terminó antes del umbral: se envía tal cual
+        return Response(b''.join(head), mimetype=mimetype)
+    response = Response(stream_with_context(compress_stream(get_encoder(name), head, rest)), mimetype=mimetype)
+    response.headers['Content-Encoding'] = name
+    COMPRESSED.inc(encoding=name)
+    return response
+
+
+def compress_response(response):
+    """
+    Comprime las respuestas de la API con la codificación negociada si superan
+    API_COMPRESSION_MIN_SIZE bytes. Las de streaming ya vienen comprimidas de
+    streamed_response.
+    """
+    if response.status_code != 200 or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    # La respuesta cambia con Accept-Encoding aunque esta vez no se comprima
+    response.vary.add('Accept-Encoding')
+    if not response.is_streamed and not response.direct_passthrough and 'Content-Encoding' not in response.headers:
+        name = _request_encoding(response.mimetype)
+        body = response.get_data() if name else b''
+        if len(body) >= current_app.config['API_COMPRESSION_MIN_SIZE']:
+            encoder = get_encoder(name)
+            response.set_data(encoder.compress(body) + encoder.finish())
+            response.headers['Content-Encoding'] = name
+            COMPRESSED.inc(encoding=name)
+
+    if response.headers.get('Content-Encoding') in ENCODERS:
+        # El mismo ETag sirve para la versión comprimida y la sin comprimir: se marca débil
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    app.after_request(compress_response)
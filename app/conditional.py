@@ -0,0 +1,68 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+from flask import make_response, request, session
+from flask_login import current_user
+from app import markers
+
+
+def make_etag(parts):
+    return hashlib.sha1('\x1f'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _not_modified(etag, last_modified):
+    # If-None-Match tiene prioridad; If-Modified-Since solo se evalúa sin él (RFC 9110)
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return bool(since and last_modified and last_modified.replace(microsecond=0) <= since)
+
+
+def conditional_get(extra=None, headers=None):
+    """
+    GET condicional para listados de tickets. El ETag combina el marcador de cambios
+    del alcance del usuario (app/markers.py), el usuario, la URL, Accept y `extra()`
+    (otros datos que se muestran, p. ej. nombres de usuarios). Si el cliente ya tiene
+    esa versión se responde 304 sin cargar tickets ni ejecutar la vista.
+    `headers()` retorna cabeceras que van tanto en la respuesta 200 como en la 304; se
+    calcula antes que la vista.
+
+    Debe ir debajo de login_required y encima de query_budget.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            extra_headers = headers() if headers else {}
+            # Los mensajes flash pendientes se muestran una sola vez: la página no es cacheable
+            if request.method != 'GET' or session.get('_flashes'):
+                response = make_response(view(*args, **kwargs))
+                response.headers.update(extra_headers)
+                return response
+
+            user = current_user if current_user.is_authenticated else None
+            scope = markers.scope_for(user)
+            version, updated_at = markers.get(scope)
+            etag = make_etag([
+                scope, version, updated_at,
+                user.id if user else '', user.username if user else '',
+                request.full_path, request.headers.get('Accept', ''),
+                *(extra() if extra else ()),
+            ])
+            last_modified = updated_at.replace(tzinfo=timezone.utc) if updated_at else None
+
+            if _not_modified(etag, last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.headers.update(extra_headers)
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            # Contenido por usuario: solo caché del navegador, que siempre revalida
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Accept')
+            return response
+        return wrapper
+    return decorator
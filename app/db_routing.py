@@ -0,0 +1,99 @@
+import random
+import time
+from functools import wraps
+from flask import current_app, g, has_app_context, has_request_context, request, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# Clave de la sesión de Flask: hasta cuándo (time.time()) las lecturas de este cliente van al primario
+STICKY_KEY = '_db_primary_until'
+
+# Opciones DB_* de la aplicación -> argumento de create_engine (None = valor por defecto del pool)
+POOL_OPTIONS = {
+    'DB_POOL_SIZE': 'pool_size',
+    'DB_MAX_OVERFLOW': 'max_overflow',
+    'DB_POOL_TIMEOUT': 'pool_timeout',
+    'DB_POOL_RECYCLE': 'pool_recycle',
+    'DB_POOL_PRE_PING': 'pool_pre_ping',
+}
+
+
+class RoutingSession(Session):
+    """
+    Sesión que envía los SELECT de las vistas marcadas con @read_replica a una réplica.
+    Todo lo demás (flush, INSERT/UPDATE/DELETE, session.connection()) va al primario, y
+    una vez que la transacción escribe, también sus lecturas.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if getattr(clause, 'is_select', False):
+                replica = _current_replica()
+                if replica is not None and not self.info.get('db_wrote'):
+                    return self._db.engines[replica]
+            else:
+                self.info['db_wrote'] = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _current_replica():
+    return g.get('_db_replica') if has_app_context() else None
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    if not session.info.pop('db_wrote', False) or not has_request_context():
+        return
+    # Leer lo que se acaba de escribir: el resto de la petición y las siguientes peticiones
+    # del mismo cliente (p. ej. el redirect al dashboard) leen del primario por un tiempo,
+    # mientras la réplica se pone al día
+    g._db_replica = None
+    sticky = current_app.config['DB_REPLICA_STICKY_SECONDS']
+    if sticky and current_app.extensions.get('db_replicas'):
+        flask_session[STICKY_KEY] = time.time() + sticky
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('db_wrote', None)
+
+
+def read_replica(view):
+    """
+    Marca una vista de solo lectura: sus consultas van a una de las réplicas configuradas
+    (SQLALCHEMY_REPLICA_URIS), salvo que el cliente haya escrito hace menos de
+    DB_REPLICA_STICKY_SECONDS. Sin réplicas no hace nada.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        replicas = current_app.extensions.get('db_replicas')
+        if replicas and request.method in ('GET', 'HEAD'):
+            until = flask_session.get(STICKY_KEY)
+            if until is None or until <= time.time():
+                if until is not None:
+                    flask_session.pop(STICKY_KEY)
+                # Una sola réplica por petición: todas sus lecturas ven el mismo estado
+                g._db_replica = random.choice(replicas)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def init_app(app):
+    """
+    Opciones del pool de conexiones (DB_*) y un bind 'replica_<n>' por cada URI de
+    SQLALCHEMY_REPLICA_URIS. Debe llamarse antes de db.init_app.
+    """
+    options = {option: app.config[key] for key, option in POOL_OPTIONS.items() if app.config.get(key) is not None}
+    # SQLALCHEMY_ENGINE_OPTIONS de config.py tiene prioridad
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    replicas = []
+    for n, uri in enumerate(app.config['SQLALCHEMY_REPLICA_URIS']):
+        key = f'replica_{n}'
+        # Flask-SQLAlchemy no aplica SQLALCHEMY_ENGINE_OPTIONS a los binds: mismas opciones que el primario
+        binds[key] = dict(options, url=uri)
+        replicas.append(key)
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.extensions['db_replicas'] = replicas
@@ -0,0 +1,63 @@
+from datetime import datetime
+from types import SimpleNamespace
+from werkzeug.datastructures import MultiDict
+from app import db
+from app.archive import closed_batch
+from app.models import Ticket, User
+from app.pagination import keyset_query
+from app.ticket_queries import TicketFilters, dashboard_query
+
+
+def explain(statement):
+    """
+    Retorna el plan de ejecución de `statement` como una lista de líneas de texto.
+    Soporta SQLite (EXPLAIN QUERY PLAN) y MySQL (EXPLAIN).
+    """
+    dialect = db.engine.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+
+    if dialect.name == 'sqlite':
+        rows = db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql)).mappings()
+        return [row['detail'] for row in rows]
+    if dialect.name in ('mysql', 'mariadb'):
+        rows = db.session.execute(db.text('EXPLAIN ' + sql.replace('%%', '%'))).mappings()
+        return [f"{row['table']}: type={row['type']} key={row['key']} extra={row['Extra']}" for row in rows]
+    raise NotImplementedError(f'EXPLAIN no soportado para {dialect.name}')
+
+
+def _dashboard_statement(role, args=None, cursor=None):
+    # Mismo camino que main.dashboard, con un usuario ficticio del rol indicado
+    user = SimpleNamespace(id=1, role_name=role)
+    filtros = TicketFilters(MultiDict(args or {}))
+    query = keyset_query(dashboard_query(user, filtros), Ticket.fecha_creacion, Ticket.id,
+                         per_page=50, cursor=cursor)
+    return query.statement
+
+
+# Nombre de la consulta -> (función que construye la sentencia, índice que debe usar)
+INDEX_CHECKS = {
+    'dashboard Admin': (lambda: _dashboard_statement('Admin'), 'ix_ticket_fecha_creacion'),
+    'dashboard Admin (página 2)': (
+        lambda: _dashboard_statement('Admin', cursor=(datetime(2025, 1, 1), 100)), 'ix_ticket_fecha_creacion'),
+    'dashboard Técnico': (lambda: _dashboard_statement('Técnico'), 'ix_ticket_tecnico_fecha'),
+    'dashboard Técnico por estado': (
+        lambda: _dashboard_statement('Técnico', {'estado': 'Abierto'}), 'ix_ticket_tecnico_estado_fecha'),
+    'dashboard Usuario': (lambda: _dashboard_statement('Usuario'), 'ix_ticket_usuario_fecha'),
+    'archivado de tickets cerrados': (
+        lambda: closed_batch(datetime(2025, 1, 1), 1000, 500), 'ix_ticket_estado_updated'),
+    'opciones de técnicos': (
+        lambda: db.select(User.id, User.username).where(User.role_id == 3).order_by(User.username),
+        'ix_user_role_username'),
+}
+
+
+def check_indexes():
+    """
+    Ejecuta EXPLAIN sobre cada consulta de INDEX_CHECKS.
+    Retorna una lista de (nombre, índice esperado, usa_el_índice, plan).
+    """
+    results = []
+    for name, (build, index) in INDEX_CHECKS.items():
+        plan = explain(build())
+        results.append((name, index, any(index in line for line in plan), plan))
+    return results
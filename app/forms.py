@@ -1,4 +1,5 @@
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileAllowed, FileField, FileRequired
 from wtforms import StringField, PasswordField, SubmitField, TextAreaField, SelectField
 from wtforms.validators import DataRequired, Email, EqualTo, Length
 
@@ -64,6 +65,12 @@ class TicketsForm(FlaskForm):
     
     
 
+# Formulario para importar tickets desde un archivo CSV (ver app/ticket_csv.py)
+class ImportTicketsForm(FlaskForm):
+    archivo = FileField('Archivo CSV', validators=[FileRequired(), FileAllowed(['csv'], 'Solo archivos .csv')])
+    submit = SubmitField('Importar')
+
+
 class UserEditForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired()])
     email = StringField('Email', validators=[DataRequired(), Email()])
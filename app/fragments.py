@@ -0,0 +1,174 @@
+import json
+import logging
+from flask import current_app, has_app_context
+from markupsafe import Markup
+from werkzeug.utils import import_string
+from app import ticket_events
+from app.cache import LRUCache
+from app.choices import assignee_choices
+from app.metrics import REGISTRY, Counter
+from app.signals import usuario_cambiado
+
+logger = logging.getLogger(__name__)
+
+ROW_TEMPLATE = '_ticket_row.html'
+
+# Clases de permiso con las que se renderiza una fila: cada una se guarda por separado
+PERMISSION_CLASSES = ('admin', 'owner', 'usuario', 'other')
+
+HITS = REGISTRY.register(Counter(
+    'row_cache_hits_total', 'Filas del dashboard servidas desde la caché de fragmentos.', ()))
+MISSES = REGISTRY.register(Counter(
+    'row_cache_misses_total', 'Filas del dashboard renderizadas con Jinja (no estaban en caché).', ()))
+
+
+class MemoryRowCache:
+    """
+    Fragmentos en un LRU en memoria del proceso.
+    """
+
+    def __init__(self, maxsize=10000, **kwargs):
+        self._cache = LRUCache(maxsize)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value)
+
+    def delete_many(self, keys):
+        for key in keys:
+            self._cache.delete(key)
+
+    def clear(self):
+        self._cache.clear()
+
+
+class RedisRowCache:
+    """
+    Fragmentos compartidos entre procesos en un Redis local, con vida ROW_CACHE_TTL.
+    Requiere el paquete `redis` y ROW_CACHE_URL.
+    """
+
+    PREFIX = 'tickets:row:'
+
+    def __init__(self, url, ttl=3600, **kwargs):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("ROW_CACHE_BACKEND = 'redis' requiere el paquete redis (pip install redis)") from e
+        self.redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def _key(self, key):
+        return self.PREFIX + ':'.join(str(part) for part in key)
+
+    def get(self, key):
+        value = self.redis.get(self._key(key))
+        if value is None:
+            return None
+        stamp, html = json.loads(value)
+        return tuple(stamp), html
+
+    def set(self, key, value):
+        self.redis.set(self._key(key), json.dumps(value), ex=self.ttl)
+
+    def delete_many(self, keys):
+        if keys:
+            self.redis.delete(*(self._key(key) for key in keys))
+
+    def clear(self):
+        # Las entradas con nombres anteriores ya no coinciden con su huella y expiran solas
+        pass
+
+
+BACKENDS = {
+    'memory': MemoryRowCache,
+    'redis': RedisRowCache,
+}
+
+_backend = None
+
+
+def get_backend():
+    """
+    Caché configurada con ROW_CACHE_BACKEND: 'memory', 'redis' (con ROW_CACHE_URL) o la
+    ruta importable de una clase propia.
+    """
+    global _backend
+    if _backend is None:
+        config = current_app.config
+        backend_class = BACKENDS.get(config['ROW_CACHE_BACKEND']) or import_string(config['ROW_CACHE_BACKEND'])
+        kwargs = {'maxsize': config['ROW_CACHE_SIZE'], 'ttl': config['ROW_CACHE_TTL']}
+        if config.get('ROW_CACHE_URL'):
+            kwargs['url'] = config['ROW_CACHE_URL']
+        _backend = backend_class(**kwargs)
+    return _backend
+
+
+def permission_class(user, ticket):
+    """
+    Lo único del usuario que cambia el HTML de la fila: Admin, técnico dueño del ticket
+    (puede editarlo), Usuario (no ve la columna de usuario asignado) u otro.
+    """
+    if user.role_name == 'Admin':
+        return 'admin'
+    if user.role_name == 'Usuario':
+        return 'usuario'
+    return 'owner' if ticket.tecnico_id == user.id else 'other'
+
+
+class RowRenderer:
+    """
+    Renderiza las filas de tickets del dashboard para un usuario, reutilizando el HTML ya
+    generado. La entrada de cada (ticket, clase de permiso) guarda una huella con la
+    versión del ticket, si está archivado y los nombres de técnicos y usuarios: si no
+    coincide se vuelve a renderizar. La plantilla de la fila solo recibe el ticket y la
+    clase de permiso, así que el mismo HTML sirve a todos los usuarios de esa clase.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.enabled = current_app.config['ROW_CACHE_ENABLED']
+        self.template = current_app.jinja_env.get_template(ROW_TEMPLATE)
+        self.names = (assignee_choices.digest('Técnico'), assignee_choices.digest('Usuario'))
+
+    def __call__(self, ticket):
+        perm = permission_class(self.user, ticket)
+        if not self.enabled:
+            return Markup(self.template.render(ticket=ticket, perm=perm))
+        key = (ticket.id, perm)
+        stamp = (ticket.version, bool(ticket.archivado)) + self.names
+        cache = get_backend()
+        entry = cache.get(key)
+        if entry is not None and entry[0] == stamp:
+            HITS.inc()
+            return Markup(entry[1])
+        MISSES.inc()
+        html = self.template.render(ticket=ticket, perm=perm)
+        cache.set(key, (stamp, html))
+        return Markup(html)
+
+
+def invalidate_tickets(ids):
+    """
+    Descarta las filas renderizadas de esos tickets (todas las clases de permiso).
+    """
+    get_backend().delete_many([(id, perm) for id in ids for perm in PERMISSION_CLASSES])
+
+
+@ticket_events.on_commit
+def _on_tickets_changed(changes):
+    if not has_app_context() or not current_app.config.get('ROW_CACHE_ENABLED'):
+        return
+    ids = {change.id for change in changes if change.op != 'create'}
+    if ids:
+        invalidate_tickets(ids)
+
+
+@usuario_cambiado.connect
+def _on_usuario_cambiado(sender, user_id, **kwargs):
+    # Un nombre puede aparecer en cualquier fila: se vacía la caché del proceso (la huella
+    # de nombres cubre a los demás procesos)
+    if _backend is not None:
+        _backend.clear()
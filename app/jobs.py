@@ -0,0 +1,44 @@
+import logging
+import threading
+from app import db
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob(threading.Thread):
+    """
+    Ejecuta `func` cada `interval` segundos en un hilo de fondo, dentro de un
+    contexto de aplicación. Los errores se registran y no detienen el hilo.
+    """
+
+    def __init__(self, app, name, interval, func):
+        super().__init__(name=f'job-{name}', daemon=True)
+        self.app = app
+        self.interval = interval
+        self.func = func
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    self.func()
+                except Exception:
+                    logger.exception('Error en la tarea periódica %s', self.name)
+                finally:
+                    db.session.remove()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def schedule(app, name, interval, func):
+    """
+    Inicia una tarea periódica si interval > 0. Las tareas quedan en app.extensions['jobs'].
+    """
+    if not interval or interval <= 0:
+        return None
+    job = PeriodicJob(app, name, interval, func)
+    app.extensions.setdefault('jobs', {})[name] = job
+    job.start()
+    return job
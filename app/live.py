@@ -0,0 +1,234 @@
+import json
+import logging
+import queue
+import threading
+import time
+from flask import current_app, has_app_context
+from werkzeug.utils import import_string
+from app import ticket_events
+from app.markers import scopes_of, touched_scopes
+
+logger = logging.getLogger(__name__)
+
+_broker_lock = threading.Lock()
+
+# Campos de cada evento 'ticket' (además de los nombres del técnico y del usuario)
+EVENT_FIELDS = ('id', 'asunto', 'descripcion', 'prioridad', 'estado', 'fecha_creacion',
+                'tecnico_id', 'usuario_id', 'version')
+
+
+class Subscription:
+    """
+    Mensajes pendientes de un cliente, en una cola acotada. Si el cliente no la vacía a
+    tiempo (conexión lenta) se marca como desbordada y se descartan los siguientes.
+    """
+
+    def __init__(self, broker, channels, maxsize):
+        self.broker = broker
+        self.channels = channels
+        self.queue = queue.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """
+        Siguiente mensaje (event, data), o None si no llegó ninguno en `timeout` segundos.
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """
+    Publicación/suscripción en memoria del proceso. Solo llega a los clientes conectados
+    a este mismo proceso: con varios workers usar RedisBroker.
+    """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, tuple(channels), self.queue_size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._channels[channel]
+
+    def publish(self, channel, event, data):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put((event, data))
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len({s for subscribers in self._channels.values() for s in subscribers})
+
+    @property
+    def has_subscribers(self):
+        return bool(self._channels)
+
+
+class RedisBroker(LocalBroker):
+    """
+    Publica a través de Redis (PUBLISH) para que los eventos lleguen a todos los procesos.
+    Cada proceso escucha los canales en un hilo y los reparte a sus suscriptores locales.
+    Requiere el paquete `redis` y LIVE_BROKER_URL.
+    """
+
+    PREFIX = 'tickets:'
+
+    def __init__(self, url, queue_size=100):
+        super().__init__(queue_size)
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("LIVE_BROKER = 'redis' requiere el paquete redis (pip install redis)") from e
+        self.redis = redis.Redis.from_url(url)
+        self._listener = threading.Thread(target=self._listen, name='live-redis', daemon=True)
+        self._listener.start()
+
+    @property
+    def has_subscribers(self):
+        # Puede haber clientes conectados a otros procesos
+        return True
+
+    def publish(self, channel, event, data):
+        self.redis.publish(self.PREFIX + channel, json.dumps([event, data]))
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.PREFIX + '*')
+                for message in pubsub.listen():
+                    channel = message['channel'].decode()[len(self.PREFIX):]
+                    event, data = json.loads(message['data'])
+                    super().publish(channel, event, data)
+            except Exception:
+                logger.exception('Conexión con Redis perdida; reintentando')
+                time.sleep(1)
+
+
+BROKERS = {
+    'local': LocalBroker,
+    'redis': RedisBroker,
+}
+
+
+def get_broker():
+    """
+    Broker configurado con LIVE_BROKER: 'local', 'redis' o la ruta importable de una clase propia.
+    Se crea una vez por aplicación y queda en app.extensions['live_broker'].
+    """
+    broker = current_app.extensions.get('live_broker')
+    if broker is None:
+        config = current_app.config
+        broker_class = BROKERS.get(config['LIVE_BROKER']) or import_string(config['LIVE_BROKER'])
+        kwargs = {'queue_size': config['LIVE_QUEUE_SIZE']}
+        if config.get('LIVE_BROKER_URL'):
+            kwargs['url'] = config['LIVE_BROKER_URL']
+        with _broker_lock:
+            broker = current_app.extensions.get('live_broker')
+            if broker is None:
+                broker = current_app.extensions['live_broker'] = broker_class(**kwargs)
+    return broker
+
+
+def _event_data(change, names):
+    data = {field: change.values.get(field) for field in EVENT_FIELDS}
+    if data['fecha_creacion'] is not None:
+        # Mismo formato que muestra la plantilla del dashboard
+        data['fecha_creacion'] = str(data['fecha_creacion'])
+    # Sin el nombre en caché se muestra el id
+    data['tecnico'] = names.get(data['tecnico_id'], data['tecnico_id'])
+    data['usuario'] = names.get(data['usuario_id'], data['usuario_id'])
+    data['op'] = change.op
+    return data
+
+
+@ticket_events.on_commit
+def publish_changes(changes):
+    """
+    Publica cada cambio confirmado en los canales de los alcances que lo ven. Un ticket
+    que sale del alcance de un técnico o usuario se le publica como 'delete'.
+    Lotes grandes se resumen en un evento 'reload' por alcance.
+    """
+    if not has_app_context():
+        return
+    broker = get_broker()
+    if not broker.has_subscribers:
+        return
+    if len(changes) > current_app.config['LIVE_MAX_EVENTS_PER_COMMIT']:
+        for scope in sorted(touched_scopes(changes)):
+            broker.publish(scope, 'reload', '{}')
+        return
+
+    # Después de confirmar la sesión ya no puede consultar la base: solo los nombres en caché
+    from app.choices import assignee_choices
+    names = dict(assignee_choices.cached_usernames('Usuario'))
+    names.update(assignee_choices.cached_usernames('Técnico'))
+    for change in changes:
+        if change.op == 'delete':
+            visible, gone = set(), scopes_of(change.values)
+        else:
+            visible = scopes_of(change.values)
+            # Alcances de los que salió el ticket (p. ej. reasignado a otro técnico)
+            gone = scopes_of(dict(change.values, **change.old)) - visible if change.op == 'update' else set()
+        data = json.dumps(_event_data(change, names), separators=(',', ':'))
+        for scope in sorted(visible):
+            broker.publish(scope, 'ticket', data)
+        if gone:
+            tombstone = json.dumps({'op': 'delete', 'id': change.id}, separators=(',', ':'))
+            for scope in sorted(gone):
+                broker.publish(scope, 'ticket', tombstone)
+
+
+def _format(event, data):
+    return f'event: {event}\ndata: {data}\n\n'
+
+
+def event_stream(broker, channels, keepalive, max_duration):
+    """
+    Genera la respuesta text/event-stream de los canales. Cada `keepalive` segundos sin
+    eventos envía un comentario (así se detectan los clientes desconectados) y a los
+    `max_duration` segundos termina; EventSource se reconecta solo.
+    """
+    # La suscripción se crea al empezar a enviar: si el cliente se va antes, no queda colgada
+    subscription = broker.subscribe(channels)
+    deadline = time.monotonic() + max_duration
+    try:
+        yield f'retry: 3000\n{_format("ready", "{}")}'
+        while time.monotonic() < deadline:
+            message = subscription.get(timeout=keepalive)
+            if subscription.overflowed:
+                # El cliente se atrasó: se le pide recargar en lugar de enviar eventos incompletos
+                yield _format('reload', '{}')
+                return
+            yield ': keepalive\n\n' if message is None else _format(*message)
+        # Cierre normal: el cliente se reconecta sin avisar que perdió eventos
+        yield _format('bye', '{}')
+    finally:
+        subscription.close()
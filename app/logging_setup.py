@@ -0,0 +1,31 @@
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+
+# Un solo listener por proceso aunque se creen varias apps (pruebas, benchmarks)
+_listener = None
+
+
+def init_app(app):
+    """
+    Configura el logger 'app' (y con él app.logger y los de cada módulo) con el nivel
+    LOG_LEVEL. Las peticiones solo encolan el registro; un hilo aparte lo escribe en
+    stderr, así una salida lenta no bloquea la respuesta.
+    """
+    global _listener
+    logger = logging.getLogger('app')
+    logger.setLevel(app.config['LOG_LEVEL'])
+    if _listener is None:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        records = queue.SimpleQueue()
+        _listener = QueueListener(records, handler, respect_handler_level=True)
+        _listener.start()
+        # Escribe lo que quede en la cola al terminar el proceso
+        atexit.register(_listener.stop)
+        logger.addHandler(QueueHandler(records))
+        logger.propagate = False
@@ -0,0 +1,86 @@
+import logging
+from sqlalchemy import delete, insert, select
+from app.models import db, Ticket, TicketMarker, utcnow
+from app import ticket_events
+from app.upsert import upsert
+
+logger = logging.getLogger(__name__)
+
+
+def scope_for(user):
+    """
+    Alcance de tickets visibles para el usuario (mismas reglas que ticket_queries.scoped_tickets).
+    """
+    if user is None or user.role_name == 'Admin':
+        return 'all'
+    if user.role_name == 'Técnico':
+        return f'tecnico:{user.id}'
+    return f'usuario:{user.id}'
+
+
+def scopes_of(values):
+    """
+    Alcances en los que es visible un ticket con estos valores.
+    """
+    return {'all', f"tecnico:{values['tecnico_id']}", f"usuario:{values['usuario_id']}"}
+
+
+def touched_scopes(changes):
+    """
+    Alcances cuyo contenido cambia con `changes` (antes y después de cada cambio).
+    """
+    scopes = set()
+    for change in changes:
+        scopes |= scopes_of(change.values)
+        if change.op == 'update' and change.old:
+            scopes |= scopes_of(dict(change.values, **change.old))
+    return scopes
+
+
+@ticket_events.on_flush
+def touch_markers(connection, changes):
+    """
+    Incrementa los marcadores de los alcances afectados, en la misma transacción que los cambios.
+    """
+    now = utcnow()
+    table = TicketMarker.__table__
+    for scope in sorted(touched_scopes(changes)):
+        upsert(connection, table, {'scope': scope, 'version': 1, 'updated_at': now},
+               {'version': table.c.version + 1, 'updated_at': now})
+
+
+def get(scope, session=None):
+    """
+    (versión, última modificación) del alcance; (0, None) si nunca cambió.
+    Es una sola lectura por clave primaria, sin tocar la tabla de tickets.
+    """
+    row = (session or db.session).execute(
+        select(TicketMarker.version, TicketMarker.updated_at).where(TicketMarker.scope == scope)
+    ).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+def replace_markers(connection):
+    """
+    Crea un marcador nuevo (con la hora actual) para cada alcance que tiene tickets.
+    Todos los ETag emitidos antes dejan de coincidir.
+    """
+    now = utcnow()
+    scopes = {'all'}
+    # Un DISTINCT por columna: cada uno se resuelve con el índice que empieza por ella
+    for prefix, column in (('tecnico', Ticket.tecnico_id), ('usuario', Ticket.usuario_id)):
+        scopes |= {f'{prefix}:{id}' for id in connection.scalars(select(column).distinct())}
+    connection.execute(delete(TicketMarker.__table__))
+    connection.execute(insert(TicketMarker.__table__),
+                       [{'scope': scope, 'version': 1, 'updated_at': now} for scope in sorted(scopes)])
+    return len(scopes)
+
+
+def rebuild():
+    """
+    Invalida todos los marcadores (p. ej. después de cambiar tickets por fuera de la aplicación).
+    """
+    count = replace_markers(db.session.connection())
+    db.session.commit()
+    logger.info('Marcadores de cambios reconstruidos (%s alcances)', count)
+    return count
@@ -0,0 +1,288 @@
+import logging
+import math
+import threading
+import time
+from flask import Blueprint, Response, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+from app import db
+
+slow_logger = logging.getLogger('app.sql.slow')
+
+# Límites (en segundos) de los histogramas de latencia, los mismos por defecto de Prometheus
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    Métrica con etiquetas, segura entre hilos. Los valores son por proceso: con varios
+    workers (gunicorn), cada uno expone los suyos y Prometheus los agrega.
+    """
+
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} espera las etiquetas {self.labelnames}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, _labels(self.labelnames, key), value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+        lines += [f'{name}{labels} {_number(value)}' for name, labels, value in self.samples()]
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    Valor que sube y baja. Con `collect` (función que retorna {tupla de etiquetas: valor})
+    se calcula en el momento de exponer las métricas.
+    """
+
+    type = 'gauge'
+
+    def __init__(self, name, help, labelnames=(), collect=None):
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        if self.collect is None:
+            yield from super().samples()
+            return
+        for key, value in sorted(self.collect().items()):
+            yield self.name, _labels(self.labelnames, key), value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # [conteo por bucket (no acumulado)..., suma]
+                entry = self._values[key] = [0] * len(self.buckets) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+                    break
+            entry[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(entry)) for key, entry in self._values.items())
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                yield (f'{self.name}_bucket',
+                       _labels(self.labelnames, key, [('le', _number(bound))]), cumulative)
+            yield f'{self.name}_count', _labels(self.labelnames, key), cumulative
+            yield f'{self.name}_sum', _labels(self.labelnames, key), entry[-1]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Todas las métricas en el formato de texto de Prometheus (versión 0.0.4).
+        """
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    'http_requests_total', 'Peticiones HTTP atendidas.', ('method', 'endpoint', 'status')))
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'Tiempo de respuesta por endpoint (sin el envío del cuerpo en streaming).',
+    ('method', 'endpoint')))
+REQUEST_SQL_STATEMENTS = REGISTRY.register(Histogram(
+    'http_request_sql_statements', 'Sentencias SQL ejecutadas por petición.', ('endpoint',),
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100, 250)))
+REQUEST_SQL_TIME = REGISTRY.register(Histogram(
+    'http_request_sql_seconds', 'Tiempo total en la base de datos por petición.', ('endpoint',)))
+SQL_STATEMENTS = REGISTRY.register(Counter(
+    'db_statements_total', 'Sentencias SQL ejecutadas (incluye tareas de fondo).', ()))
+SLOW_QUERIES = REGISTRY.register(Counter(
+    'db_slow_queries_total', 'Sentencias SQL más lentas que SLOW_QUERY_THRESHOLD.', ()))
+POOL_CHECKOUTS = REGISTRY.register(Counter(
+    'db_pool_checkouts_total', 'Conexiones entregadas por el pool.', ()))
+POOL_CONNECTS = REGISTRY.register(Counter(
+    'db_pool_connections_created_total', 'Conexiones nuevas abiertas hacia la base de datos.', ()))
+
+
+def _pool_stats():
+    # Estado del pool de cada engine de Flask-SQLAlchemy; no todos los pools tienen todos los valores
+    stats = {}
+    try:
+        engines = db.engines
+    except RuntimeError:
+        return stats
+    for bind, engine in engines.items():
+        pool = engine.pool
+        for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+            method = getattr(pool, name, None)
+            if method is not None:
+                stats[(bind or 'default', name)] = method()
+    return stats
+
+
+REGISTRY.register(Gauge(
+    'db_pool_connections', 'Estado del pool de conexiones (size, checkedin, checkedout, overflow).',
+    ('bind', 'state'), collect=_pool_stats))
+
+# Umbral del log de consultas lentas, en segundos (SLOW_QUERY_THRESHOLD, ver init_app)
+_slow_threshold = 0.5
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_metrics_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_metrics_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    SQL_STATEMENTS.inc()
+    if has_app_context():
+        stats = g.get('_sql_stats')
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+    if _slow_threshold and elapsed >= _slow_threshold:
+        SLOW_QUERIES.inc()
+        slow_logger.warning('Consulta lenta (%.3f s): %s', elapsed, ' '.join(statement.split())[:1000])
+
+
+@event.listens_for(Engine, 'handle_error')
+def _on_error(context):
+    # Una sentencia fallida no llega a after_cursor_execute
+    if context.connection is not None:
+        starts = context.connection.info.get('_metrics_start')
+        if starts:
+            starts.pop()
+
+
+@event.listens_for(Pool, 'checkout')
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    POOL_CHECKOUTS.inc()
+
+
+@event.listens_for(Pool, 'connect')
+def _on_connect(dbapi_connection, connection_record):
+    POOL_CONNECTS.inc()
+
+
+def _start_request():
+    g._request_start = time.perf_counter()
+    g._sql_stats = [0, 0.0]
+
+
+def _record_request(status):
+    start = g.pop('_request_start', None)
+    if start is None:
+        return
+    endpoint = request.endpoint or 'none'
+    REQUESTS.inc(method=request.method, endpoint=endpoint, status=status)
+    REQUEST_LATENCY.observe(time.perf_counter() - start, method=request.method, endpoint=endpoint)
+    statements, sql_time = g.get('_sql_stats', (0, 0.0))
+    REQUEST_SQL_STATEMENTS.observe(statements, endpoint=endpoint)
+    REQUEST_SQL_TIME.observe(sql_time, endpoint=endpoint)
+
+
+def _after_request(response):
+    _record_request(response.status_code)
+    return response
+
+
+def _teardown_request(exc):
+    # Solo queda pendiente si la vista lanzó una excepción que no llegó a after_request
+    if exc is not None:
+        _record_request(500)
+
+
+bp = Blueprint('metrics', __name__)
+
+
+@bp.route('/metrics')
+def metrics():
+    """
+    Métricas del proceso en el formato de texto de Prometheus.
+    """
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def init_app(app):
+    """
+    Activa la medición de peticiones y el endpoint /metrics (si METRICS_ENABLED).
+    """
+    global _slow_threshold
+    _slow_threshold = app.config['SLOW_QUERY_THRESHOLD']
+    if not app.config['METRICS_ENABLED']:
+        return
+    app.before_request(_start_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.register_blueprint(bp)
@@ -0,0 +1,158 @@
+import logging
+from datetime import datetime
+from sqlalchemy import inspect, select, text
+from sqlalchemy.schema import CreateColumn
+from app import db
+from app.models import Ticket, TicketArchive, TicketChangeLog, TicketHistory, TicketMarker, TicketStat, SyncWatermark, User
+
+logger = logging.getLogger(__name__)
+
+# Registro de las versiones de esquema aplicadas a la base de datos
+schema_version = db.Table(
+    'schema_version',
+    db.Column('version', db.Integer, primary_key=True, autoincrement=False),
+    db.Column('description', db.String(255), nullable=False),
+    db.Column('applied_at', db.DateTime, nullable=False),
+)
+
+
+class Migration:
+    """
+    Un paso versionado del esquema. `upgrade` recibe una conexión dentro de una transacción.
+    Las migraciones deben ser idempotentes: una base creada con db.create_all() ya tiene
+    el esquema final y solo necesita registrar las versiones.
+    """
+
+    def __init__(self, version, description, upgrade):
+        self.version = version
+        self.description = description
+        self.upgrade = upgrade
+
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """
+    Registra una función como la migración número `version`.
+    """
+    def decorator(fn):
+        if any(m.version == version for m in MIGRATIONS):
+            raise ValueError(f'Migración {version} duplicada')
+        MIGRATIONS.append(Migration(version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return fn
+    return decorator
+
+
+def create_missing_indexes(conn, table, names=None):
+    """
+    Crea los índices declarados en el modelo para `table` que aún no existan.
+    """
+    existing = {ix['name'] for ix in inspect(conn).get_indexes(table.name)}
+    for index in sorted(table.indexes, key=lambda ix: ix.name):
+        if (names is None or index.name in names) and index.name not in existing:
+            logger.info('Creando índice %s', index.name)
+            index.create(conn)
+
+
+def add_missing_columns(conn, table, names):
+    """
+    Agrega con ALTER TABLE las columnas `names` del modelo que aún no existan en la tabla.
+    Retorna los nombres de las columnas agregadas.
+    """
+    existing = {column['name'] for column in inspect(conn).get_columns(table.name)}
+    added = []
+    for name in names:
+        if name not in existing:
+            logger.info('Agregando columna %s.%s', table.name, name)
+            ddl = CreateColumn(table.c[name]).compile(dialect=conn.dialect)
+            conn.execute(text(f'ALTER TABLE {conn.dialect.identifier_preparer.format_table(table)} ADD COLUMN {ddl}'))
+            added.append(name)
+    return added
+
+
+def applied_versions(conn):
+    schema_version.create(conn, checkfirst=True)
+    return {row.version for row in conn.execute(select(schema_version.c.version))}
+
+
+def pending_migrations(engine=None):
+    engine = engine or db.engine
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+    return [m for m in MIGRATIONS if m.version not in done]
+
+
+def upgrade(engine=None, target=None):
+    """
+    Aplica en orden las migraciones pendientes (hasta `target`, si se indica),
+    cada una en su propia transacción. Retorna las migraciones aplicadas.
+    """
+    engine = engine or db.engine
+    applied = []
+    for m in pending_migrations(engine):
+        if target is not None and m.version > target:
+            break
+        with engine.begin() as conn:
+            m.upgrade(conn)
+            conn.execute(schema_version.insert().values(
+                version=m.version, description=m.description, applied_at=datetime.now()
+            ))
+        logger.info('Migración %s aplicada: %s', m.version, m.description)
+        applied.append(m)
+    return applied
+
+
+@migration(1, 'Índices compuestos de ticket y user para el dashboard y los formularios')
+def _indices_de_acceso(conn):
+    # Las filas sin fecha quedarían fuera de la paginación por (fecha_creacion, id)
+    conn.execute(Ticket.__table__.update()
+                 .where(Ticket.fecha_creacion.is_(None))
+                 .values(fecha_creacion=db.func.current_timestamp()))
+    create_missing_indexes(conn, Ticket.__table__, {
+        'ix_ticket_fecha_creacion', 'ix_ticket_tecnico_fecha',
+        'ix_ticket_tecnico_estado_fecha', 'ix_ticket_usuario_fecha',
+    })
+    create_missing_indexes(conn, User.__table__, {'ix_user_role_username'})
+
+
+@migration(2, 'Índice FULLTEXT (asunto, descripcion) para la búsqueda de tickets en MySQL')
+def _indice_fulltext(conn):
+    if conn.dialect.name in ('mysql', 'mariadb'):
+        create_missing_indexes(conn, Ticket.__table__, {'ft_ticket_asunto_descripcion'})
+
+
+@migration(3, 'Tabla ticket_stats con los contadores del resumen del dashboard')
+def _contadores(conn):
+    from app.stats import replace_counters
+
+    TicketStat.__table__.create(conn, checkfirst=True)
+    replace_counters(conn)
+
+
+@migration(4, 'Columnas updated_at/version de ticket y tabla ticket_markers para GET condicional')
+def _marcadores(conn):
+    from app.markers import replace_markers
+
+    if 'updated_at' in add_missing_columns(conn, Ticket.__table__, ['updated_at', 'version']):
+        conn.execute(Ticket.__table__.update().values(updated_at=Ticket.__table__.c.fecha_creacion))
+    TicketMarker.__table__.create(conn, checkfirst=True)
+    replace_markers(conn)
+
+
+@migration(5, 'Bitácora ticket_change y marca de compactación para GET /tickets/changes')
+def _bitacora(conn):
+    TicketChangeLog.__table__.create(conn, checkfirst=True)
+    SyncWatermark.__table__.create(conn, checkfirst=True)
+
+
+@migration(6, 'Tabla ticket_archive e índice (estado, updated_at) para archivar tickets cerrados')
+def _archivo(conn):
+    TicketArchive.__table__.create(conn, checkfirst=True)
+    create_missing_indexes(conn, Ticket.__table__, {'ix_ticket_estado_updated'})
+
+
+@migration(7, 'Tabla ticket_history con el historial de cambios de tickets por campo')
+def _historial(conn):
+    TicketHistory.__table__.create(conn, checkfirst=True)
@@ -1,11 +1,19 @@
+from datetime import datetime, timezone
 from app import db, login_manager
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 
-# Carga un usuario desde su ID, necesario para el sistema de sesiones de Flask-Login
+# Carga un usuario desde su ID, necesario para el sistema de sesiones de Flask-Login.
+# Se ejecuta en cada petición, por eso pasa por la caché de usuarios (app/user_cache.py)
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    from app.user_cache import load_user as load_cached_user
+    return load_cached_user(int(user_id))
+
+def utcnow():
+    """
+    Fecha y hora actual en UTC, sin zona horaria (como se guardan las columnas DateTime).
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 # Modelo de roles (Admin, Técnico, User, etc.)
 class Role(db.Model):
@@ -20,6 +28,19 @@ class Role(db.Model):
 
 class Ticket(db.Model):
     __tablename__ = 'ticket'
+    # Índices según las rutas de acceso reales: el dashboard filtra por técnico/usuario
+    # (o por nada, en el caso del Admin) y pagina por (fecha_creacion, id).
+    # Cambios aquí requieren una migración en app/migrations.py
+    __table_args__ = (
+        db.Index('ix_ticket_fecha_creacion', 'fecha_creacion'),
+        db.Index('ix_ticket_tecnico_fecha', 'tecnico_id', 'fecha_creacion'),
+        db.Index('ix_ticket_tecnico_estado_fecha', 'tecnico_id', 'estado', 'fecha_creacion'),
+        db.Index('ix_ticket_usuario_fecha', 'usuario_id', 'fecha_creacion'),
+        # Selección de tickets cerrados a archivar (ver app/archive.py)
+        db.Index('ix_ticket_estado_updated', 'estado', 'updated_at'),
+        # Búsqueda de texto completo (solo MySQL; en SQLite se usa app/search.py)
+        db.Index('ft_ticket_asunto_descripcion', 'asunto', 'descripcion', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     asunto = db.Column(db.String(255), nullable=False)
@@ -29,10 +50,108 @@ class Ticket(db.Model):
     fecha_creacion = db.Column(db.DateTime, default=db.func.current_timestamp())
     tecnico_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     usuario_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # Última modificación (UTC) y número de versión, que aumenta con cada cambio del ticket
+    # (ver app/ticket_events.py). Sirven para ETag/Last-Modified y para invalidar cachés.
+    updated_at = db.Column(db.DateTime, default=utcnow, onupdate=utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    # Los tickets de esta tabla son los activos; los cerrados antiguos están en TicketArchive
+    archivado = False
+
+# Tickets cerrados movidos fuera de la tabla ticket por la tarea de archivado (ver app/archive.py).
+# Mismas columnas e ids que en ticket, más la fecha de archivado; son de solo lectura.
+class TicketArchive(db.Model):
+    __tablename__ = 'ticket_archive'
+    __table_args__ = (
+        db.Index('ix_ticket_archive_fecha_creacion', 'fecha_creacion'),
+        db.Index('ix_ticket_archive_tecnico_fecha', 'tecnico_id', 'fecha_creacion'),
+        db.Index('ix_ticket_archive_usuario_fecha', 'usuario_id', 'fecha_creacion'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    asunto = db.Column(db.String(255), nullable=False)
+    descripcion = db.Column(db.Text, nullable=False)
+    prioridad = db.Column(db.Enum('Baja', 'Media', 'Alta'), nullable=False)
+    estado = db.Column(db.Enum('Abierto', 'En proceso', 'Cerrado'), nullable=False)
+    fecha_creacion = db.Column(db.DateTime)
+    tecnico_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    updated_at = db.Column(db.DateTime)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+    tecnico = db.relationship('User', foreign_keys=[tecnico_id])
+    usuario = db.relationship('User', foreign_keys=[usuario_id])
+
+    archivado = True
+
+# Contadores de tickets para el resumen del dashboard (ver app/stats.py).
+# dimension: 'estado', 'prioridad' o 'tecnico_abiertos' (clave = id del técnico)
+class TicketStat(db.Model):
+    __tablename__ = 'ticket_stats'
+
+    dimension = db.Column(db.String(32), primary_key=True)
+    clave = db.Column(db.String(64), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+# Marcador de cambios por alcance de visibilidad (ver app/markers.py).
+# scope: 'all', 'tecnico:<id>' o 'usuario:<id>'
+class TicketMarker(db.Model):
+    __tablename__ = 'ticket_markers'
+
+    scope = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+# Bitácora de cambios de tickets, solo de inserción (ver app/changelog.py).
+# id es el cursor de GET /tickets/changes; op: 'create', 'update', 'delete' o 'archive'
+class TicketChangeLog(db.Model):
+    __tablename__ = 'ticket_change'
+    # Los ids nunca se reutilizan, aunque la compactación vacíe la tabla (AUTOINCREMENT en SQLite)
+    __table_args__ = (
+        db.Index('ix_ticket_change_changed_at', 'changed_at'),
+        {'sqlite_autoincrement': True},
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    ticket_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(8), nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False)
+
+# Última entrada de la bitácora eliminada por la compactación. Un cursor anterior
+# a esta marca ya no puede sincronizarse por deltas.
+class SyncWatermark(db.Model):
+    __tablename__ = 'sync_watermark'
+
+    name = db.Column(db.String(32), primary_key=True)
+    change_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+# Historial de cambios de tickets por campo, escrito en segundo plano (ver app/audit.py).
+# op: 'create', 'update', 'delete' o 'archive'; field/old_value/new_value solo en 'update'.
+# user_id es quien hizo el cambio (None si no hubo un usuario autenticado).
+class TicketHistory(db.Model):
+    __tablename__ = 'ticket_history'
+    __table_args__ = (
+        db.Index('ix_ticket_history_ticket', 'ticket_id', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    ticket_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer)
+    op = db.Column(db.String(8), nullable=False)
+    field = db.Column(db.String(32))
+    old_value = db.Column(db.Text)
+    new_value = db.Column(db.Text)
+    changed_at = db.Column(db.DateTime, nullable=False)
 
 # Modelo de usuarios del sistema
 class User(UserMixin, db.Model):
     __tablename__ = 'user'
+    # Las listas de usuarios/técnicos de los formularios filtran por rol y ordenan por nombre
+    __table_args__ = (
+        db.Index('ix_user_role_username', 'role_id', 'username'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
@@ -46,17 +165,34 @@ class User(UserMixin, db.Model):
     # Relación con los tickets asignados al usuario (como técnico)
     tickets_asignados = db.relationship('Ticket', foreign_keys=[Ticket.tecnico_id], backref='tecnico', lazy=True)
 
+    @property
+    def role_name(self) -> str:
+        """
+        Nombre del rol, resuelto desde la tabla de roles en memoria (sin consultar la BD).
+        """
+        from app.user_cache import roles
+        return roles.name(self.role_id)
+
     def set_password(self, password: str):
         """
-        Genera y guarda el hash de la contraseña.
+        Genera y guarda el hash de la contraseña (política PASSWORD_HASH_METHOD).
         """
-        self.password_hash = generate_password_hash(password)
+        from app.passwords import hash_password
+        self.password_hash = hash_password(password)
 
     def check_password(self, password: str) -> bool:
         """
         Verifica si la contraseña ingresada es válida comparando con el hash.
         """
-        return check_password_hash(self.password_hash, password)
+        from app.passwords import verify_password
+        return verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self) -> bool:
+        """
+        True si el hash guardado se generó con otro algoritmo o costo que la política actual.
+        """
+        from app.passwords import needs_rehash
+        return needs_rehash(self.password_hash)
 
 
     
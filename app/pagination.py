@@ -0,0 +1,129 @@
+import base64
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(fecha, id):
+    """
+    Codifica la posición (fecha_creacion, id) de una fila en un cursor opaco para la URL.
+    """
+    raw = f"{fecha.isoformat() if fecha else ''}|{id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decodifica un cursor generado por encode_cursor. Lanza ValueError si es inválido.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        fecha, _, id = base64.urlsafe_b64decode(padded.encode()).decode().partition('|')
+        return (datetime.fromisoformat(fecha) if fecha else None), int(id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f'Cursor inválido: {cursor!r}') from e
+
+
+class KeysetPage:
+    """
+    Una página de resultados junto con los cursores para navegar a la siguiente/anterior.
+    """
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def _seek(fecha_col, id_col, cursor, forward):
+    # Condición "después de (fecha, id)" expandida con OR para que el índice se use como rango.
+    # fecha_creacion admite NULL: como en MySQL y SQLite, las fechas NULL van antes que
+    # cualquier otra en orden ascendente (una comparación con NULL no encuentra filas)
+    fecha, id = cursor
+    if fecha is None:
+        if forward:
+            return or_(and_(fecha_col.is_(None), id_col > id), fecha_col.is_not(None))
+        return and_(fecha_col.is_(None), id_col < id)
+    if forward:
+        return or_(fecha_col > fecha, and_(fecha_col == fecha, id_col > id))
+    return or_(fecha_col < fecha, and_(fecha_col == fecha, id_col < id), fecha_col.is_(None))
+
+
+def keyset_query(query, fecha_col, id_col, per_page, cursor=None, ascending=False):
+    """
+    Aplica a `query` la condición de búsqueda a partir de `cursor` (fecha, id), el orden
+    y el LIMIT de una página. Se lee una fila extra para saber si hay otra página.
+    """
+    if cursor is not None:
+        query = query.filter(_seek(fecha_col, id_col, cursor, forward=ascending))
+
+    if ascending:
+        query = query.order_by(fecha_col.asc(), id_col.asc())
+    else:
+        query = query.order_by(fecha_col.desc(), id_col.desc())
+
+    return query.limit(per_page + 1)
+
+
+def keyset_paginate(query, fecha_col, id_col, per_page, after=None, before=None, descending=True):
+    """
+    Pagina `query` por búsqueda (seek) sobre (fecha_col, id_col) en lugar de OFFSET,
+    de modo que el costo de cada página no depende de su posición en la tabla.
+
+    `after` / `before` son cursores opacos (ver encode_cursor). Solo se lee
+    per_page + 1 filas para saber si existe otra página.
+    """
+    return keyset_paginate_union([(query, fecha_col, id_col)], per_page, after, before, descending)
+
+
+def _sort_key(fecha_key, id_key):
+    # Mismo orden que la base de datos: las fechas NULL van primero en orden ascendente
+    def key(row):
+        fecha = getattr(row, fecha_key)
+        return fecha is not None, fecha or datetime.min, getattr(row, id_key)
+    return key
+
+
+def keyset_paginate_union(sources, per_page, after=None, before=None, descending=True):
+    """
+    Como keyset_paginate, pero sobre varias consultas que se muestran como una sola lista
+    (p. ej. tickets activos y archivados). `sources` es una lista de (query, fecha_col, id_col)
+    con columnas del mismo nombre y (fecha, id) únicos entre todas las fuentes.
+
+    Cada fuente lee su propia página desde el mismo cursor y las filas se mezclan en
+    memoria: cada consulta sigue usando su índice y lee a lo sumo per_page + 1 filas.
+    """
+    backwards = before is not None
+    cursor = decode_cursor(before if backwards else after) if (before or after) else None
+
+    # Recorrer hacia atrás es recorrer en el orden inverso y luego voltear el resultado
+    ascending = descending == backwards
+    rows = []
+    for query, fecha_col, id_col in sources:
+        rows.extend(keyset_query(query, fecha_col, id_col, per_page, cursor, ascending).all())
+
+    fecha_key, id_key = sources[0][1].key, sources[0][2].key
+    if len(sources) > 1:
+        rows.sort(key=_sort_key(fecha_key, id_key), reverse=not ascending)
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    if not rows:
+        return KeysetPage(rows)
+
+    first = encode_cursor(getattr(rows[0], fecha_key), getattr(rows[0], id_key))
+    last = encode_cursor(getattr(rows[-1], fecha_key), getattr(rows[-1], id_key))
+
+    if backwards:
+        return KeysetPage(rows, next_cursor=last, prev_cursor=first if has_more else None)
+    return KeysetPage(rows, next_cursor=last if has_more else None,
+                      prev_cursor=first if cursor is not None else None)
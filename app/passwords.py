@@ -0,0 +1,144 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+from app.metrics import REGISTRY, Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+HASH_SECONDS = REGISTRY.register(Histogram(
+    'password_hash_seconds', 'Tiempo de cálculo de cada hash de contraseña.', ('op',),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)))
+HASH_REJECTED = REGISTRY.register(Counter(
+    'password_hash_rejected_total', 'Hashes rechazados por tener la cola del pool de hashing llena.', ()))
+REHASHED = REGISTRY.register(Counter(
+    'password_rehash_total', 'Contraseñas rehasheadas al iniciar sesión con la política actual.', ()))
+
+
+class HashingBusy(Exception):
+    """
+    Hay demasiados hashes en espera: la petición se rechaza sin calcular nada.
+    """
+
+
+def normalize_method(method):
+    """
+    Método de werkzeug con todos sus parámetros, tal como queda al inicio del hash
+    guardado ('scrypt' -> 'scrypt:32768:8:1', 'pbkdf2' -> 'pbkdf2:sha256:<iteraciones>').
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        defaults = ['32768', '8', '1']
+    elif name == 'pbkdf2':
+        defaults = ['sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        return method
+    return ':'.join([name] + args + defaults[len(args):])
+
+
+class PasswordHasher:
+    """
+    Calcula los hashes de contraseñas en un pool de `workers` hilos: hashlib libera el GIL
+    durante scrypt/pbkdf2, así que como mucho `workers` núcleos se dedican a hashing y el
+    resto sigue atendiendo las demás peticiones. Con más de `max_pending` hashes en curso
+    o en espera se lanza HashingBusy en lugar de encolar.
+    """
+
+    def __init__(self, method, salt_length=16, workers=None, max_pending=None):
+        self.method = normalize_method(method)
+        self.salt_length = salt_length
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 8
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hash')
+
+    def _run(self, op, func, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                HASH_REJECTED.inc()
+                raise HashingBusy()
+            self._pending += 1
+        try:
+            return self._executor.submit(self._timed, op, func, *args).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    @staticmethod
+    def _timed(op, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            HASH_SECONDS.observe(time.perf_counter() - start, op=op)
+
+    def hash(self, password):
+        return self._run('hash', generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, pwhash, password):
+        return self._run('verify', check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """
+        True si el hash guardado usa otro algoritmo o costo que la política actual.
+        """
+        return pwhash.split('$', 1)[0] != self.method
+
+    @property
+    def pending(self):
+        return self._pending
+
+
+# Hashers de cada aplicación creada en el proceso (para la métrica de pendientes)
+_hashers = []
+
+REGISTRY.register(Gauge(
+    'password_hash_pending', 'Hashes de contraseñas en curso o en espera.', (),
+    collect=lambda: {(): sum(h.pending for h in _hashers)}))
+
+
+def _hasher():
+    return current_app.extensions.get('password_hasher') if has_app_context() else None
+
+
+def hash_password(password):
+    """
+    Hash de la contraseña con la política PASSWORD_HASH_METHOD, calculado en el pool.
+    """
+    hasher = _hasher()
+    if hasher is None:
+        # Fuera de una aplicación (scripts): valores por defecto de werkzeug, en este hilo
+        return generate_password_hash(password)
+    return hasher.hash(password)
+
+
+def verify_password(pwhash, password):
+    hasher = _hasher()
+    if hasher is None:
+        return check_password_hash(pwhash, password)
+    return hasher.verify(pwhash, password)
+
+
+def needs_rehash(pwhash):
+    hasher = _hasher()
+    return hasher is not None and hasher.needs_rehash(pwhash)
+
+
+def _busy(e):
+    return 'Hay demasiados inicios de sesión en curso; intenta de nuevo en unos segundos.', 503, {'Retry-After': '1'}
+
+
+def init_app(app):
+    """
+    Crea el pool de hashing con la política y los límites de PASSWORD_HASH_*.
+    """
+    hasher = PasswordHasher(app.config['PASSWORD_HASH_METHOD'], app.config['PASSWORD_SALT_LENGTH'],
+                            app.config['PASSWORD_HASH_WORKERS'], app.config['PASSWORD_HASH_MAX_PENDING'])
+    app.extensions['password_hasher'] = hasher
+    _hashers.append(hasher)
+    app.register_error_handler(HashingBusy, _busy)
+    logger.debug('Hashing de contraseñas: %s, %s hilo(s)', hasher.method, hasher.workers)
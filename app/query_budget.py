@@ -0,0 +1,96 @@
+import logging
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Se lanza cuando una ruta o bloque ejecuta más sentencias SQL de las permitidas.
+    """
+
+    def __init__(self, limit, statements, where=''):
+        self.limit = limit
+        self.statements = statements
+        detail = '\n'.join(f'  {i + 1}. {s}' for i, s in enumerate(statements))
+        super().__init__(f'{where or "Bloque"} ejecutó {len(statements)} sentencias SQL '
+                         f'(presupuesto: {limit}):\n{detail}')
+
+
+# Contadores activos en este contexto de aplicación (se apilan para permitir anidarlos)
+def _active_counters():
+    if not has_app_context():
+        return None
+    return g.setdefault('_query_counters', [])
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _on_execute(conn, cursor, statement, parameters, context, executemany):
+    counters = _active_counters()
+    if counters:
+        for statements in counters:
+            statements.append(statement)
+
+
+@contextmanager
+def count_queries():
+    """
+    Registra las sentencias SQL ejecutadas dentro del bloque (en el contexto de aplicación actual).
+
+        with count_queries() as statements:
+            client.get('/dashboard')
+        assert len(statements) <= 4
+    """
+    counters = _active_counters()
+    if counters is None:
+        raise RuntimeError('count_queries() requiere un contexto de aplicación activo.')
+    statements = []
+    counters.append(statements)
+    try:
+        yield statements
+    finally:
+        counters.remove(statements)
+
+
+@contextmanager
+def max_queries(limit, where=''):
+    """
+    Falla con QueryBudgetExceeded si el bloque ejecuta más de `limit` sentencias SQL.
+    Pensado para pruebas: detecta regresiones N+1 independientemente del número de filas.
+    """
+    with count_queries() as statements:
+        yield statements
+    if len(statements) > limit:
+        raise QueryBudgetExceeded(limit, statements, where)
+
+
+def query_budget(limit):
+    """
+    Declara el presupuesto de sentencias SQL de una vista (incluye el render de la plantilla).
+
+    Con QUERY_BUDGET_ENFORCE activo (por defecto en modo TESTING) exceder el presupuesto
+    hace fallar la petición; en otro caso solo se registra una advertencia.
+    Debe ir justo encima de la función de la vista. El presupuesto queda en el atributo
+    `query_budget` de la vista (las pruebas lo leen y lo pueden bajar).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            with count_queries() as statements:
+                response = view(*args, **kwargs)
+            if len(statements) > wrapper.query_budget:
+                error = QueryBudgetExceeded(wrapper.query_budget, statements, where=request.endpoint)
+                enforce = current_app.config.get('QUERY_BUDGET_ENFORCE')
+                if enforce is None:
+                    enforce = current_app.testing
+                if enforce:
+                    raise error
+                logger.warning(str(error))
+            return response
+        wrapper.query_budget = limit
+        return wrapper
+    return decorator
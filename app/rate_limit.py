@@ -0,0 +1,93 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from app.metrics import REGISTRY, Counter
+
+RATE_LIMITED = REGISTRY.register(Counter(
+    'login_rate_limited_total', 'Intentos de inicio de sesión rechazados por el limitador.', ('key',)))
+
+
+class TokenBucketLimiter:
+    """
+    Cubeta de fichas por clave: hasta `burst` intentos seguidos y después `rate` por
+    segundo. Guarda como mucho `maxsize` claves en memoria (se descarta la usada hace
+    más tiempo, que vuelve a empezar con la cubeta llena). Cada proceso tiene la suya.
+    """
+
+    def __init__(self, rate, burst, maxsize=100000):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key):
+        """
+        Consume una ficha de `key`. Retorna 0 si se permite, o los segundos que faltan
+        para la siguiente ficha.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return 0 if allowed else (1 - tokens) / self.rate
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+def login_retry_after(ip, email):
+    """
+    Consume un intento de inicio de sesión de la IP y del email. Retorna None si se
+    permite o los segundos (enteros) que el cliente debe esperar. Se comprueba antes de
+    consultar la base y de calcular el hash.
+    """
+    limiters = current_app.extensions.get('login_limiters')
+    if not limiters:
+        return None
+    for kind, key in (('ip', ip), ('email', _email_key(email))):
+        wait = limiters[kind].acquire(key)
+        if wait:
+            RATE_LIMITED.inc(key=kind)
+            return max(1, math.ceil(wait))
+    return None
+
+
+def login_succeeded(email):
+    """
+    Un inicio de sesión correcto devuelve sus intentos al email (no a la IP).
+    """
+    limiters = current_app.extensions.get('login_limiters')
+    if limiters:
+        limiters['email'].reset(_email_key(email))
+
+
+def _email_key(email):
+    return (email or '').strip().lower()
+
+
+def init_app(app):
+    """
+    Limitadores de inicio de sesión por IP y por email (LOGIN_RATE_*), si LOGIN_RATE_LIMIT_ENABLED.
+    """
+    if not app.config['LOGIN_RATE_LIMIT_ENABLED']:
+        return
+    config = app.config
+    app.extensions['login_limiters'] = {
+        'ip': TokenBucketLimiter(config['LOGIN_RATE_PER_IP'], config['LOGIN_BURST_PER_IP'],
+                                 config['LOGIN_RATE_LIMIT_MAX_KEYS']),
+        'email': TokenBucketLimiter(config['LOGIN_RATE_PER_EMAIL'], config['LOGIN_BURST_PER_EMAIL'],
+                                    config['LOGIN_RATE_LIMIT_MAX_KEYS']),
+    }
@@ -1,7 +1,25 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash
+from types import SimpleNamespace
+from flask import Blueprint, Response, render_template, redirect, url_for, request, flash, current_app
 from flask_login import login_required, current_user, login_user
-from app.forms import TicketsForm, ChangePasswordForm, LoginForm, UserEditForm
-from app.models import db, Ticket, User, Ticket, Role
+from sqlalchemy import select
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException
+from app.forms import TicketsForm, ChangePasswordForm, LoginForm, UserEditForm, ImportTicketsForm
+from app.models import db, Ticket, TicketArchive, User, Ticket, Role
+from app.pagination import keyset_paginate_union
+from app.query_budget import query_budget
+from app.serializers import stream_tickets, ticket_columns
+from app.choices import assignee_choices, compact_choices, fill_choices
+from app.conditional import conditional_get
+from app.db_routing import read_replica
+from app.signals import usuario_cambiado
+from app.ticket_queries import TicketFilters, dashboard_query, ticket_row_options
+from app.search import get_backend
+from app.markers import scope_for, scopes_of
+from app import archive, audit, live, stats
+from app.fragments import RowRenderer
+from app.assignment import AUTO, least_loaded_tecnico
+from app.warmup import on_warm_up
 
 # Blueprint principal que maneja el dashboard, gestión de tickets y cambio de contraseña
 main = Blueprint('main', __name__)
@@ -30,26 +48,125 @@ def cambiar_password():
         # Actualiza la contraseña y guarda
         current_user.set_password(form.new_password.data)
         db.session.commit()
+        usuario_cambiado.send(current_app._get_current_object(), user_id=current_user.id)
         flash('✅ Password updated successfully.', "success")  # 🔁 Traducido
         return redirect(url_for('main.dashboard'))
 
     return render_template('cambiar_password.html', form=form)
 
 
+def _nombres_visibles():
+    # Las filas del dashboard muestran nombres de técnicos y usuarios: forman parte del ETag
+    return assignee_choices.digest('Técnico'), assignee_choices.digest('Usuario')
+
 @main.route('/dashboard')
+@read_replica
 @login_required
+@conditional_get(extra=_nombres_visibles)
+@query_budget(5)
 def dashboard():
     """
-    Panel principal del usuario. Muestra los tickets si no es estudiante.
+    Panel principal del usuario. Muestra los tickets visibles según su rol,
+    con filtros y paginación por cursor sobre (fecha_creacion, id).
+    Con ?archivados=1 incluye también los tickets archivados.
     """
-    if current_user.role.name == 'Admin': 
-        tickets = Ticket.query.all()
-    elif current_user.role.name == 'Técnico':
-        tickets = Ticket.query.filter_by(tecnico_id=current_user.id).all()
-    else:
-        tickets = Ticket.query.filter_by(usuario_id=current_user.id).all()
-    
-    return render_template('dashboard.html', tickets=tickets)
+    filtros = TicketFilters(request.args)
+    sources = [(dashboard_query(current_user, filtros), Ticket.fecha_creacion, Ticket.id)]
+    if filtros.archivados:
+        sources.append((dashboard_query(current_user, filtros, TicketArchive),
+                        TicketArchive.fecha_creacion, TicketArchive.id))
+
+    per_page = min(request.args.get('por_pagina', current_app.config['TICKETS_PER_PAGE'], type=int),
+                   current_app.config['TICKETS_MAX_PER_PAGE'])
+    try:
+        page = keyset_paginate_union(
+            sources, per_page=max(per_page, 1),
+            after=request.args.get('despues'), before=request.args.get('antes'),
+            descending=filtros.descending
+        )
+    except ValueError:
+        flash('Cursor de paginación inválido.')
+        return redirect(url_for('main.dashboard', **filtros.to_args()))
+
+    # Solo el Admin puede filtrar por técnico y ve el resumen de contadores
+    tecnicos, resumen = [], None
+    if current_user.role_name == 'Admin':
+        tecnicos = [{'id': id, 'username': username} for id, username in assignee_choices.choices('Técnico')]
+        resumen = stats.summary()
+
+    # Las filas se renderizan con _ticket_row.html y se reutilizan entre peticiones (app/fragments.py)
+    return render_template('dashboard.html', tickets=page.items, page=page, filtros=filtros,
+                           tecnicos=tecnicos, resumen=resumen, render_row=RowRenderer(current_user),
+                           nombres_tecnicos=assignee_choices.usernames('Técnico') if resumen else {})
+
+@on_warm_up('dashboard')
+def _calentar_dashboard():
+    # Consultas del dashboard sin filtros para cada rol y el resumen: SQLAlchemy deja
+    # compiladas las sentencias antes de la primera petición
+    filtros = TicketFilters(MultiDict())
+    for role_name in ('Admin', 'Técnico', 'Usuario'):
+        usuario = SimpleNamespace(id=0, role_name=role_name)
+        keyset_paginate_union([(dashboard_query(usuario, filtros), Ticket.fecha_creacion, Ticket.id)],
+                              per_page=1, descending=filtros.descending)
+    stats.summary()
+
+@main.route('/dashboard/eventos')
+@login_required
+def eventos_dashboard():
+    """
+    Server-Sent Events con los tickets creados, modificados o eliminados en el alcance
+    del usuario (ver app/live.py y static/js/live.js). No usa la base de datos.
+    """
+    broker = live.get_broker()
+    if broker.subscriber_count >= current_app.config['LIVE_MAX_CONNECTIONS']:
+        return {'error': 'Demasiadas conexiones en vivo.'}, 503, {'Retry-After': '30'}
+
+    stream = live.event_stream(broker, [scope_for(current_user)],
+                               current_app.config['LIVE_KEEPALIVE'], current_app.config['LIVE_STREAM_TIMEOUT'])
+    return Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Sin buffer en nginx: cada evento se entrega en cuanto se genera
+        'X-Accel-Buffering': 'no',
+    })
+
+@main.route('/tickets/resumen')
+@read_replica
+@login_required
+def resumen_tickets():
+    """
+    Resumen de tickets por estado, prioridad y backlog abierto por técnico (JSON).
+    Se lee de la tabla de contadores, sin recorrer la tabla de tickets.
+    """
+    if current_user.role_name not in ['Admin', 'Técnico']:
+        return {'error': 'No tienes permiso para ver el resumen.'}, 403
+
+    resumen = stats.summary()
+    if current_user.role_name == 'Técnico':
+        # Un técnico solo ve su propio backlog
+        return {'tecnico_abiertos': resumen['tecnico_abiertos'].get(str(current_user.id), 0)}, 200
+    return resumen, 200
+
+@main.route('/buscar')
+@read_replica
+@login_required
+@query_budget(4)
+def buscar():
+    """
+    Búsqueda de texto completo en asunto y descripción de los tickets visibles
+    para el usuario, ordenada por relevancia.
+    """
+    q = request.args.get('q', '').strip()
+    pagina = max(request.args.get('pagina', 1, type=int), 1)
+    resultados = None
+    if q:
+        resultados = get_backend().search(
+            q, current_user, pagina, current_app.config['TICKETS_PER_PAGE'],
+            options=ticket_row_options()
+        )
+    return render_template('buscar.html', q=q, resultados=resultados)
+
+# Opción del <select> de técnico para la asignación automática
+AUTO_LABEL = 'Automático (menor carga)'
 
 #Tickets route
 @main.route('/tickets', methods=['GET', 'POST'])
@@ -57,18 +174,27 @@ def dashboard():
 def tickets():
     form = TicketsForm()
 
-    usuarios = User.query.filter(User.role_id == 2).all()
-    form.usuario_id.choices = [(u.id, u.username) for u in usuarios]
+    # Opciones (id, username) desde la caché en memoria, sin consultar la BD
+    fill_choices(form.usuario_id, 'Usuario')
 
-    if current_user.role.name == 'Admin':
-        tecnicos = User.query.filter(User.role_id == 3).all()
-        form.tecnico_id.choices = [(t.id, t.username) for t in tecnicos]
+    if current_user.role_name == 'Admin':
+        fill_choices(form.tecnico_id, 'Técnico')
+        # Primera opción (la preseleccionada): el técnico con menos carga (app/assignment.py)
+        form.tecnico_id.choices = [(AUTO, AUTO_LABEL)] + form.tecnico_id.choices
     else:
         # Si es técnico, su ID se asigna automáticamente 
         form.tecnico_id.choices = [(current_user.id, current_user.username)]
         form.tecnico_id.data = current_user.id  
 
-    if form.validate_on_submit():
+    valid = form.validate_on_submit()
+    if valid and form.tecnico_id.data == AUTO:
+        # Desde el índice de carga en memoria, sin consultar la BD
+        form.tecnico_id.data = least_loaded_tecnico()
+        if form.tecnico_id.data is None:
+            form.tecnico_id.errors.append('No hay técnicos para asignar el ticket.')
+            valid = False
+
+    if valid:
         ticket = Ticket(
             asunto=form.asunto.data,
             descripcion=form.descripcion.data,
@@ -87,6 +213,13 @@ def tickets():
 
         flash("Error en el formulario. Verifica los datos.", "danger")
 
+    compact_choices(form.usuario_id, 'Usuario')
+    compact_choices(form.tecnico_id, 'Técnico')
+    if current_user.role_name == 'Admin':
+        # compact_choices pudo dejar solo la opción seleccionada: la automática se conserva
+        form.tecnico_id.choices = [(AUTO, AUTO_LABEL)] + [c for c in form.tecnico_id.choices if c[0] != AUTO]
+        if form.tecnico_id.render_kw:
+            form.tecnico_id.render_kw['data-typeahead-keep'] = str(AUTO)
     return render_template('ticket_form.html', form=form)
 
 
@@ -100,21 +233,19 @@ def editar_ticket(id):
     ticket = Ticket.query.get_or_404(id)
 
     # Validación de permisos
-    if current_user.role.name not in ['Admin', 'Técnico'] or (
-        ticket.tecnico_id != current_user.id and current_user.role.name != 'Admin'):
+    if current_user.role_name not in ['Admin', 'Técnico'] or (
+        ticket.tecnico_id != current_user.id and current_user.role_name != 'Admin'):
         flash('No tienes permiso para editar este ticket.')
         return redirect(url_for('main.dashboard'))
 
     form = TicketsForm(obj=ticket)
 
     # Cargar usuarios
-    usuarios = User.query.filter(User.role_id == 2).all()
-    form.usuario_id.choices = [(u.id, u.username) for u in usuarios]
+    fill_choices(form.usuario_id, 'Usuario')
 
     # Cargar técnicos
-    if current_user.role.name == 'Admin':
-        tecnicos = User.query.filter(User.role_id == 3).all()
-        form.tecnico_id.choices = [(t.id, t.username) for t in tecnicos]
+    if current_user.role_name == 'Admin':
+        fill_choices(form.tecnico_id, 'Técnico')
     else:
         form.tecnico_id.choices = [(ticket.tecnico.id, ticket.tecnico.username)]
 
@@ -126,13 +257,15 @@ def editar_ticket(id):
         ticket.usuario_id = form.usuario_id.data
 
         # Solo admins pueden cambiar el técnico
-        if current_user.role.name == 'Admin':
+        if current_user.role_name == 'Admin':
             ticket.tecnico_id = form.tecnico_id.data
 
         db.session.commit()
         flash("Ticket actualizado correctamente.")
         return redirect(url_for('main.dashboard'))
 
+    compact_choices(form.usuario_id, 'Usuario')
+    compact_choices(form.tecnico_id, 'Técnico')
     return render_template('ticket_form.html', form=form, editar=True)
 
 
@@ -144,8 +277,8 @@ def eliminar_ticket(id):
     """
     ticket = Ticket.query.get_or_404(id)
 
-    if current_user.role.name not in ['Admin', 'Técnico'] or (
-        ticket.tecnico_id != current_user.id and current_user.role.name != 'Admin'):
+    if current_user.role_name not in ['Admin', 'Técnico'] or (
+        ticket.tecnico_id != current_user.id and current_user.role_name != 'Admin'):
         flash('You do not have permission to delete this course.')  # 🔁 Traducido
         return redirect(url_for('main.dashboard'))
 
@@ -154,22 +287,105 @@ def eliminar_ticket(id):
     flash("Ticket deleted successfully.")  # 🔁 Traducido
     return redirect(url_for('main.dashboard'))
 
+@main.route('/tickets/<int:id>/historial')
+@read_replica
+@login_required
+def historial_ticket(id):
+    """
+    Historial de cambios del ticket por campo (JSON), del más reciente al más antiguo.
+    Se pagina con ?antes=<siguiente> y ?limite=.
+    """
+    ticket = archive.get_ticket(id)
+    if ticket is None:
+        # Ticket eliminado: su historial solo lo ve el Admin
+        if current_user.role_name != 'Admin':
+            return {'error': 'Ticket no encontrado.'}, 404
+    elif scope_for(current_user) not in scopes_of({'tecnico_id': ticket.tecnico_id, 'usuario_id': ticket.usuario_id}):
+        return {'error': 'No tienes permiso para ver este ticket.'}, 403
+
+    limite = request.args.get('limite', current_app.config['AUDIT_PAGE_SIZE'], type=int)
+    limite = max(1, min(limite, current_app.config['AUDIT_MAX_PAGE_SIZE']))
+    entradas, siguiente = audit.history_page(id, request.args.get('antes', type=int), limite)
+    return {'ticket_id': id, 'historial': entradas, 'siguiente': siguiente}, 200
+
+@main.route('/tickets/exportar')
+@read_replica
+@login_required
+def exportar_tickets():
+    """
+    Descarga en CSV (compatible con Excel) los tickets visibles con los filtros del
+    dashboard. Se genera en streaming: la memoria no depende del número de tickets.
+    """
+    # Importación diferida, como en cli.py: la usan pocas peticiones
+    from app import ticket_csv
+
+    return ticket_csv.export_response(current_user, TicketFilters(request.args))
+
+@main.route('/tickets/importar', methods=['GET', 'POST'])
+@login_required
+def importar_tickets():
+    """
+    Crea tickets desde un archivo CSV (solo Admin). Las filas con errores se reportan
+    por número de línea y no impiden importar las demás.
+    """
+    if current_user.role_name != 'Admin':
+        flash("No tienes permiso para importar tickets.")
+        return redirect(url_for('main.dashboard'))
+
+    form = ImportTicketsForm()
+    reporte = None
+    if form.validate_on_submit():
+        # Importación diferida, igual que en exportar_tickets
+        import io
+        from app import ticket_csv
+
+        # El archivo se lee fila por fila desde el stream de la subida
+        stream = io.TextIOWrapper(form.archivo.data.stream, encoding='utf-8-sig', newline='')
+        try:
+            reporte = ticket_csv.import_tickets(stream).to_dict()
+        except UnicodeDecodeError:
+            reporte = {'creados': 0, 'errores': 1,
+                       'detalle': [{'linea': None, 'error': 'El archivo debe estar codificado en UTF-8.'}]}
+        if request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json':
+            return reporte, 200
+    return render_template('importar.html', form=form, reporte=reporte)
+
 @main.route('/usuarios')
+@read_replica
 @login_required
+@query_budget(2)
 def listar_usuarios():
-    if current_user.role.name != 'Admin':
+    if current_user.role_name != 'Admin':
         flash("You do not have permission to view this page.")
         return redirect(url_for('main.dashboard'))
 
-    # Obtener instancias completas de usuarios con sus roles (no usar .add_columns)
-    usuarios = User.query.join(User.role).all()
+    # El nombre del rol de cada usuario se resuelve con la tabla de roles en memoria
+    # (usuario.role_name), así que basta una sola consulta sin JOIN
+    usuarios = User.query.order_by(User.username).all()
 
     return render_template('usuarios.html', usuarios=usuarios)
 
+@main.route('/usuarios/buscar')
+@read_replica
+@login_required
+def buscar_usuarios():
+    """
+    Búsqueda por prefijo de usuarios de un rol (JSON), para los selectores de
+    ticket_form.html cuando hay demasiados usuarios para incluirlos en la página.
+    """
+    rol = request.args.get('rol', 'Usuario')
+    permitidos = {'Admin': ('Usuario', 'Técnico'), 'Técnico': ('Usuario',)}
+    if rol not in permitidos.get(current_user.role_name, ()):
+        return {'error': 'No tienes permiso para esta búsqueda.'}, 403
+
+    limite = min(request.args.get('limite', 20, type=int), 100)
+    opciones = assignee_choices.search(rol, request.args.get('q', ''), limite)
+    return {'usuarios': [{'id': id, 'username': username} for id, username in opciones]}, 200
+
 @main.route('/usuarios/<int:id>/editar', methods=['GET', 'POST'])
 @login_required
 def editar_usuario(id):
-    if current_user.role.name != 'Admin':
+    if current_user.role_name != 'Admin':
         flash("No tienes permiso para editar usuarios.")
         return redirect(url_for('main.dashboard'))
 
@@ -184,6 +400,7 @@ def editar_usuario(id):
         usuario.email = form.email.data
         usuario.role_id = form.role.data  # ahora es un int
         db.session.commit()
+        usuario_cambiado.send(current_app._get_current_object(), user_id=usuario.id)
         flash("Usuario actualizado correctamente.")
         return redirect(url_for('main.listar_usuarios'))
 
@@ -196,45 +413,39 @@ def editar_usuario(id):
 @main.route('/usuarios/<int:id>/eliminar', methods=['POST'])
 @login_required
 def eliminar_usuario(id):
-    if current_user.role.name != 'Admin':
+    if current_user.role_name != 'Admin':
         flash("No tienes permiso para eliminar usuarios.")
         return redirect(url_for('main.dashboard'))
 
     usuario = User.query.get_or_404(id)
     db.session.delete(usuario)
     db.session.commit()
+    usuario_cambiado.send(current_app._get_current_object(), user_id=id)
     flash("Usuario eliminado correctamente.")
     return redirect(url_for('main.listar_usuarios'))
 
 
 @main.route('/tickets', methods=['GET'])
+@read_replica
+@conditional_get()
 def listar_tickets():
     """
-    Retorna una lista de tickets en formato JSON.
+    Retorna la lista de tickets en formato JSON, generada en streaming (o NDJSON,
+    columnar o MessagePack si el cliente lo solicita). Con ?archivados=1 incluye los archivados.
     """
     try:
-        # Obtener todos los tickets de la base de datos
-        tickets = Ticket.query.all()
-
-        # Formatear los datos en una lista de diccionarios
-        data = [
-            {
-                'id': ticket.id,
-                'asunto': ticket.asunto,
-                'descripcion': ticket.descripcion,
-                'prioridad': ticket.prioridad,
-                'estado': ticket.estado,
-                'usuario_id': ticket.usuario_id,
-                'tecnico_id': ticket.tecnico_id,
-                'fecha_creacion': ticket.fecha_creacion
-            }
-            for ticket in tickets
-        ]
+        # Solo columnas, leídas por lotes desde un cursor del servidor
+        if request.args.get('archivados') == '1':
+            query = archive.with_archived()
+        else:
+            query = select(*ticket_columns()).order_by(Ticket.id)
 
         # Retorna respuesta
-        return ({'tickets': data}), 200
+        return stream_tickets(query, prefix='{"tickets":', suffix='}'), 200
 
+    except HTTPException:
+        # 406 de un ?formato= no soportado
+        raise
     except Exception as e:
         # Manejo de errores
         return ({'error': str(e)}), 500
-
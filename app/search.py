@@ -0,0 +1,222 @@
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from flask import current_app, has_app_context
+from sqlalchemy import desc, func, select
+from sqlalchemy.dialects import mysql
+from werkzeug.utils import import_string
+from app.models import db, Ticket
+from app import ticket_events
+from app.ticket_queries import scoped_tickets
+
+_WORD = re.compile(r'\w+')
+
+# Palabras demasiado comunes para aportar a la búsqueda
+STOPWORDS = frozenset('''
+    a al con de del el en es la las lo los no o para por que se sin su un una y
+'''.split())
+
+
+def tokenize(text):
+    """
+    Tokenizador por defecto: minúsculas, sin acentos, palabras de 2+ caracteres sin stopwords.
+    """
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return [w for w in _WORD.findall(text) if len(w) > 1 and w not in STOPWORDS]
+
+
+class SearchPage:
+    """
+    Una página de resultados ordenados por relevancia.
+    """
+
+    def __init__(self, items, total, page, per_page):
+        self.items = items
+        self.total = total
+        self.page = page
+        self.per_page = per_page
+
+    @property
+    def pages(self):
+        return max(1, math.ceil(self.total / self.per_page))
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def has_next(self):
+        return self.page < self.pages
+
+
+def _scope_matches(user, tecnico_id, usuario_id):
+    # Mismas reglas que ticket_queries.scoped_tickets, aplicadas en memoria
+    if user.role_name == 'Admin':
+        return True
+    if user.role_name == 'Técnico':
+        return tecnico_id == user.id
+    return usuario_id == user.id
+
+
+def _load_tickets(ids, options):
+    # Carga los tickets de la página y conserva el orden por relevancia
+    if not ids:
+        return []
+    tickets = {t.id: t for t in Ticket.query.options(*options).filter(Ticket.id.in_(ids))}
+    return [tickets[id] for id in ids if id in tickets]
+
+
+class InvertedIndex:
+    """
+    Índice invertido en memoria: término -> {ticket_id: frecuencia}.
+    Ordena con BM25 y admite altas, cambios y bajas incrementales.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, tokenizer=tokenize):
+        self.tokenizer = tokenizer
+        self.postings = {}
+        # ticket_id -> (Counter de términos, longitud, tecnico_id, usuario_id)
+        self.docs = {}
+        self.total_length = 0
+        self.lock = threading.RLock()
+
+    def add(self, id, text, tecnico_id, usuario_id):
+        terms = Counter(self.tokenizer(text))
+        with self.lock:
+            self.remove(id)
+            length = sum(terms.values())
+            self.docs[id] = (terms, length, tecnico_id, usuario_id)
+            self.total_length += length
+            for term, tf in terms.items():
+                self.postings.setdefault(term, {})[id] = tf
+
+    def remove(self, id):
+        with self.lock:
+            doc = self.docs.pop(id, None)
+            if doc is None:
+                return
+            terms, length = doc[0], doc[1]
+            self.total_length -= length
+            for term in terms:
+                posting = self.postings.get(term)
+                if posting is not None:
+                    posting.pop(id, None)
+                    if not posting:
+                        del self.postings[term]
+
+    def search(self, query, accept=None):
+        """
+        Retorna [(ticket_id, puntuación)] de mayor a menor relevancia.
+        `accept(tecnico_id, usuario_id)` descarta documentos fuera del alcance del usuario.
+        """
+        terms = set(self.tokenizer(query))
+        with self.lock:
+            n = len(self.docs)
+            if not n or not terms:
+                return []
+            avg_length = self.total_length / n
+            scores = {}
+            for term in terms:
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for id, tf in posting.items():
+                    _, length, tecnico_id, usuario_id = self.docs[id]
+                    if accept is not None and not accept(tecnico_id, usuario_id):
+                        continue
+                    norm = tf * (self.K1 + 1) / (tf + self.K1 * (1 - self.B + self.B * length / avg_length))
+                    scores[id] = scores.get(id, 0.0) + idf * norm
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+
+
+class MemorySearchBackend:
+    """
+    Búsqueda con un InvertedIndex en memoria del proceso (SQLite, desarrollo, pruebas).
+    Se construye desde la BD en la primera búsqueda y luego se mantiene con los
+    cambios confirmados de tickets (ver app/ticket_events.py).
+    """
+
+    def __init__(self, tokenizer=tokenize):
+        self.index = InvertedIndex(tokenizer)
+        self.built = False
+
+    def build(self):
+        with self.index.lock:
+            if self.built:
+                return
+            query = select(Ticket.id, Ticket.asunto, Ticket.descripcion, Ticket.tecnico_id, Ticket.usuario_id)
+            result = db.session.execute(query.execution_options(yield_per=current_app.config['STREAM_BATCH_SIZE']))
+            for row in result:
+                self.index.add(row.id, f'{row.asunto} {row.descripcion}', row.tecnico_id, row.usuario_id)
+            self.built = True
+
+    def apply_changes(self, changes):
+        # El lock evita perder cambios confirmados mientras build() recorre la tabla
+        with self.index.lock:
+            if not self.built:
+                return
+            for change in changes:
+                if change.op == 'delete':
+                    self.index.remove(change.id)
+                else:
+                    v = change.values
+                    self.index.add(change.id, f"{v['asunto']} {v['descripcion']}", v['tecnico_id'], v['usuario_id'])
+
+    def search(self, query, user, page, per_page, options=()):
+        self.build()
+        ranked = self.index.search(query, lambda t, u: _scope_matches(user, t, u))
+        start = (page - 1) * per_page
+        ids = [id for id, _ in ranked[start:start + per_page]]
+        return SearchPage(_load_tickets(ids, options), len(ranked), page, per_page)
+
+
+class MySQLSearchBackend:
+    """
+    Búsqueda con el índice FULLTEXT (asunto, descripcion) de MySQL,
+    ordenada por la relevancia de MATCH ... AGAINST en modo de lenguaje natural.
+    """
+
+    def search(self, query, user, page, per_page, options=()):
+        match = mysql.match(Ticket.asunto, Ticket.descripcion, against=query).in_natural_language_mode()
+        scoped = scoped_tickets(user, db.session.query(Ticket.id, match.label('score'))).filter(match)
+        total = scoped.with_entities(func.count()).scalar()
+        rows = scoped.order_by(desc('score'), Ticket.id.desc()).limit(per_page).offset((page - 1) * per_page).all()
+        return SearchPage(_load_tickets([row.id for row in rows], options), total, page, per_page)
+
+
+BACKENDS = {
+    'memory': MemorySearchBackend,
+    'mysql': MySQLSearchBackend,
+}
+
+def get_backend():
+    """
+    Backend configurado con SEARCH_BACKEND: 'auto' (FULLTEXT en MySQL, índice en memoria
+    en otro caso), 'memory', 'mysql' o la ruta importable de una clase propia.
+    Se crea una vez por aplicación y queda en app.extensions['search_backend'].
+    """
+    backend = current_app.extensions.get('search_backend')
+    if backend is None:
+        name = current_app.config['SEARCH_BACKEND']
+        if name == 'auto':
+            name = 'mysql' if db.engine.dialect.name in ('mysql', 'mariadb') else 'memory'
+        backend_class = BACKENDS.get(name) or import_string(name)
+        backend = current_app.extensions.setdefault('search_backend', backend_class())
+    return backend
+
+
+@ticket_events.on_commit
+def apply_changes(changes):
+    # Mantiene al día el backend de la aplicación actual, si ya se creó y lo necesita
+    if not has_app_context():
+        return
+    backend = current_app.extensions.get('search_backend')
+    if backend is not None and hasattr(backend, 'apply_changes'):
+        backend.apply_changes(changes)
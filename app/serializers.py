@@ -0,0 +1,312 @@
+import functools
+import importlib.util
+import json
+from flask import abort, current_app, jsonify, make_response, request
+from flask.json.provider import DefaultJSONProvider
+from app.models import db, Ticket
+
+# Campos expuestos por la API JSON de tickets, en orden
+TICKET_FIELDS = ('id', 'asunto', 'descripcion', 'prioridad', 'estado', 'usuario_id', 'tecnico_id', 'fecha_creacion')
+
+JSON_MIMETYPE = 'application/json'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+COLUMNAR_MIMETYPE = 'application/vnd.tickets.columnar+json'
+MSGPACK_MIMETYPE = 'application/x-msgpack'
+
+
+def ticket_columns(model=Ticket):
+    return [getattr(model, field) for field in TICKET_FIELDS]
+
+
+def ticket_to_dict(ticket):
+    """
+    Convierte un Ticket (o una fila con las columnas de TICKET_FIELDS) en un dict
+    serializable, con fecha_creacion en formato ISO 8601.
+    """
+    data = {field: getattr(ticket, field) for field in TICKET_FIELDS}
+    if data['fecha_creacion'] is not None:
+        data['fecha_creacion'] = data['fecha_creacion'].isoformat()
+    return data
+
+
+def ticket_values(ticket):
+    """
+    Los valores de TICKET_FIELDS en una lista (una fila del formato columnar).
+    """
+    values = [getattr(ticket, field) for field in TICKET_FIELDS]
+    if values[-1] is not None:
+        values[-1] = values[-1].isoformat()
+    return values
+
+
+def iter_ticket_rows(query, batch_size=None):
+    """
+    Recorre una consulta de columnas en lotes usando un cursor del lado del servidor.
+
+    Las filas son tuplas (no objetos ORM), por lo que no se acumulan en el identity
+    map de la sesión: la memoria usada depende de batch_size, no del total de filas.
+    Genera una lista de filas por lote.
+    """
+    batch_size = batch_size or current_app.config['STREAM_BATCH_SIZE']
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+@functools.cache
+def installed(module):
+    """
+    True si el paquete opcional está instalado (se comprueba una sola vez).
+    """
+    return importlib.util.find_spec(module) is not None
+
+
+# Codificadores JSON: objeto -> bytes UTF-8 compactos
+
+def _stdlib_dumps(data):
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+def _orjson_dumps():
+    try:
+        import orjson
+    except ImportError as e:
+        raise RuntimeError("API_JSON_BACKEND = 'orjson' requiere el paquete orjson (pip install orjson)") from e
+    return orjson.dumps
+
+
+JSON_BACKENDS = {
+    'json': lambda: _stdlib_dumps,
+    'orjson': _orjson_dumps,
+}
+
+
+def json_backend(name=None):
+    """
+    Nombre del codificador JSON de API_JSON_BACKEND: 'json' (biblioteca estándar),
+    'orjson' o 'auto' (orjson si está instalado).
+    """
+    name = name or current_app.config['API_JSON_BACKEND']
+    if name == 'auto':
+        return 'orjson' if installed('orjson') else 'json'
+    if name not in JSON_BACKENDS:
+        raise RuntimeError(f'API_JSON_BACKEND desconocido: {name!r}')
+    return name
+
+
+def json_dumps(name=None):
+    """
+    Función objeto -> bytes del codificador JSON configurado.
+    """
+    return JSON_BACKENDS[json_backend(name)]()
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Proveedor JSON de Flask (jsonify) con orjson. Lo que orjson no serializa por sí
+    mismo (fechas, Decimal, UUID...) pasa por `default` del proveedor por defecto, así
+    que la salida es la misma que con json.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._dumps(obj).decode()
+
+    def _dumps(self, obj):
+        import orjson
+
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.compact is False or (self.compact is None and self._app.debug):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumps(obj) + b'\n', mimetype=self.mimetype)
+
+
+# Formatos de los listados de tickets en streaming. Cada formato codifica por partes:
+# `head`, un `chunk` por lote de filas y `tail`, todos en bytes; así los usa igual la
+# respuesta síncrona (stream_tickets) que la API asíncrona (app/asgi_api.py).
+
+class JSONArrayFormat:
+    """
+    Arreglo JSON de objetos (el formato por defecto). `prefix`/`suffix` permiten
+    envolverlo, p. ej. '{"tickets":' y '}'.
+    """
+
+    name = 'json'
+    mimetype = JSON_MIMETYPE
+
+    def __init__(self, dumps):
+        self.dumps = dumps
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def encode_rows(self, rows):
+        return [ticket_to_dict(row) for row in rows]
+
+    def head(self, prefix=''):
+        return prefix.encode() + b'['
+
+    def chunk(self, rows, first):
+        # Un lote se codifica con una sola llamada y se le quitan los corchetes
+        body = self.dumps(self.encode_rows(rows))[1:-1]
+        return body if first else b',' + body
+
+    def tail(self, suffix=''):
+        return b']' + suffix.encode()
+
+
+class ColumnarFormat(JSONArrayFormat):
+    """
+    Los nombres de los campos una sola vez y cada ticket como arreglo de valores:
+    {"columns": ["id", ...], "rows": [[1, ...], ...]}.
+    """
+
+    name = 'columnar'
+    mimetype = COLUMNAR_MIMETYPE
+
+    def encode_rows(self, rows):
+        return [ticket_values(row) for row in rows]
+
+    def head(self, prefix=''):
+        return prefix.encode() + b'{"columns":' + self.dumps(list(TICKET_FIELDS)) + b',"rows":['
+
+    def tail(self, suffix=''):
+        return b']}' + suffix.encode()
+
+
+class NDJSONFormat(JSONArrayFormat):
+    """
+    Un objeto JSON por línea (sin envoltura).
+    """
+
+    name = 'ndjson'
+    mimetype = NDJSON_MIMETYPE
+
+    def head(self, prefix=''):
+        return b''
+
+    def chunk(self, rows, first):
+        return b''.join(self.dumps(ticket_to_dict(row)) + b'\n' for row in rows)
+
+    def tail(self, suffix=''):
+        return b''
+
+
+class MsgpackFormat:
+    """
+    MessagePack en secuencia (sin envoltura): primero el arreglo con los nombres de los
+    campos y después un arreglo de valores por ticket. Se lee con msgpack.Unpacker.
+    Requiere el paquete msgpack.
+    """
+
+    name = 'msgpack'
+    mimetype = MSGPACK_MIMETYPE
+
+    def __init__(self, dumps=None):
+        try:
+            import msgpack
+        except ImportError as e:
+            raise RuntimeError('El formato msgpack requiere el paquete msgpack (pip install msgpack)') from e
+        self.packer = msgpack.Packer()
+
+    @classmethod
+    def available(cls):
+        return installed('msgpack')
+
+    def head(self, prefix=''):
+        return self.packer.pack(list(TICKET_FIELDS))
+
+    def chunk(self, rows, first):
+        return b''.join(self.packer.pack(ticket_values(row)) for row in rows)
+
+    def tail(self, suffix=''):
+        return b''
+
+
+FORMATS = {
+    'json': JSONArrayFormat,
+    'ndjson': NDJSONFormat,
+    'columnar': ColumnarFormat,
+    'msgpack': MsgpackFormat,
+}
+
+
+def available_formats():
+    return [name for name, format_class in FORMATS.items() if format_class.available()]
+
+
+def negotiate_format(req=None):
+    """
+    Nombre del formato pedido con ?formato= o, si no, con Accept (JSON si empatan o
+    ninguno coincide); None si ?formato= no es un formato disponible. `req` es la
+    petición de Flask o cualquier objeto con `args` y `accept_mimetypes` (la API
+    asíncrona, app/asgi_api.py).
+    """
+    req = req or request
+    names = available_formats()
+    formato = req.args.get('formato')
+    if formato:
+        return formato if formato in names else None
+    by_mimetype = {FORMATS[name].mimetype: name for name in names}
+    best = req.accept_mimetypes.best_match(list(by_mimetype), default=JSON_MIMETYPE)
+    return by_mimetype[best] if req.accept_mimetypes[best] > 0 else 'json'
+
+
+def get_format(name):
+    return FORMATS[name](json_dumps())
+
+
+def unsupported_format():
+    """
+    Cuerpo de la respuesta 406 a un ?formato= desconocido.
+    """
+    return {'error': 'Formato no soportado', 'formatos': available_formats()}
+
+
+def encode_stream(encoder, batches, prefix='', suffix=''):
+    """
+    Codifica incrementalmente los lotes de filas con un formato de FORMATS.
+    """
+    yield encoder.head(prefix)
+    first = True
+    for rows in batches:
+        if not rows:
+            continue
+        yield encoder.chunk(rows, first)
+        first = False
+    yield encoder.tail(suffix)
+
+
+def stream_tickets(query, prefix='', suffix=''):
+    """
+    Respuesta en streaming con los tickets de `query` (un select de ticket_columns()),
+    en el formato negociado (negotiate_format): arreglo JSON, NDJSON, columnar o
+    MessagePack, comprimida si el cliente lo acepta (app/compression.py).
+    `prefix`/`suffix` envuelven los formatos JSON de arreglo.
+    """
+    # compression importa los tipos MIME de este módulo
+    from app import compression
+
+    name = negotiate_format()
+    if name is None:
+        abort(make_response(jsonify(unsupported_format()), 406))
+    encoder = get_format(name)
+    batches = iter_ticket_rows(query)
+    return compression.streamed_response(encode_stream(encoder, batches, prefix, suffix), encoder.mimetype)
+
+
+def init_app(app):
+    # jsonify con el mismo codificador que los listados
+    if json_backend(app.config['API_JSON_BACKEND']) == 'orjson':
+        app.json = OrjsonProvider(app)
@@ -0,0 +1,8 @@
+from blinker import Namespace
+
+# Señales internas de la aplicación. Las cachés en memoria se suscriben a ellas
+# para invalidarse cuando cambian los datos que contienen.
+_signals = Namespace()
+
+# Un usuario fue registrado, modificado o eliminado. Argumentos: user_id
+usuario_cambiado = _signals.signal('usuario-cambiado')
@@ -0,0 +1,118 @@
+// Dashboard en vivo: recibe por Server-Sent Events los tickets creados, modificados o
+// eliminados en el alcance del usuario y actualiza las filas de la tabla sin recargar.
+(function () {
+  var table = document.querySelector("table[data-live-url]");
+  if (!table || !window.EventSource) {
+    return;
+  }
+  var tbody = table.tBodies[0];
+  var aviso = document.getElementById("live-aviso");
+  var userId = Number(table.dataset.userId);
+  var role = table.dataset.role;
+  var pageSize = tbody.rows.length;
+
+  function showNotice() {
+    if (aviso) {
+      aviso.classList.remove("d-none");
+    }
+  }
+
+  function cell(row, text) {
+    var td = row.insertCell();
+    td.textContent = text == null ? "" : text;
+    return td;
+  }
+
+  function actions(td, ticket) {
+    td.className = "text-center ps-0 pe-0";
+    if (role !== "Admin" && ticket.tecnico_id !== userId) {
+      td.innerHTML = '<span class="text-muted"><i class="bi bi-lock"></i></span>';
+      return;
+    }
+    var edit = document.createElement("a");
+    edit.className = "btn btn-sm btn-warning me-1";
+    edit.href = table.dataset.editUrl.replace("/0/", "/" + ticket.id + "/");
+    edit.title = "Edit course";
+    edit.innerHTML = '<i class="bi bi-pencil"></i>';
+
+    var form = document.createElement("form");
+    form.method = "POST";
+    form.action = table.dataset.deleteUrl.replace("/0/", "/" + ticket.id + "/");
+    form.style.display = "inline";
+    form.onsubmit = function () {
+      return confirm("Are you sure you want to delete this ticket?");
+    };
+    form.innerHTML = '<button type="submit" class="btn btn-sm btn-danger" title="Delete course"><i class="bi bi-trash"></i></button>';
+    td.append(edit, form);
+  }
+
+  // Misma estructura de columnas que dashboard.html
+  function buildRow(ticket) {
+    var row = document.createElement("tr");
+    row.dataset.ticketId = ticket.id;
+    row.dataset.version = ticket.version == null ? "" : ticket.version;
+    cell(row, ticket.asunto);
+    cell(row, ticket.descripcion);
+    cell(row, ticket.prioridad);
+    cell(row, ticket.estado);
+    cell(row, ticket.fecha_creacion);
+    cell(row, ticket.tecnico);
+    if (role !== "Usuario") {
+      cell(row, ticket.usuario);
+    }
+    actions(row.insertCell(), ticket);
+    return row;
+  }
+
+  function findRow(id) {
+    return tbody.querySelector('tr[data-ticket-id="' + id + '"]');
+  }
+
+  function apply(ticket) {
+    var row = findRow(ticket.id);
+    if (ticket.op === "delete") {
+      if (row) {
+        row.remove();
+      }
+      return;
+    }
+    if (row) {
+      // Los eventos pueden llegar desordenados: no se retrocede a una versión anterior
+      var current = Number(row.dataset.version);
+      if (ticket.version != null && current && ticket.version <= current) {
+        return;
+      }
+      row.replaceWith(buildRow(ticket));
+    } else if (table.dataset.liveInsert === "true") {
+      tbody.insertBefore(buildRow(ticket), tbody.firstChild);
+      if (pageSize && tbody.rows.length > pageSize) {
+        tbody.deleteRow(-1);
+      }
+    } else {
+      // Con filtros o en otra página no se sabe dónde va el ticket nuevo
+      showNotice();
+    }
+  }
+
+  var source = new EventSource(table.dataset.liveUrl);
+  var disconnected = false;
+  var closing = false;
+  source.addEventListener("ticket", function (event) {
+    apply(JSON.parse(event.data));
+  });
+  source.addEventListener("reload", showNotice);
+  // El servidor cierra la conexión periódicamente y EventSource se reconecta solo
+  source.addEventListener("bye", function () {
+    closing = true;
+  });
+  source.addEventListener("ready", function () {
+    // Los eventos enviados durante un corte inesperado se perdieron
+    if (disconnected) {
+      showNotice();
+    }
+    disconnected = closing = false;
+  });
+  source.addEventListener("error", function () {
+    disconnected = disconnected || !closing;
+  });
+})();
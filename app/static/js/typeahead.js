@@ -0,0 +1,36 @@
+// Búsqueda por prefijo para los <select data-typeahead-url="...">.
+// El servidor solo incluye la opción seleccionada cuando hay demasiados usuarios;
+// este script agrega un campo de búsqueda y llena el <select> con los resultados.
+document.querySelectorAll("select[data-typeahead-url]").forEach(function (select) {
+  var input = document.createElement("input");
+  input.type = "search";
+  input.className = "form-control form-control-sm mb-1";
+  input.placeholder = "Buscar por nombre...";
+  select.parentNode.insertBefore(input, select);
+
+  var timer = null;
+  input.addEventListener("input", function () {
+    clearTimeout(timer);
+    timer = setTimeout(function () {
+      var url = new URL(select.dataset.typeaheadUrl, window.location.origin);
+      url.searchParams.set("q", input.value);
+      fetch(url, { credentials: "same-origin" })
+        .then(function (response) { return response.json(); })
+        .then(function (data) {
+          var selected = select.value;
+          // Opciones fijas (data-typeahead-keep, ids separados por comas) que no vienen de la búsqueda
+          var keep = (select.dataset.typeaheadKeep || "").split(",");
+          Array.prototype.slice.call(select.options).forEach(function (option) {
+            if (keep.indexOf(option.value) === -1) {
+              select.removeChild(option);
+            }
+          });
+          (data.usuarios || []).forEach(function (usuario) {
+            var option = new Option(usuario.username, usuario.id);
+            option.selected = String(usuario.id) === selected;
+            select.add(option);
+          });
+        });
+    }, 250);
+  });
+});
@@ -0,0 +1,100 @@
+import logging
+from collections import Counter
+from sqlalchemy import delete, func, insert, select
+from app.models import db, Ticket, TicketStat
+from app import ticket_events
+from app.upsert import upsert
+
+logger = logging.getLogger(__name__)
+
+ABIERTOS = ('Abierto', 'En proceso')
+
+
+def _counts(values):
+    # Contadores a los que aporta un ticket con estos valores
+    keys = [('estado', values['estado']), ('prioridad', values['prioridad'])]
+    if values['estado'] in ABIERTOS:
+        keys.append(('tecnico_abiertos', str(values['tecnico_id'])))
+    return keys
+
+
+def deltas(changes):
+    """
+    Cambio neto en cada contador (dimension, clave) producido por `changes`.
+    """
+    result = Counter()
+    for change in changes:
+        if change.op in ('update', 'delete'):
+            # Para un update, los valores anteriores son los actuales con `old` encima
+            before = dict(change.values, **change.old) if change.op == 'update' else change.values
+            for key in _counts(before):
+                result[key] -= 1
+        if change.op in ('create', 'update'):
+            for key in _counts(change.values):
+                result[key] += 1
+    return {key: delta for key, delta in result.items() if delta}
+
+
+def _upsert(connection, dimension, clave, delta):
+    table = TicketStat.__table__
+    upsert(connection, table, {'dimension': dimension, 'clave': clave, 'total': delta},
+           {'total': table.c.total + delta})
+
+
+@ticket_events.on_flush
+def update_counters(connection, changes):
+    """
+    Actualiza los contadores en la misma transacción que los cambios de tickets.
+    """
+    for (dimension, clave), delta in sorted(deltas(changes).items()):
+        _upsert(connection, dimension, clave, delta)
+
+
+def replace_counters(connection):
+    """
+    Reemplaza todos los contadores por los calculados desde la tabla ticket con GROUP BY.
+
+    Antes bloquea las filas de contadores (SELECT ... FOR UPDATE): una transacción de
+    tickets que todavía no sumó su delta espera a que termine la reconstrucción y lo suma
+    sobre los totales nuevos, en vez de perderse al reemplazarlos; una que ya lo sumó
+    terminó antes y entra en el GROUP BY. Debe ser lo primero de la transacción, para que
+    las lecturas de ticket vean lo confirmado después de tomar el bloqueo.
+    """
+    connection.execute(select(TicketStat.dimension).with_for_update()).all()
+    rows = []
+    for column in (Ticket.estado, Ticket.prioridad):
+        for clave, total in connection.execute(select(column, func.count()).group_by(column)):
+            rows.append({'dimension': column.key, 'clave': clave, 'total': total})
+    abiertos = (select(Ticket.tecnico_id, func.count())
+                .where(Ticket.estado.in_(ABIERTOS))
+                .group_by(Ticket.tecnico_id))
+    for tecnico_id, total in connection.execute(abiertos):
+        rows.append({'dimension': 'tecnico_abiertos', 'clave': str(tecnico_id), 'total': total})
+
+    connection.execute(delete(TicketStat.__table__))
+    if rows:
+        connection.execute(insert(TicketStat.__table__), rows)
+    return len(rows)
+
+
+def rebuild():
+    """
+    Reconciliación: reconstruye los contadores desde cero y confirma.
+    Corrige cualquier desviación (cambios hechos por fuera de la aplicación, etc.).
+    """
+    count = replace_counters(db.session.connection())
+    db.session.commit()
+    logger.info('Contadores de tickets reconstruidos (%s filas)', count)
+    return count
+
+
+def summary():
+    """
+    Resumen {dimension: {clave: total}} leído de la tabla de contadores
+    (su tamaño depende de estados, prioridades y técnicos, no del número de tickets).
+    """
+    result = {'estado': {}, 'prioridad': {}, 'tecnico_abiertos': {}}
+    for stat in db.session.execute(select(TicketStat.dimension, TicketStat.clave, TicketStat.total)):
+        if stat.total:
+            result.setdefault(stat.dimension, {})[stat.clave] = stat.total
+    return result
@@ -1,5 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, abort, request, jsonify, current_app
+from sqlalchemy import select
 from app.models import db, Ticket
+from app.serializers import stream_tickets, ticket_columns, ticket_to_dict
+from app.conditional import conditional_get
+from app.db_routing import read_replica
+from app import archive, audit, changelog
+from app.assignment import AUTO, least_loaded_tecnico
+from app.bulk import bulk_create_tickets, bulk_update_tickets, bulk_delete_tickets
 from datetime import datetime, timezone
 
 # Blueprint solo con endpoints de prueba para tickets
@@ -13,68 +20,106 @@ def index():
     """
     return '<h1>Corriendo en Modo de Prueba.</h1>'
 
+def _changes_cursor():
+    # Cursor para continuar con GET /tickets/changes, también en las respuestas 304. Se
+    # lee antes que los tickets y con el corte de CHANGES_SETTLE_SECONDS: un cambio
+    # concurrente puede volver a entregarse, pero no se pierde
+    return {'X-Changes-Cursor': str(changelog.current_cursor())}
+
+
 @main.route('/tickets', methods=['GET'])
+@read_replica
+@conditional_get(headers=_changes_cursor)
 def listar_tickets():
     """
-    Retorna una lista de tickets (JSON).
-    """
-    tickets = Ticket.query.all()
-
-    data = [
-        {
-            'id': ticket.id,
-            'asunto': ticket.asunto,  
-            'descripcion': ticket.descripcion,
-            'prioridad': ticket.prioridad,
-            'estado': ticket.estado,  
-            'usuario_id': ticket.usuario_id,
-            'tecnico_id': ticket.tecnico_id,
-            'fecha_creacion': ticket.fecha_creacion  
-        }
-        for ticket in tickets
-    ]
-    return jsonify(data), 200
+    Retorna una lista de tickets (JSON en streaming; NDJSON, columnar o MessagePack con
+    ?formato= o con Accept). Con ?archivados=1 incluye los tickets archivados.
+    """
+    # Streaming por lotes: la memoria no crece con el número de tickets
+    if request.args.get('archivados') == '1':
+        query = archive.with_archived()
+    else:
+        query = select(*ticket_columns()).order_by(Ticket.id)
+    return stream_tickets(query)
+
+
+@main.route('/tickets/changes', methods=['GET'])
+@read_replica
+def cambios_tickets():
+    """
+    Sincronización por deltas: tickets creados o modificados (upserts) e ids eliminados
+    después de ?since=<cursor>. Sin `since` solo retorna el cursor actual.
+    Si el cursor es anterior a la compactación de la bitácora responde 410 y el cliente
+    debe volver a descargar GET /tickets.
+    """
+    since = request.args.get('since', type=int)
+    if since is None:
+        return jsonify({'cursor': changelog.current_cursor(), 'has_more': False, 'upserts': [], 'deleted': [], 'archived': []}), 200
+
+    limit = request.args.get('limit', current_app.config['CHANGES_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, current_app.config['CHANGES_MAX_PAGE_SIZE']))
+    try:
+        return jsonify(changelog.changes_since(since, limit)), 200
+    except changelog.CursorExpired as e:
+        return jsonify({'error': str(e), 'watermark': e.watermark}), 410
 
 
 @main.route('/tickets/<int:id>', methods=['GET'])
+@read_replica
 def listar_un_ticket(id):
     """
-    Retorna un solo ticket por su ID (JSON).
+    Retorna un solo ticket por su ID (JSON), activo o archivado.
     """
-    ticket = Ticket.query.get_or_404(id)
+    ticket = archive.get_ticket(id)
+    if ticket is None:
+        abort(404)
 
-    data ={
-        'id': ticket.id,
-        'asunto': ticket.asunto,  
-        'descripcion': ticket.descripcion,
-        'prioridad': ticket.prioridad,
-        'estado': ticket.estado, 
-        'usuario_id': ticket.usuario_id,
-        'tecnico_id': ticket.tecnico_id,
-        'fecha_creacion': ticket.fecha_creacion  
-    }
+    data = ticket_to_dict(ticket)
 
     return jsonify(data), 200
 
 
+@main.route('/tickets/<int:id>/historial', methods=['GET'])
+@read_replica
+def historial_ticket(id):
+    """
+    Historial de cambios del ticket por campo, del más reciente al más antiguo (JSON).
+    Se pagina con ?antes=<siguiente> y ?limite=.
+    """
+    limite = request.args.get('limite', current_app.config['AUDIT_PAGE_SIZE'], type=int)
+    limite = max(1, min(limite, current_app.config['AUDIT_MAX_PAGE_SIZE']))
+    entradas, siguiente = audit.history_page(id, request.args.get('antes', type=int), limite)
+    return jsonify({'ticket_id': id, 'historial': entradas, 'siguiente': siguiente}), 200
+
+
 @main.route('/tickets', methods=['POST'])
 def crear_ticket():
     """
     Crea un ticket sin validación.
-    Espera JSON con 'titulo', 'descripcion' y 'tecnico_id'.
+    Espera JSON con 'titulo', 'descripcion' y 'tecnico_id'; sin 'tecnico_id' (o con 0 o
+    "auto") se asigna el técnico con menos carga.
     """
     data = request.get_json()
 
     if not data:
         return jsonify({'error': 'No input data provided'}), 400
 
+    tecnico_id = data.get('tecnico_id')
+    # False == 0 == AUTO: un booleano no es un id ni pide asignación automática
+    if isinstance(tecnico_id, bool):
+        return jsonify({'error': 'tecnico_id debe ser un entero'}), 400
+    if tecnico_id in (None, AUTO, 'auto'):
+        tecnico_id = least_loaded_tecnico()
+        if tecnico_id is None:
+            return jsonify({'error': 'No hay técnicos para asignar el ticket'}), 400
+
     ticket = Ticket(
         asunto=data.get('asunto'),  
         descripcion=data.get('descripcion'),
         prioridad=data.get('prioridad'), 
         estado=data.get('estado'),  
         usuario_id=data.get('usuario_id'),  
-        tecnico_id=data.get('tecnico_id'),  
+        tecnico_id=tecnico_id,
        fecha_creacion=datetime.now(timezone.utc)
     )
     
@@ -113,3 +158,59 @@ def eliminar_ticket(id):
     db.session.commit()
 
     return jsonify({'message': 'Ticket eliminado', 'id': ticket.id}), 200
+
+
+def _bulk_items(key):
+    """
+    Lee el cuerpo de una petición en lote: un arreglo JSON o un objeto {key: [...]}.
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get(key)
+    return data if isinstance(data, list) else None
+
+
+def _chunk_size():
+    size = request.args.get('chunk', current_app.config['BULK_CHUNK_SIZE'], type=int)
+    return max(1, min(size, current_app.config['BULK_MAX_CHUNK_SIZE']))
+
+
+def _bulk_response(results, ok_status):
+    errors = sum(1 for r in results if r['status'] != ok_status)
+    body = {'ok': len(results) - errors, 'errors': errors, 'results': results}
+    # 207 Multi-Status cuando algunos elementos fallaron
+    return jsonify(body), (200 if not errors else 207)
+
+
+@main.route('/tickets/bulk', methods=['POST'])
+def crear_tickets_bulk():
+    """
+    Crea muchos tickets en una sola petición.
+    Espera un arreglo JSON de tickets (o {"tickets": [...]}); retorna un resultado por elemento.
+    """
+    items = _bulk_items('tickets')
+    if items is None:
+        return jsonify({'error': 'Se esperaba un arreglo de tickets'}), 400
+    return _bulk_response(bulk_create_tickets(items, _chunk_size()), 'created')
+
+
+@main.route('/tickets/bulk', methods=['PATCH'])
+def actualizar_tickets_bulk():
+    """
+    Actualiza muchos tickets. Espera un arreglo de parches {"id": ..., campos a cambiar}.
+    """
+    items = _bulk_items('tickets')
+    if items is None:
+        return jsonify({'error': 'Se esperaba un arreglo de parches'}), 400
+    return _bulk_response(bulk_update_tickets(items, _chunk_size()), 'updated')
+
+
+@main.route('/tickets/bulk', methods=['DELETE'])
+def eliminar_tickets_bulk():
+    """
+    Elimina muchos tickets. Espera un arreglo de ids (o {"ids": [...]}).
+    """
+    ids = _bulk_items('ids')
+    if ids is None:
+        return jsonify({'error': 'Se esperaba un arreglo de ids'}), 400
+    return _bulk_response(bulk_delete_tickets(ids, _chunk_size()), 'deleted')
@@ -0,0 +1,217 @@
+import csv
+import io
+import itertools
+import logging
+from datetime import datetime, timezone
+from flask import Response, current_app, stream_with_context
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import aliased
+from app.models import db, Ticket, TicketArchive, User, utcnow
+from app.bulk import insert_tickets
+from app.choices import assignee_choices
+from app.forms import TicketsForm
+from app.serializers import iter_ticket_rows
+from app.ticket_queries import scoped_tickets
+
+logger = logging.getLogger(__name__)
+
+# Columnas del CSV exportado; la importación acepta el mismo formato (id se ignora)
+EXPORT_COLUMNS = ('id', 'asunto', 'descripcion', 'prioridad', 'estado', 'fecha_creacion', 'tecnico', 'usuario')
+REQUIRED_COLUMNS = ('asunto', 'descripcion', 'prioridad', 'estado', 'tecnico', 'usuario')
+
+# Mismas opciones que el formulario de tickets
+PRIORIDADES = {value for value, _ in TicketsForm.prioridad.kwargs['choices']}
+ESTADOS = {value for value, _ in TicketsForm.estado.kwargs['choices']}
+ASUNTO_MAX_LENGTH = Ticket.__table__.c.asunto.type.length
+
+# Excel interpreta como fórmula una celda que empieza con estos caracteres
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    value = str(value)
+    # Se antepone un apóstrofo para que Excel lo muestre como texto (la importación lo quita)
+    return "'" + value if value.startswith(_FORMULA_PREFIXES) else value
+
+
+def export_query(user, filtros, model=Ticket):
+    """
+    Tickets visibles para `user` con los filtros del dashboard, con el nombre del técnico
+    y del usuario, en el mismo orden que el dashboard.
+    """
+    tecnico, usuario = aliased(User), aliased(User)
+    query = (select(model.id, model.asunto, model.descripcion, model.prioridad, model.estado,
+                    model.fecha_creacion, tecnico.username.label('tecnico'), usuario.username.label('usuario'))
+             .outerjoin(tecnico, tecnico.id == model.tecnico_id)
+             .outerjoin(usuario, usuario.id == model.usuario_id))
+    query = filtros.apply(scoped_tickets(user, query, model), model)
+    if filtros.descending:
+        return query.order_by(model.fecha_creacion.desc(), model.id.desc())
+    return query.order_by(model.fecha_creacion.asc(), model.id.asc())
+
+
+def iter_csv(queries):
+    """
+    Genera el CSV de las consultas, un fragmento por lote del cursor del servidor.
+    Empieza con BOM para que Excel lo abra como UTF-8.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield '\ufeff' + buffer.getvalue()
+    for query in queries:
+        for rows in iter_ticket_rows(query):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([_cell(value) for value in row] for row in rows)
+            yield buffer.getvalue()
+
+
+def export_response(user, filtros, filename='tickets.csv'):
+    """
+    Respuesta CSV en streaming; con filtros.archivados incluye después los archivados.
+    """
+    queries = [export_query(user, filtros)]
+    if filtros.archivados:
+        queries.append(export_query(user, filtros, TicketArchive))
+    return Response(stream_with_context(iter_csv(queries)), content_type='text/csv; charset=utf-8',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
+class ImportReport:
+    """
+    Resultado de una importación: tickets creados y errores por línea del archivo
+    (se guardan los primeros `max_errors`; error_count los cuenta todos).
+    """
+
+    def __init__(self, max_errors):
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'linea': line, 'error': message})
+
+    def to_dict(self):
+        return {'creados': self.created, 'errores': self.error_count, 'detalle': self.errors}
+
+
+class _Lookup:
+    """
+    Nombre de usuario -> id de los usuarios de un rol, cargado una vez por importación.
+    """
+
+    def __init__(self, role_name):
+        self.names = {username: id for id, username in assignee_choices.choices(role_name)}
+        self.ids = set(self.names.values())
+
+    def resolve(self, value):
+        if value in self.names:
+            return self.names[value]
+        # También se acepta el id numérico
+        if value.isdigit() and int(value) in self.ids:
+            return int(value)
+        return None
+
+
+def _text(row, key):
+    value = (row.get(key) or '').strip()
+    if value.startswith("'") and value[1:].startswith(_FORMULA_PREFIXES):
+        value = value[1:]
+    return value
+
+
+def clean_row(row, usuarios, tecnicos, now):
+    """
+    Valida una fila del CSV con las reglas de TicketsForm. `usuarios` y `tecnicos` resuelven
+    los nombres; `now` (UTC sin zona) es la fecha de creación si la fila no la trae.
+    Retorna (valores, None) o (None, mensaje de error).
+    """
+    values = {key: _text(row, key) for key in ('asunto', 'descripcion', 'prioridad', 'estado')}
+    for key in ('asunto', 'descripcion'):
+        if not values[key]:
+            return None, f'{key} es obligatorio'
+    if len(values['asunto']) > ASUNTO_MAX_LENGTH:
+        return None, f'asunto supera {ASUNTO_MAX_LENGTH} caracteres'
+    if values['prioridad'] not in PRIORIDADES:
+        return None, f"prioridad inválida: {values['prioridad']!r}"
+    if values['estado'] not in ESTADOS:
+        return None, f"estado inválido: {values['estado']!r}"
+
+    for key, lookup in (('usuario', usuarios), ('tecnico', tecnicos)):
+        id = lookup.resolve(_text(row, key))
+        if id is None:
+            return None, f'{key} {_text(row, key)!r} no existe o no tiene ese rol'
+        values[f'{key}_id'] = id
+
+    fecha = _text(row, 'fecha_creacion')
+    try:
+        fecha = datetime.fromisoformat(fecha) if fecha else now
+    except ValueError:
+        return None, 'fecha_creacion debe tener el formato AAAA-MM-DD HH:MM:SS'
+    # Como las columnas DateTime: UTC sin zona horaria (una fecha sin zona ya se toma como UTC)
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+    values['fecha_creacion'] = fecha
+    return values, None
+
+
+def _reader(stream):
+    # Excel en español separa con ';': se detecta el separador en la cabecera
+    header = stream.readline()
+    delimiter = ';' if header.count(';') > header.count(',') else ','
+    return csv.DictReader(itertools.chain([header], stream), delimiter=delimiter)
+
+
+def import_tickets(stream, chunk_size=None, max_errors=1000):
+    """
+    Importa tickets desde un CSV de texto (`stream`), leído fila por fila. Las filas
+    válidas se insertan por lotes de `chunk_size`, una transacción por lote: la memoria
+    no depende del tamaño del archivo. Retorna un ImportReport.
+    """
+    chunk_size = chunk_size or current_app.config['BULK_CHUNK_SIZE']
+    report = ImportReport(max_errors)
+    reader = _reader(stream)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        report.error(1, f"Faltan columnas: {', '.join(missing)}")
+        return report
+
+    usuarios, tecnicos = _Lookup('Usuario'), _Lookup('Técnico')
+    now = utcnow()
+    chunk = []
+
+    def flush():
+        try:
+            insert_tickets([values for _, values in chunk])
+            db.session.commit()
+            report.created += len(chunk)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            message = f'Lote revertido: {e.__class__.__name__}: {getattr(e, "orig", None) or e}'
+            for line, _ in chunk:
+                report.error(line, message)
+        chunk.clear()
+
+    for row in reader:
+        # La línea de la fila en el archivo (la cabecera es la 1)
+        line = reader.line_num
+        values, error = clean_row(row, usuarios, tecnicos, now)
+        if error:
+            report.error(line, error)
+            continue
+        chunk.append((line, values))
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    logger.info('Importación de tickets: %s creados, %s errores', report.created, report.error_count)
+    return report
@@ -0,0 +1,134 @@
+import logging
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.models import Ticket
+
+logger = logging.getLogger(__name__)
+
+# Columnas de Ticket incluidas en cada cambio
+TICKET_COLUMNS = tuple(c.key for c in Ticket.__table__.columns)
+
+
+class TicketChange:
+    """
+    Un cambio sobre un ticket: op es 'create', 'update' o 'delete'.
+    `values` tiene los valores de columna después del cambio (los últimos, si se eliminó)
+    y `old` los valores anteriores de los campos modificados (solo en 'update').
+    `reason` distingue casos especiales, p. ej. 'archive' para un 'delete' del archivado.
+    """
+
+    __slots__ = ('op', 'id', 'values', 'old', 'reason')
+
+    def __init__(self, op, id, values, old=None, reason=None):
+        self.op = op
+        self.id = id
+        self.values = values
+        self.old = old or {}
+        self.reason = reason
+
+    def __repr__(self):
+        return f'<TicketChange {self.op} {self.id}>'
+
+
+# Manejadores registrados:
+#  - en transacción: handler(connection, changes), dentro del flush, antes del commit
+#  - después del commit: handler(changes), fuera de la transacción
+_flush_handlers = []
+_commit_handlers = []
+
+
+def on_flush(handler):
+    """
+    Registra un manejador que escribe en la misma transacción que el cambio
+    (contadores, bitácoras). Si falla, el commit también falla.
+    """
+    _flush_handlers.append(handler)
+    return handler
+
+
+def on_commit(handler):
+    """
+    Registra un manejador que se ejecuta después de confirmar la transacción
+    (índices y cachés en memoria, notificaciones). Sus errores solo se registran.
+    """
+    _commit_handlers.append(handler)
+    return handler
+
+
+def snapshot(ticket):
+    return {key: getattr(ticket, key) for key in TICKET_COLUMNS}
+
+
+def record(session, changes):
+    """
+    Registra cambios hechos sin pasar por la unidad de trabajo del ORM
+    (p. ej. INSERT/UPDATE/DELETE en lote). Debe llamarse antes del commit.
+    """
+    if not changes:
+        return
+    connection = session.connection()
+    for handler in _flush_handlers:
+        handler(connection, changes)
+    session.info.setdefault('ticket_changes', []).extend(changes)
+
+
+def _load_old_value(target, value, oldvalue, initiator):
+    pass
+
+
+# Con active_history, asignar una columna no cargada (p. ej. expirada después de un commit)
+# carga antes su valor anterior: así `old` de cada 'update' está completo y los contadores
+# (app/stats.py) restan del valor que el ticket tenía realmente
+for _key in TICKET_COLUMNS:
+    event.listen(getattr(Ticket, _key), 'set', _load_old_value, active_history=True)
+
+
+@event.listens_for(Session, 'before_flush')
+def _bump_versions(session, flush_context, instances):
+    # updated_at se actualiza solo (onupdate); la versión se incrementa aquí
+    for obj in session.dirty:
+        if isinstance(obj, Ticket) and session.is_modified(obj, include_collections=False):
+            obj.version = (obj.version or 0) + 1
+
+
+@event.listens_for(Session, 'after_flush')
+def _after_flush(session, flush_context):
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            changes.append(TicketChange('create', obj.id, snapshot(obj)))
+    for obj in session.dirty:
+        if isinstance(obj, Ticket):
+            state = inspect(obj)
+            changed, old = False, {}
+            for key in TICKET_COLUMNS:
+                history = state.attrs[key].history
+                if history.has_changes():
+                    changed = True
+                    # Las columnas se cargan antes de asignarlas (active_history); sin valor
+                    # anterior solo queda una columna que no tenía ninguno (un ticket recién creado)
+                    if history.deleted:
+                        old[key] = history.deleted[0]
+            if changed:
+                changes.append(TicketChange('update', obj.id, snapshot(obj), old))
+    for obj in session.deleted:
+        if isinstance(obj, Ticket):
+            changes.append(TicketChange('delete', obj.id, snapshot(obj)))
+    record(session, changes)
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    changes = session.info.pop('ticket_changes', None)
+    if not changes:
+        return
+    for handler in _commit_handlers:
+        try:
+            handler(changes)
+        except Exception:
+            logger.exception('Error en el manejador de cambios de tickets %s', handler.__name__)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('ticket_changes', None)
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from sqlalchemy.orm import joinedload
+from app.models import Ticket, User
+
+ESTADOS = ('Abierto', 'En proceso', 'Cerrado')
+PRIORIDADES = ('Baja', 'Media', 'Alta')
+
+
+def scoped_tickets(user, query=None, model=Ticket):
+    """
+    Restringe la consulta a los tickets que el usuario puede ver según su rol:
+    Admin ve todos, Técnico los asignados a él y Usuario los suyos.
+    `model` es Ticket o TicketArchive.
+    """
+    query = model.query if query is None else query
+    if user.role_name == 'Admin':
+        return query
+    if user.role_name == 'Técnico':
+        return query.filter(model.tecnico_id == user.id)
+    return query.filter(model.usuario_id == user.id)
+
+
+def ticket_row_options(model=Ticket):
+    """
+    Las tablas de tickets muestran el nombre del técnico y del usuario de cada fila:
+    se cargan en la misma consulta para evitar 2 SELECT adicionales por ticket.
+    """
+    return (
+        joinedload(model.tecnico).load_only(User.id, User.username),
+        joinedload(model.usuario).load_only(User.id, User.username),
+    )
+
+
+def dashboard_query(user, filtros, model=Ticket):
+    """
+    Consulta de tickets del dashboard: alcance por rol, filtros y carga anticipada
+    de los nombres del técnico y del usuario de cada fila.
+    """
+    return filtros.apply(scoped_tickets(user, model=model), model).options(*ticket_row_options(model))
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return None
+
+
+class TicketFilters:
+    """
+    Filtros del dashboard leídos de la query string. Los valores inválidos se ignoran.
+    """
+
+    def __init__(self, args):
+        self.estado = args.get('estado') if args.get('estado') in ESTADOS else None
+        self.prioridad = args.get('prioridad') if args.get('prioridad') in PRIORIDADES else None
+        self.tecnico_id = args.get('tecnico_id', type=int)
+        self.desde = _parse_date(args.get('desde'))
+        self.hasta = _parse_date(args.get('hasta'))
+        self.orden = 'asc' if args.get('orden') == 'asc' else 'desc'
+        # Incluir los tickets archivados (tabla ticket_archive); por defecto solo los activos
+        self.archivados = args.get('archivados') == '1'
+
+    @property
+    def descending(self):
+        return self.orden == 'desc'
+
+    def apply(self, query, model=Ticket):
+        if self.estado:
+            query = query.filter(model.estado == self.estado)
+        if self.prioridad:
+            query = query.filter(model.prioridad == self.prioridad)
+        if self.tecnico_id:
+            query = query.filter(model.tecnico_id == self.tecnico_id)
+        if self.desde:
+            query = query.filter(model.fecha_creacion >= self.desde)
+        if self.hasta:
+            # "hasta" es inclusivo: todo el día indicado
+            query = query.filter(model.fecha_creacion < self.hasta + timedelta(days=1))
+        return query
+
+    def to_args(self):
+        """
+        Filtros activos como argumentos para url_for (para conservarlos al paginar).
+        """
+        args = {
+            'estado': self.estado,
+            'prioridad': self.prioridad,
+            'tecnico_id': self.tecnico_id,
+            'desde': self.desde.strftime('%Y-%m-%d') if self.desde else None,
+            'hasta': self.hasta.strftime('%Y-%m-%d') if self.hasta else None,
+            'orden': self.orden if self.orden != 'desc' else None,
+            'archivados': '1' if self.archivados else None,
+        }
+        return {k: v for k, v in args.items() if v}
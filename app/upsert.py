@@ -0,0 +1,23 @@
+from sqlalchemy import insert
+from sqlalchemy.dialects import mysql, sqlite
+
+
+def upsert(connection, table, values, update):
+    """
+    INSERT de `values` o, si ya existe una fila con la misma clave primaria, UPDATE con
+    `update` ({columna: expresión}). Usa ON CONFLICT (SQLite) u ON DUPLICATE KEY (MySQL),
+    una sola sentencia sin carreras al crear la fila; en otros motores, UPDATE y luego INSERT.
+    """
+    keys = [column.name for column in table.primary_key.columns]
+    if connection.dialect.name == 'sqlite':
+        stmt = sqlite.insert(table).values(**values).on_conflict_do_update(index_elements=keys, set_=update)
+    elif connection.dialect.name in ('mysql', 'mariadb'):
+        stmt = mysql.insert(table).values(**values).on_duplicate_key_update(**update)
+    else:
+        updated = connection.execute(table.update()
+                                     .where(*(table.c[key] == values[key] for key in keys))
+                                     .values(**update))
+        if updated.rowcount:
+            return
+        stmt = insert(table).values(**values)
+    connection.execute(stmt)
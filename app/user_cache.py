@@ -0,0 +1,92 @@
+import threading
+from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached
+from app import db
+from app.cache import LRUCache
+from app.models import Role, User
+from app.signals import usuario_cambiado
+
+# Columnas de User que se guardan en caché (todas las del modelo)
+_USER_COLUMNS = [c.key for c in User.__table__.columns]
+
+
+class RoleTable:
+    """
+    Tabla de roles (id <-> nombre) cargada una vez por proceso.
+    Los roles son fijos (ver database_schema), así que no caduca; reload() la refresca.
+    """
+
+    def __init__(self):
+        self._names = None
+        self._ids = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._names is None:
+                rows = db.session.execute(select(Role.id, Role.name)).all()
+                self._names = {id: name for id, name in rows}
+                self._ids = {name: id for id, name in rows}
+        return self._names
+
+    def name(self, role_id):
+        names = self._names if self._names is not None else self._load()
+        return names.get(role_id)
+
+    def id(self, name):
+        if self._ids is None:
+            self._load()
+        return self._ids.get(name)
+
+    def reload(self):
+        with self._lock:
+            self._names = self._ids = None
+        self._load()
+
+
+roles = RoleTable()
+
+# Se configura con USER_CACHE_SIZE / USER_CACHE_TTL en init_app
+_users = LRUCache()
+
+
+def init_app(app):
+    _users.maxsize = app.config['USER_CACHE_SIZE']
+    _users.ttl = app.config['USER_CACHE_TTL']
+    _users.clear()
+
+
+def _snapshot(user):
+    # Copia desacoplada de la sesión, con los valores de columna ya "cargados"
+    copy = User(**{key: getattr(user, key) for key in _USER_COLUMNS})
+    make_transient_to_detached(copy)
+    return copy
+
+
+def load_user(user_id):
+    """
+    Retorna el usuario con id `user_id` unido a la sesión actual.
+
+    Si está en caché se usa session.merge(load=False), que no ejecuta ningún SELECT;
+    el objeto resultante se puede modificar y guardar normalmente.
+    """
+    cached = _users.get(user_id)
+    if cached is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        _users.set(user_id, _snapshot(user))
+        return user
+    return db.session.merge(cached, load=False)
+
+
+def invalidate_user(user_id):
+    """
+    Descarta el usuario de la caché. Debe llamarse cuando se modifica o elimina.
+    """
+    _users.delete(user_id)
+
+
+@usuario_cambiado.connect
+def _on_usuario_cambiado(sender, user_id, **kwargs):
+    invalidate_user(user_id)
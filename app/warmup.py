@@ -0,0 +1,112 @@
+import logging
+import os
+import time
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import text
+from app import db
+from app.metrics import REGISTRY, Gauge
+
+logger = logging.getLogger(__name__)
+
+WARMUP_SECONDS = REGISTRY.register(Gauge(
+    'warmup_seconds', 'Duración del último calentamiento del proceso antes de recibir tráfico.'))
+
+# Funciones de calentamiento en orden: (nombre, función sin argumentos, con contexto de aplicación)
+_warmers = []
+
+
+def on_warm_up(name):
+    """
+    Registra una función para warm_up; se ejecuta con contexto de aplicación.
+    """
+    def decorator(func):
+        _warmers.append((name, func))
+        return func
+    return decorator
+
+
+def precompile_templates(app):
+    """
+    Compila todas las plantillas .html y las deja en la caché del entorno de Jinja (y en
+    la caché de bytecode si está activa). Retorna cuántas compiló.
+    """
+    names = app.jinja_env.list_templates(filter_func=lambda name: name.endswith('.html'))
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+@on_warm_up('db_pool')
+def _prime_db_pool():
+    # Abre a la vez hasta WARMUP_DB_CONNECTIONS conexiones de cada engine (primario y
+    # réplicas); al devolverlas quedan en el pool
+    wanted = current_app.config['WARMUP_DB_CONNECTIONS']
+    for engine in db.engines.values():
+        size = getattr(engine.pool, 'size', lambda: 1)()
+        connections = []
+        try:
+            for _ in range(max(1, min(wanted, size))):
+                connection = engine.connect()
+                connections.append(connection)
+                connection.execute(text('SELECT 1'))
+        finally:
+            for connection in connections:
+                connection.close()
+
+
+@on_warm_up('roles')
+def _prime_roles():
+    from app.choices import assignee_choices
+    from app.user_cache import roles
+
+    roles.reload()
+    # Listas de técnicos y usuarios de los formularios y huella de nombres del dashboard
+    for role_name in ('Técnico', 'Usuario'):
+        assignee_choices.digest(role_name)
+
+
+@on_warm_up('templates')
+def _prime_templates():
+    precompile_templates(current_app)
+
+
+def warm_up(app):
+    """
+    Prepara el proceso antes de recibir tráfico: conexiones del pool, tabla de roles,
+    plantillas compiladas y lo registrado con on_warm_up. Un paso que falla se registra
+    y no detiene los demás. Retorna los milisegundos de cada paso.
+    """
+    timings = {}
+    started = time.perf_counter()
+    with app.app_context():
+        for name, func in _warmers:
+            step = time.perf_counter()
+            try:
+                func()
+            except Exception:
+                logger.exception('Error en el calentamiento (%s)', name)
+            finally:
+                db.session.remove()
+            timings[name] = round((time.perf_counter() - step) * 1000, 1)
+    WARMUP_SECONDS.set(time.perf_counter() - started)
+    logger.info('Proceso calentado en %.0f ms: %s', (time.perf_counter() - started) * 1000,
+                ', '.join(f'{name} {ms} ms' for name, ms in timings.items()))
+    return timings
+
+
+def init_app(app):
+    """
+    Caché de bytecode de Jinja en disco: un proceso nuevo carga las plantillas ya
+    compiladas por otro (o por `flask templates compile`) en lugar de compilarlas.
+    """
+    if not app.config['TEMPLATE_BYTECODE_CACHE']:
+        return
+    directory = app.config['TEMPLATE_CACHE_DIR']
+    try:
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Sin directorio, Jinja usa uno propio del usuario en el directorio temporal
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory or None)
+    except (OSError, RuntimeError) as e:
+        logger.warning('Caché de plantillas desactivada: %s', e)
@@ -0,0 +1,13 @@
+# Punto de entrada ASGI de producción: con TEST_ROUTES, los GET de la API JSON de tickets
+# se atienden con vistas asíncronas (app/asgi_api.py); el resto (y todo el modo HTML, con
+# su inicio de sesión) pasa a la aplicación Flask.
+#
+#   pip install "flask[async]" "sqlalchemy[asyncio]" aiosqlite uvicorn   # aiomysql o asyncmy para MySQL
+#   uvicorn asgi:app --host 0.0.0.0 --port 8000 --workers 4
+#
+# El calentamiento (app/warmup.py) se hace en el evento lifespan de arranque de cada worker.
+from app import create_app
+from app.asgi_api import create_asgi_app
+
+flask_app = create_app()
+app = create_asgi_app(flask_app)
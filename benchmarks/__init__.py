@@ -0,0 +1,4 @@
+"""
+Herramientas de medición de rendimiento: generador de datos (seed.py) y
+escenarios con latencias p50/p95/p99 (run.py). Su uso se describe en el README del proyecto.
+"""
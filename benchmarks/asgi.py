@@ -0,0 +1,132 @@
+"""
+Throughput de la API JSON de tickets con clientes concurrentes: servidor WSGI síncrono
+(un hilo por conexión) contra el modo ASGI con vistas asíncronas (asgi.py).
+
+    python -m benchmarks.asgi --database-url sqlite:////ruta/bench.db --concurrency 1,16,64
+    python -m benchmarks.asgi --sync-url http://127.0.0.1:8000 --async-url http://127.0.0.1:8001
+
+Sin --sync-url/--async-url levanta los dos servidores en puertos libres, con TEST_ROUTES y
+la misma base (llena con benchmarks/seed.py): el síncrono con el servidor con hilos de
+werkzeug y el asíncrono con uvicorn (pip install uvicorn). Para comparar con gunicorn u
+otro servidor, iniciarlos aparte y pasar sus URL.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from benchmarks.run import Dataset, HTTPClient, SCENARIOS, run_scenario
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url + '/', timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f'El servidor {url} no respondió en {timeout} s')
+
+
+def _config(database_url):
+    config = {'TEST_ROUTES': True, 'LOGIN_RATE_LIMIT_ENABLED': False}
+    if database_url:
+        config['SQLALCHEMY_DATABASE_URI'] = database_url
+    return config
+
+
+def serve(mode, port, database_url):
+    """
+    Servidor del benchmark (se ejecuta en un subproceso).
+    """
+    from app import create_app
+
+    app = create_app(_config(database_url))
+    if mode == 'sync':
+        from werkzeug.serving import run_simple
+        run_simple('127.0.0.1', port, app, threaded=True)
+    else:
+        import uvicorn
+        from app.asgi_api import create_asgi_app
+        uvicorn.run(create_asgi_app(app), host='127.0.0.1', port=port, log_level='warning')
+
+
+def _start(mode, database_url):
+    port = _free_port()
+    command = [sys.executable, '-m', 'benchmarks.asgi', '--serve', mode, '--port', str(port)]
+    if database_url:
+        command += ['--database-url', database_url]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    _wait(url)
+    return process, url
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default='api_ticket',
+                        help='Escenarios de la API de benchmarks/run.py (por defecto api_ticket).')
+    parser.add_argument('--concurrency', default='1,8,32', help='Clientes concurrentes, separados por comas.')
+    parser.add_argument('--requests', type=int, default=500, help='Peticiones medidas por escenario y nivel.')
+    parser.add_argument('--database-url', help='Sobreescribe SQLALCHEMY_DATABASE_URI.')
+    parser.add_argument('--sync-url', help='URL de un servidor síncrono ya iniciado (con TEST_ROUTES).')
+    parser.add_argument('--async-url', help='URL de un servidor ASGI ya iniciado (con TEST_ROUTES).')
+    parser.add_argument('--output', help='Archivo JSON donde guardar los resultados.')
+    parser.add_argument('--serve', choices=('sync', 'async'), help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        return serve(args.serve, args.port, args.database_url)
+
+    from app import create_app
+
+    data = Dataset(create_app(_config(args.database_url)))
+    by_name = {s.name: s for s in SCENARIOS if s.target == 'api'}
+    scenarios = [by_name[name] for name in args.scenarios.split(',')]
+    levels = [int(n) for n in args.concurrency.split(',')]
+
+    processes, urls = [], {}
+    try:
+        for mode, url in (('sync', args.sync_url), ('async', args.async_url)):
+            if url is None:
+                process, url = _start(mode, args.database_url)
+                processes.append(process)
+            urls[mode] = url
+
+        results = {'meta': {'concurrency': levels, 'requests': args.requests, 'cpus': os.cpu_count()},
+                   'scenarios': {}}
+        print(f"{'escenario':<16}{'clientes':>10}{'sync rps':>12}{'async rps':>12}{'sync p95':>12}{'async p95':>12}")
+        for scenario in scenarios:
+            for level in levels:
+                row = {}
+                for mode, url in urls.items():
+                    def make_client(target, url=url):
+                        return HTTPClient(url)
+                    make_client.sql = False
+                    row[mode] = run_scenario(scenario, make_client, data, args.requests, level, 2, 42)
+                results['scenarios'].setdefault(scenario.name, {})[level] = row
+                print(f"{scenario.name:<16}{level:>10}{row['sync']['rps']:>12}{row['async']['rps']:>12}"
+                      f"{row['sync']['p95_ms']:>12}{row['async']['p95_ms']:>12}")
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,372 @@
+"""
+Escenarios de carga con latencias p50/p95/p99, peticiones por segundo y
+sentencias SQL por petición.
+
+    python -m benchmarks.run                                  # todos los escenarios por defecto
+    python -m benchmarks.run --scenarios dashboard_admin,login --requests 500 --concurrency 8
+    python -m benchmarks.run --output resultados.json --baseline base.json --max-regression 0.2
+
+Por defecto las peticiones se hacen en proceso con el cliente de pruebas de Flask
+(sin red), contra la base de datos de config.py o --database-url, ya llena con
+benchmarks/seed.py. Con --url (y --api-url para la API JSON de app/test_routes.py)
+se usa HTTP contra un servidor en ejecución; en ese modo no se cuentan sentencias SQL.
+
+Los escenarios de escritura modifican la base: para comparar corridas, volver a
+generar los datos con la misma semilla antes de cada una.
+"""
+import argparse
+import http.cookiejar
+import json
+import platform
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+from benchmarks.seed import BENCH_PASSWORD, PRIORIDADES, ESTADOS, WORDS, user_email
+
+_CSRF = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+# Sentencias SQL ejecutadas por el hilo actual (solo en modo en proceso)
+_sql = threading.local()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    _sql.count = getattr(_sql, 'count', 0) + 1
+
+
+class LocalClient:
+    """
+    Cliente en proceso (flask.testing.FlaskClient) con su propia cookie de sesión.
+    """
+
+    sql = True
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None, json=None):
+        response = self.client.open(path, method=method, data=data, json=json)
+        size = len(response.get_data())
+        response.close()
+        return response.status_code, size
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Las redirecciones (p. ej. después de un POST) se miden como respuesta, sin seguirlas
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HTTPClient:
+    """
+    Cliente HTTP con cookies. Agrega el token CSRF a los formularios si el servidor lo usa.
+    """
+
+    sql = False
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect)
+        self.csrf_token = None
+
+    def fetch_csrf(self, path):
+        request = urllib.request.Request(self.base_url + path)
+        with self.opener.open(request) as response:
+            match = _CSRF.search(response.read().decode('utf-8', 'replace'))
+        self.csrf_token = match.group(1) if match else None
+
+    def request(self, method, path, data=None, json=None):
+        headers = {}
+        body = None
+        if json is not None:
+            body = _json_dumps(json)
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            if self.csrf_token:
+                data = dict(data, csrf_token=self.csrf_token)
+            body = urllib.parse.urlencode(data).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(request) as response:
+                return response.status, len(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, len(e.read())
+
+
+def _json_dumps(value):
+    return json.dumps(value).encode()
+
+
+class Dataset:
+    """
+    Ids y usuarios de la base generada por seed.py que usan los escenarios.
+    """
+
+    def __init__(self, app):
+        from app.models import db, Ticket, User
+
+        with app.app_context():
+            self.min_ticket, self.max_ticket = db.session.execute(
+                select(func.min(Ticket.id), func.max(Ticket.id))).one()
+            emails = dict(db.session.execute(select(User.email, User.id)).all())
+        if self.min_ticket is None:
+            raise SystemExit('La base no tiene tickets: ejecutar antes python -m benchmarks.seed')
+        self.tecnicos = self._ids(emails, 'Técnico')
+        self.usuarios = self._ids(emails, 'Usuario') or self.tecnicos
+
+    @staticmethod
+    def _ids(emails, role):
+        ids, n = [], 0
+        while user_email(role, n) in emails:
+            ids.append(emails[user_email(role, n)])
+            n += 1
+        return ids
+
+    def ticket_id(self, rng):
+        return rng.randint(self.min_ticket, self.max_ticket)
+
+    def ticket_form(self, rng):
+        return {
+            'asunto': ' '.join(rng.choice(WORDS) for _ in range(4)).capitalize(),
+            'descripcion': ' '.join(rng.choice(WORDS) for _ in range(20)),
+            'prioridad': rng.choice(PRIORIDADES),
+            'estado': rng.choice(ESTADOS),
+            'usuario_id': rng.choice(self.usuarios),
+            'tecnico_id': rng.choice(self.tecnicos),
+        }
+
+
+class Scenario:
+    """
+    Un tipo de petición. `step(client, data, rng)` la ejecuta y retorna (status, bytes);
+    `role` es el usuario con el que inicia sesión cada hilo (None: sin sesión).
+    """
+
+    def __init__(self, name, target, role, step, expect=(200,), default=True):
+        self.name = name
+        self.target = target
+        self.role = role
+        self.step = step
+        self.expect = expect
+        self.default = default
+
+
+def _login(client, role, n=0):
+    email = user_email(role, n)
+    if isinstance(client, HTTPClient):
+        client.fetch_csrf('/login')
+    return client.request('POST', '/login', data={'email': email, 'password': BENCH_PASSWORD})
+
+
+SCENARIOS = [
+    Scenario('login', 'html', None,
+             lambda c, d, rng: _login(c, 'Usuario', rng.randrange(len(d.usuarios))), expect=(302,)),
+    Scenario('dashboard_admin', 'html', 'Admin', lambda c, d, rng: c.request('GET', '/dashboard')),
+    Scenario('dashboard_tecnico', 'html', 'Técnico', lambda c, d, rng: c.request('GET', '/dashboard')),
+    Scenario('dashboard_usuario', 'html', 'Usuario', lambda c, d, rng: c.request('GET', '/dashboard')),
+    Scenario('dashboard_filtros', 'html', 'Admin',
+             lambda c, d, rng: c.request('GET', f'/dashboard?estado={urllib.parse.quote(rng.choice(ESTADOS))}'
+                                                f'&prioridad={rng.choice(PRIORIDADES)}')),
+    Scenario('buscar', 'html', 'Admin', lambda c, d, rng: c.request('GET', f'/buscar?q={rng.choice(WORDS)}')),
+    Scenario('ticket_crear', 'html', 'Admin',
+             lambda c, d, rng: c.request('POST', '/tickets', data=d.ticket_form(rng)), expect=(302,)),
+    Scenario('ticket_editar', 'html', 'Admin',
+             lambda c, d, rng: c.request('POST', f'/tickets/{d.ticket_id(rng)}/editar', data=d.ticket_form(rng)),
+             expect=(302,)),
+    Scenario('api_ticket', 'api', None, lambda c, d, rng: c.request('GET', f'/tickets/{d.ticket_id(rng)}')),
+    Scenario('api_bulk_crear', 'api', None,
+             lambda c, d, rng: c.request('POST', '/tickets/bulk', json=[d.ticket_form(rng) for _ in range(100)])),
+    # Recorre la tabla completa: solo si se pide explícitamente
+    Scenario('api_listar', 'api', None,
+             lambda c, d, rng: c.request('GET', '/tickets?formato=ndjson'), default=False),
+]
+
+
+def percentile(values, p):
+    """
+    Percentil por rango más cercano de una lista ya ordenada.
+    """
+    if not values:
+        return 0.0
+    rank = max(1, round(p / 100 * len(values) + 0.5))
+    return values[min(rank, len(values)) - 1]
+
+
+def run_scenario(scenario, make_client, data, requests, concurrency, warmup, seed):
+    """
+    Ejecuta `requests` peticiones repartidas entre `concurrency` hilos, cada uno con su
+    propio cliente y sesión. Retorna las métricas del escenario.
+    """
+    latencies, sql_counts, errors = [], [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency + 1)
+
+    def worker(n, count):
+        rng = random.Random(f'{seed}-{scenario.name}-{n}')
+        client = make_client(scenario.target)
+        if scenario.role:
+            _login(client, scenario.role, n % max(1, len(data.tecnicos if scenario.role == 'Técnico'
+                                                         else data.usuarios)))
+            if isinstance(client, HTTPClient):
+                client.fetch_csrf('/cambiar-password')
+        for _ in range(warmup):
+            scenario.step(client, data, rng)
+        barrier.wait()
+        local_latencies, local_sql, local_errors = [], [], []
+        for _ in range(count):
+            _sql.count = 0
+            start = time.perf_counter()
+            status, _ = scenario.step(client, data, rng)
+            local_latencies.append(time.perf_counter() - start)
+            local_sql.append(_sql.count)
+            if status not in scenario.expect:
+                local_errors.append(status)
+        with lock:
+            latencies.extend(local_latencies)
+            sql_counts.extend(local_sql)
+            errors.extend(local_errors)
+
+    threads = [threading.Thread(target=worker, args=(n, requests // concurrency + (n < requests % concurrency)))
+               for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_status': sorted(set(errors)),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+    if make_client.sql:
+        result['sql_per_request'] = round(statistics.fmean(sql_counts), 2) if sql_counts else 0.0
+    return result
+
+
+def compare(results, baseline, max_regression):
+    """
+    Compara con una corrida anterior. Retorna los mensajes de regresión: p95 más de
+    `max_regression` (fracción) por encima de la base, o más sentencias SQL por petición.
+    """
+    problems = []
+    for name, current in results['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if not base:
+            continue
+        limit = base['p95_ms'] * (1 + max_regression)
+        if current['p95_ms'] > limit:
+            problems.append(f"{name}: p95 {current['p95_ms']} ms > {limit:.2f} ms (base {base['p95_ms']} ms)")
+        if 'sql_per_request' in current and 'sql_per_request' in base \
+                and current['sql_per_request'] > base['sql_per_request']:
+            problems.append(f"{name}: {current['sql_per_request']} sentencias SQL por petición "
+                            f"(base {base['sql_per_request']})")
+    return problems
+
+
+def _print_table(results, out):
+    columns = ('requests', 'errors', 'rps', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'sql_per_request')
+    print(f"{'escenario':<20}" + ''.join(f'{c:>16}' for c in columns), file=out)
+    for name, metrics in results['scenarios'].items():
+        print(f'{name:<20}' + ''.join(f"{metrics.get(c, '-'):>16}" for c in columns), file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', help='Lista separada por comas (por defecto: ' +
+                        ', '.join(s.name for s in SCENARIOS if s.default) + ').')
+    parser.add_argument('--requests', type=int, default=200, help='Peticiones medidas por escenario.')
+    parser.add_argument('--concurrency', type=int, default=1, help='Hilos concurrentes por escenario.')
+    parser.add_argument('--warmup', type=int, default=5, help='Peticiones sin medir por hilo antes de empezar.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database-url', help='Sobreescribe SQLALCHEMY_DATABASE_URI (modo en proceso).')
+    parser.add_argument('--url', help='URL base del servidor HTML (modo HTTP).')
+    parser.add_argument('--api-url', help='URL base del servidor con TEST_ROUTES (modo HTTP).')
+    parser.add_argument('--output', help='Archivo JSON donde guardar los resultados.')
+    parser.add_argument('--baseline', help='Resultados JSON anteriores con los que comparar.')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='Aumento máximo permitido del p95 respecto a la base (0.2 = 20%%).')
+    args = parser.parse_args(argv)
+
+    names = args.scenarios.split(',') if args.scenarios else [s.name for s in SCENARIOS if s.default]
+    by_name = {s.name: s for s in SCENARIOS}
+    unknown = [name for name in names if name not in by_name]
+    if unknown:
+        parser.error(f"escenario(s) desconocido(s): {', '.join(unknown)}")
+
+    from app import create_app
+
+    config = {'SQLALCHEMY_DATABASE_URI': args.database_url} if args.database_url else {}
+    # Sin CSRF, presupuesto de consultas estricto ni limitador de inicios de sesión (todas las
+    # peticiones vienen de la misma IP): se mide la ruta, no las validaciones de prueba
+    config.update(WTF_CSRF_ENABLED=False, QUERY_BUDGET_ENFORCE=False, LOGIN_RATE_LIMIT_ENABLED=False)
+    apps = {'html': create_app(config)}
+    data = Dataset(apps['html'])
+
+    if args.url or args.api_url:
+        urls = {'html': args.url, 'api': args.api_url}
+        scenarios = [by_name[name] for name in names if urls[by_name[name].target]]
+
+        def make_client(target):
+            return HTTPClient(urls[target])
+        make_client.sql = False
+    else:
+        apps['api'] = create_app(dict(config, TEST_ROUTES=True))
+        scenarios = [by_name[name] for name in names]
+
+        def make_client(target):
+            return LocalClient(apps[target])
+        make_client.sql = True
+
+    results = {
+        'meta': {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'modo': 'http' if not make_client.sql else 'local',
+            'base_de_datos': apps['html'].config['SQLALCHEMY_DATABASE_URI'].split('@')[-1],
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+            'python': platform.python_version(),
+        },
+        'scenarios': {},
+    }
+    for scenario in scenarios:
+        print(f'{scenario.name}...', file=sys.stderr)
+        results['scenarios'][scenario.name] = run_scenario(
+            scenario, make_client, data, args.requests, args.concurrency, args.warmup, args.seed)
+
+    _print_table(results, sys.stdout)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            problems = compare(results, json.load(f), args.max_regression)
+        for problem in problems:
+            print(f'REGRESIÓN {problem}', file=sys.stderr)
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
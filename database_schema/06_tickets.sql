@@ -13,7 +13,8 @@ CREATE TABLE user (
     email VARCHAR(120) UNIQUE,
     password_hash VARCHAR(256),
     role_id INT,
-    FOREIGN KEY (role_id) REFERENCES role(id)
+    FOREIGN KEY (role_id) REFERENCES role(id),
+    INDEX ix_user_role_username (role_id, username)
 );
 
 CREATE TABLE ticket (
@@ -25,8 +26,96 @@ CREATE TABLE ticket (
     usuario_id INT,
     tecnico_id INT,
     fecha_creacion DATETIME,
+    updated_at DATETIME,
+    version INT NOT NULL DEFAULT 1,
     FOREIGN KEY (usuario_id) REFERENCES user(id),
-    FOREIGN KEY (tecnico_id) REFERENCES user(id)
+    FOREIGN KEY (tecnico_id) REFERENCES user(id),
+    INDEX ix_ticket_fecha_creacion (fecha_creacion),
+    INDEX ix_ticket_tecnico_fecha (tecnico_id, fecha_creacion),
+    INDEX ix_ticket_tecnico_estado_fecha (tecnico_id, estado, fecha_creacion),
+    INDEX ix_ticket_usuario_fecha (usuario_id, fecha_creacion),
+    INDEX ix_ticket_estado_updated (estado, updated_at),
+    FULLTEXT INDEX ft_ticket_asunto_descripcion (asunto, descripcion)
+);
+
+-- Tickets cerrados archivados (app/archive.py, `flask archive run`): mismas columnas e ids que ticket
+CREATE TABLE ticket_archive (
+    id INT PRIMARY KEY,
+    asunto VARCHAR(150),
+    descripcion TEXT,
+    prioridad ENUM('Baja', 'Media', 'Alta'),
+    estado ENUM('Abierto', 'En proceso', 'Cerrado'),
+    usuario_id INT,
+    tecnico_id INT,
+    fecha_creacion DATETIME,
+    updated_at DATETIME,
+    version INT NOT NULL DEFAULT 1,
+    archived_at DATETIME NOT NULL,
+    FOREIGN KEY (usuario_id) REFERENCES user(id),
+    FOREIGN KEY (tecnico_id) REFERENCES user(id),
+    INDEX ix_ticket_archive_fecha_creacion (fecha_creacion),
+    INDEX ix_ticket_archive_tecnico_fecha (tecnico_id, fecha_creacion),
+    INDEX ix_ticket_archive_usuario_fecha (usuario_id, fecha_creacion)
+);
+
+-- Contadores del resumen del dashboard, mantenidos por la aplicación (app/stats.py)
+CREATE TABLE ticket_stats (
+    dimension VARCHAR(32) NOT NULL,
+    clave VARCHAR(64) NOT NULL,
+    total INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, clave)
+);
+
+-- Marcadores de cambios por alcance ('all', 'tecnico:<id>', 'usuario:<id>') para ETag (app/markers.py)
+CREATE TABLE ticket_markers (
+    scope VARCHAR(32) PRIMARY KEY,
+    version INT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL
+);
+
+-- Bitácora de cambios de tickets, solo de inserción (app/changelog.py, GET /tickets/changes)
+CREATE TABLE ticket_change (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    ticket_id INT NOT NULL,
+    op VARCHAR(8) NOT NULL,
+    changed_at DATETIME NOT NULL,
+    INDEX ix_ticket_change_changed_at (changed_at)
+);
+
+-- Historial de cambios de tickets por campo, escrito en segundo plano (app/audit.py)
+CREATE TABLE ticket_history (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    ticket_id INT NOT NULL,
+    user_id INT,
+    op VARCHAR(8) NOT NULL,
+    field VARCHAR(32),
+    old_value TEXT,
+    new_value TEXT,
+    changed_at DATETIME NOT NULL,
+    INDEX ix_ticket_history_ticket (ticket_id, id)
+);
+
+-- Última entrada eliminada por la compactación de la bitácora
+CREATE TABLE sync_watermark (
+    name VARCHAR(32) PRIMARY KEY,
+    change_id INT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL
+);
+
+-- Versiones de esquema aplicadas (ver app/migrations.py y `flask schema upgrade`)
+CREATE TABLE schema_version (
+    version INT PRIMARY KEY,
+    description VARCHAR(255) NOT NULL,
+    applied_at DATETIME NOT NULL
 );
 
 INSERT INTO role (name) VALUES ('Admin'), ('Usuario'), ('Técnico');
+
+INSERT INTO schema_version (version, description, applied_at) VALUES
+    (1, 'Índices compuestos de ticket y user para el dashboard y los formularios', NOW()),
+    (2, 'Índice FULLTEXT (asunto, descripcion) para la búsqueda de tickets en MySQL', NOW()),
+    (3, 'Tabla ticket_stats con los contadores del resumen del dashboard', NOW()),
+    (4, 'Columnas updated_at/version de ticket y tabla ticket_markers para GET condicional', NOW()),
+    (5, 'Bitácora ticket_change y marca de compactación para GET /tickets/changes', NOW()),
+    (6, 'Tabla ticket_archive e índice (estado, updated_at) para archivar tickets cerrados', NOW()),
+    (7, 'Tabla ticket_history con el historial de cambios de tickets por campo', NOW());
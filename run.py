@@ -1,3 +1,12 @@
+import os
+
+# SERVER=gevent sirve con greenlets en lugar de un hilo por conexión: miles de clientes del
+# dashboard en vivo (Server-Sent Events) esperando eventos no ocupan hilos del servidor.
+# Requiere `pip install gevent` y debe aplicarse antes de importar la aplicación.
+if os.environ.get('SERVER') == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
 from app import create_app
 
 # Crea la instancia de la aplicación Flask utilizando la factoría
@@ -5,7 +14,11 @@ app = create_app()
 
 # Punto de entrada de la aplicación
 if __name__ == '__main__':
-    # Ejecuta el servidor Flask en modo desarrollo
-    # host='0.0.0.0' permite que sea accesible desde otras máquinas en la red local
-    # En producción, desactiva debug o usa un servidor como Gunicorn
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    if os.environ.get('SERVER') == 'gevent':
+        from gevent.pywsgi import WSGIServer
+        WSGIServer(('0.0.0.0', 5000), app).serve_forever()
+    else:
+        # Ejecuta el servidor Flask en modo desarrollo
+        # host='0.0.0.0' permite que sea accesible desde otras máquinas en la red local
+        # En producción, desactiva debug o usa un servidor como Gunicorn
+        app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,90 @@
+import importlib.util
+import sys
+import types
+from datetime import datetime, timedelta
+import pytest
+
+# config.py no se versiona (ver README): sin él, las pruebas usan solo TEST_CONFIG
+if importlib.util.find_spec('config') is None:
+    sys.modules['config'] = types.ModuleType('config')
+    sys.modules['config'].Config = type('Config', (), {})
+
+from app import create_app, db
+from app.models import Role, Ticket, User
+
+PASSWORD = 'secret1'
+
+TEST_CONFIG = {
+    'TESTING': True,
+    'SECRET_KEY': 'pruebas',
+    'WTF_CSRF_ENABLED': False,
+    'LOGIN_RATE_LIMIT_ENABLED': False,
+    # Un hash barato: las pruebas inician sesión muchas veces
+    'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+    'TEMPLATE_BYTECODE_CACHE': False,
+    'AUDIT_ENABLED': False,
+    # Sin tareas periódicas en segundo plano
+    'CHANGE_LOG_COMPACT_INTERVAL': 0,
+    'ASSIGN_RECONCILE_INTERVAL': 0,
+}
+
+
+@pytest.fixture
+def config():
+    """
+    Configuración extra de la aplicación de la prueba; se sobreescribe con
+    @pytest.mark.parametrize('config', [{...}]) o redefiniendo el fixture.
+    """
+    return {}
+
+
+@pytest.fixture
+def app(tmp_path, config):
+    app = create_app(dict(TEST_CONFIG, SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "tickets.db"}', **config))
+    with app.app_context():
+        db.create_all()
+        seed()
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def seed(tickets=60):
+    """
+    Roles, un usuario por rol (más un segundo técnico) y `tickets` tickets repartidos
+    entre ellos: más filas que las que caben en los presupuestos de consultas si hubiera N+1.
+    """
+    roles = {name: Role(name=name) for name in ('Admin', 'Usuario', 'Técnico')}
+    db.session.add_all(roles.values())
+    db.session.flush()
+    users = {}
+    for username, role in (('admin', 'Admin'), ('user', 'Usuario'), ('tec', 'Técnico'), ('tec2', 'Técnico')):
+        user = User(username=username, email=f'{username}@example.com', role_id=roles[role].id)
+        user.set_password(PASSWORD)
+        users[username] = user
+    db.session.add_all(users.values())
+    db.session.flush()
+    start = datetime(2025, 1, 1)
+    for i in range(tickets):
+        db.session.add(Ticket(
+            asunto=f'Asunto {i} impresora', descripcion=f'Descripción {i}: la red no responde',
+            prioridad=('Baja', 'Media', 'Alta')[i % 3], estado=('Abierto', 'En proceso', 'Cerrado')[i % 3],
+            usuario_id=users['user'].id, tecnico_id=users[('tec', 'tec2')[i % 2]].id,
+            fecha_creacion=start + timedelta(hours=i)))
+    db.session.commit()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(client):
+    def login(username):
+        client.get('/logout')
+        response = client.post('/login', data={'email': f'{username}@example.com', 'password': PASSWORD})
+        assert response.status_code == 302, response.status_code
+        return client
+    return login
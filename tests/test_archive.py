@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import update
+from app import archive, db
+from app.models import Ticket, TicketArchive, utcnow
+from tests.test_changes import age_changes
+
+
+@pytest.fixture
+def config():
+    return {'TEST_ROUTES': True}
+
+
+def test_closed_tickets_without_updated_at_are_archived(app):
+    # Los tickets cerrados del seed son 3, 6, 9... (de 2025); el 3 no tiene updated_at
+    db.session.execute(update(Ticket).values(updated_at=utcnow()))
+    db.session.execute(update(Ticket).where(Ticket.id == 3).values(updated_at=None))
+    db.session.execute(update(Ticket).where(Ticket.id == 6).values(updated_at=datetime(2025, 1, 1)))
+    db.session.commit()
+
+    assert archive.archive_closed(age=30 * 24 * 3600) == 2
+    assert sorted(db.session.scalars(db.select(TicketArchive.id))) == [3, 6]
+
+
+def test_archived_tickets_are_not_reported_as_deleted(app, client):
+    age_changes(60)
+    cursor = int(client.get('/tickets/changes').json['cursor'])
+    db.session.execute(update(Ticket).where(Ticket.id == 6).values(asunto='Editado antes de archivar'))
+    ticket = db.session.get(Ticket, 3)
+    ticket.asunto = 'Editado'
+    db.session.commit()
+    db.session.execute(update(Ticket).values(updated_at=utcnow() - timedelta(days=365)))
+    db.session.commit()
+    archive.archive_closed(age=30 * 24 * 3600)
+    db.session.delete(db.session.get(Ticket, 1))
+    db.session.commit()
+    age_changes(60)
+
+    changes = client.get(f'/tickets/changes?since={cursor}').json
+    assert changes['deleted'] == [1]
+    assert 3 in changes['archived'] and 1 not in changes['archived']
+    assert not {t['id'] for t in changes['upserts']} & set(changes['archived'])
+    assert client.get('/tickets/3').json['asunto'] == 'Editado'
@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from tests.test_changes import age_changes
+
+pytest.importorskip('asgiref')
+pytest.importorskip('aiosqlite')
+
+
+def call(asgi, path, headers=None):
+    """
+    Una petición GET a la aplicación ASGI; retorna (estado, cabeceras, cuerpo).
+    """
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '',
+        'query_string': query.encode(), 'server': ('localhost', 80), 'client': ('127.0.0.1', 5000),
+        'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in (headers or {}).items()],
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        await asgi(scope, receive, send)
+        await asgi.engine.dispose()
+
+    asyncio.run(run())
+    start = messages[0]
+    headers = {k.decode('latin-1'): v.decode('latin-1') for k, v in start['headers']}
+    return start['status'], headers, b''.join(m.get('body', b'') for m in messages[1:])
+
+
+@pytest.fixture
+def asgi(app):
+    from app.asgi_api import create_asgi_app
+
+    return create_asgi_app(app)
+
+
+@pytest.mark.parametrize('config', [{'TEST_ROUTES': True}])
+def test_changes_cursor_on_list_and_not_modified(asgi):
+    age_changes(60)
+    age_changes(0, 41)
+    status, headers, _ = call(asgi, '/tickets')
+    assert status == 200 and headers['x-changes-cursor'] == '40'
+    status, headers, _ = call(asgi, '/tickets', {'If-None-Match': headers['etag']})
+    assert status == 304 and headers['x-changes-cursor'] == '40'
+
+
+def test_html_mode_leaves_ticket_routes_to_flask(asgi):
+    # GET /tickets es el formulario de nuevo ticket, con login; nunca el listado sin autenticar
+    status, headers, body = call(asgi, '/tickets')
+    assert status == 302 and headers['location'].startswith('/login')
+    status, headers, body = call(asgi, '/tickets?archivados=1')
+    assert status == 302 and b'Asunto' not in body
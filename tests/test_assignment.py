@@ -0,0 +1,35 @@
+import threading
+import time
+from sqlalchemy import insert
+from app import assignment
+from app.choices import assignee_choices
+from app.models import db, Ticket
+from app.ticket_events import TICKET_COLUMNS, TicketChange
+
+
+def test_rebuild_drops_deltas_its_query_already_includes(app, monkeypatch):
+    assignment.rebuild()
+    index = assignment.get_index()
+    before = index.load(3)
+
+    # Ticket ya confirmado cuyo manejador on_commit todavía no se ejecutó
+    row = {'asunto': 'Nuevo', 'descripcion': 'd', 'prioridad': 'Alta', 'estado': 'Abierto',
+           'usuario_id': 2, 'tecnico_id': 3}
+    [id] = db.session.execute(insert(Ticket).values(row)).inserted_primary_key
+    db.session.commit()
+    change = TicketChange('create', id, dict({key: None for key in TICKET_COLUMNS}, **row, id=id))
+    handler = threading.Thread(target=index.apply_changes, args=([change],))
+
+    choices = assignee_choices.choices
+
+    def choices_while_handler_waits(role_name):
+        # Ya dentro del lock de la reconstrucción: el manejador espera el lock
+        handler.start()
+        time.sleep(0.1)
+        return choices(role_name)
+
+    monkeypatch.setattr(assignee_choices, 'choices', choices_while_handler_waits)
+    assignment.rebuild()
+    handler.join()
+    weight = app.config['ASSIGN_PRIORITY_WEIGHTS']['Alta']
+    assert index.load(3) == (before[0] + weight, before[1] + 1)
@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import func, select
+from app import audit
+from app.models import db, Ticket, TicketHistory, utcnow
+
+
+def history_rows(n, ticket_id=1):
+    now = utcnow()
+    return [{'ticket_id': ticket_id, 'user_id': None, 'changed_at': now, 'op': 'update',
+             'field': 'asunto', 'old_value': str(i), 'new_value': str(i + 1)} for i in range(n)]
+
+
+def history_count():
+    return db.session.scalar(select(func.count()).select_from(TicketHistory))
+
+
+def test_writer_batches_queued_commits(app, monkeypatch):
+    writer = audit.AuditWriter(app, queue_size=10, batch_size=4, interval=60)
+    batches = []
+    write = writer.write
+
+    def counting_write(rows):
+        batches.append(len(rows))
+        write(rows)
+
+    monkeypatch.setattr(writer, 'write', counting_write)
+    for _ in range(5):
+        writer.enqueue(history_rows(2))
+    writer.queue.put(audit._STOP)
+    # Sin iniciar el hilo: run() recorre la cola en esta misma prueba
+    writer.run()
+    assert batches == [4, 4, 2]
+    assert history_count() == 10
+
+
+def test_full_queue_writes_in_the_caller_and_stop_flushes_the_rest(app):
+    writer = audit.AuditWriter(app, queue_size=1, batch_size=100, interval=60, put_timeout=0.01)
+    sync_writes = audit.SYNC_WRITES._values.get((), 0)
+    writer.enqueue(history_rows(2))
+    writer.enqueue(history_rows(3))
+    # El segundo commit no cupo en la cola: ya está escrito
+    assert audit.SYNC_WRITES._values.get((), 0) == sync_writes + 1
+    assert history_count() == 3
+
+    writer.stop()
+    assert history_count() == 5
+    # Detenido, lo que llegue se escribe directamente
+    writer.enqueue(history_rows(1))
+    assert history_count() == 6
+
+
+@pytest.fixture
+def writer(app):
+    writer = app.extensions['audit']
+    yield writer
+    writer.stop()
+
+
+# Cola de dos commits y lotes de tres filas: se ejercitan los lotes y la escritura en la petición
+@pytest.mark.parametrize('config', [{'AUDIT_ENABLED': True, 'AUDIT_QUEUE_SIZE': 2, 'AUDIT_BATCH_SIZE': 3,
+                                     'AUDIT_FLUSH_INTERVAL': 0.05, 'AUDIT_PUT_TIMEOUT': 0.01}])
+def test_every_committed_change_reaches_the_history(app, writer):
+    assert writer.is_alive()
+    for i in range(20):
+        ticket = db.session.get(Ticket, i + 1)
+        ticket.asunto = f'Editado {i}'
+        ticket.prioridad = 'Alta' if ticket.prioridad != 'Alta' else 'Baja'
+        db.session.commit()
+    writer.stop()
+    assert not writer.is_alive()
+
+    # Además de las altas de los tickets sembrados
+    assert history_count() == 60 + 40
+    rows = db.session.execute(
+        select(TicketHistory.ticket_id, TicketHistory.field).where(TicketHistory.op == 'update')
+    ).all()
+    assert sorted(rows) == sorted((i + 1, field) for i in range(20) for field in ('asunto', 'prioridad'))
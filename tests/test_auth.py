@@ -0,0 +1,9 @@
+import logging
+
+
+def test_failed_login_does_not_log_the_email(client, caplog):
+    caplog.set_level(logging.INFO, logger='app.auth_routes')
+    response = client.post('/login', data={'email': 'nadie@example.com', 'password': 'incorrecta'})
+    assert response.status_code == 200
+    assert 'Inicio de sesión fallido' in caplog.text
+    assert 'nadie@example.com' not in caplog.text
@@ -0,0 +1,46 @@
+import pytest
+from app.models import Ticket
+
+
+@pytest.fixture
+def config():
+    return {'TEST_ROUTES': True}
+
+
+def test_patch_rejects_empty_required_fields_per_item(client):
+    response = client.patch('/tickets/bulk', json={'tickets': [
+        {'id': 1, 'asunto': None},
+        {'id': 2, 'asunto': ''},
+        {'id': 3, 'descripcion': None},
+        {'id': 4, 'asunto': 'Asunto corregido'},
+    ]})
+    assert response.status_code == 207
+    results = response.json['results']
+    assert [r['status'] for r in results] == ['error', 'error', 'error', 'updated']
+    assert results[0]['error'] == 'Campos requeridos: asunto'
+    assert results[2]['error'] == 'Campos requeridos: descripcion'
+    assert client.get('/tickets/4').json['asunto'] == 'Asunto corregido'
+    assert client.get('/tickets/1').json['asunto'] == 'Asunto 0 impresora'
+
+
+@pytest.mark.parametrize('returning', [True, False])
+def test_bulk_create_returns_ids_in_order(app, client, monkeypatch, returning):
+    from app import db
+    from app.query_budget import count_queries
+
+    # Sin RETURNING (MySQL) los ids salen de LAST_INSERT_ID(), que SQLite no tiene
+    if not returning and db.engine.dialect.name != 'mysql':
+        pytest.skip('el camino sin RETURNING solo funciona contra MySQL')
+    monkeypatch.setattr(db.engine.dialect, 'insert_executemany_returning_sort_by_parameter_order', returning)
+    tickets = [{'asunto': f'Lote {i}', 'descripcion': 'd', 'prioridad': 'Baja', 'estado': 'Abierto',
+                'usuario_id': 2, 'tecnico_id': 3} for i in range(30)]
+    with count_queries() as statements:
+        response = client.post('/tickets/bulk', json=tickets)
+    assert response.status_code == 200
+    if not returning:
+        # Un solo INSERT de varias filas por lote, no un INSERT por fila
+        assert sum(1 for s in statements if s.startswith('INSERT INTO ticket ')) == 1
+    for i, result in enumerate(response.json['results']):
+        ticket = client.get(f"/tickets/{result['id']}").json
+        assert ticket['asunto'] == f'Lote {i}'
+    assert {t.version for t in db.session.scalars(db.select(Ticket).where(Ticket.asunto.like('Lote %')))} == {1}
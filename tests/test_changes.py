@@ -0,0 +1,43 @@
+from datetime import timedelta
+import pytest
+from sqlalchemy import update
+from app import db
+from app.models import TicketChangeLog, utcnow
+
+
+@pytest.fixture
+def config():
+    return {'TEST_ROUTES': True}
+
+
+def age_changes(seconds, *ids):
+    # Hace que las entradas (todas si no se indican) parezcan de hace `seconds` segundos
+    stmt = update(TicketChangeLog).values(changed_at=utcnow() - timedelta(seconds=seconds))
+    if ids:
+        stmt = stmt.where(TicketChangeLog.id.in_(ids))
+    db.session.execute(stmt)
+    db.session.commit()
+
+
+def test_cursor_stops_before_the_first_unsettled_entry(client):
+    # Recién creadas: todas más recientes que CHANGES_SETTLE_SECONDS
+    assert client.get('/tickets').headers['X-Changes-Cursor'] == '0'
+    assert client.get('/tickets/changes').json['cursor'] == 0
+
+    # Una entrada sin asentar (41) delante de otras ya asentadas: el cursor no la salta
+    age_changes(60)
+    age_changes(0, 41)
+    assert client.get('/tickets/changes').json['cursor'] == 40
+    changes = client.get('/tickets/changes?since=40').json
+    assert changes['cursor'] == 40 and changes['has_more'] and not changes['upserts']
+
+    age_changes(60, 41)
+    assert client.get('/tickets').headers['X-Changes-Cursor'] == '60'
+
+
+def test_cursor_is_sent_with_not_modified(client):
+    age_changes(60)
+    first = client.get('/tickets')
+    response = client.get('/tickets', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 304
+    assert response.headers['X-Changes-Cursor'] == '60'
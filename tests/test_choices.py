@@ -0,0 +1,19 @@
+from app.choices import _ChoiceList
+
+
+def test_search_by_prefix_ignores_case_and_database_order():
+    # Orden binario de SQLite: las mayúsculas antes que las minúsculas
+    choices = _ChoiceList(0, [(1, 'Bob'), (2, 'Carla'), (3, 'alice'), (4, 'ana')])
+    assert choices.choices == [(3, 'alice'), (4, 'ana'), (1, 'Bob'), (2, 'Carla')]
+    assert choices.search('a', 20) == [(3, 'alice'), (4, 'ana')]
+    assert choices.search('B', 20) == [(1, 'Bob')]
+    assert choices.search('an', 20) == [(4, 'ana')]
+    assert choices.search('a', 1) == [(3, 'alice')]
+    assert choices.search('z', 20) == []
+
+
+def test_typeahead_endpoint(login):
+    client = login('admin')
+    response = client.get('/usuarios/buscar?rol=Técnico&q=TE')
+    assert response.status_code == 200
+    assert [user['username'] for user in response.json['usuarios']] == ['tec', 'tec2']
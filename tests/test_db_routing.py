@@ -0,0 +1,62 @@
+import shutil
+import time
+import pytest
+from sqlalchemy import update
+from app import db_routing
+from app.models import db, Ticket
+
+
+@pytest.fixture
+def config(tmp_path):
+    yield {
+        'SQLALCHEMY_REPLICA_URIS': [f'sqlite:///{tmp_path / "replica.db"}'],
+        'DB_REPLICA_STICKY_SECONDS': 5,
+    }
+    # db.init_app deja un MetaData por bind en el objeto db global: sin quitarlo,
+    # db.create_all() de las siguientes pruebas (sin réplicas) buscaría el bind
+    db.metadatas.pop('replica_0', None)
+
+
+@pytest.fixture
+def replica(app, tmp_path):
+    """
+    Réplica con una copia de la base sembrada; luego el primario cambia el asunto del
+    ticket más reciente y la réplica queda atrasada.
+    """
+    db.engines[None].dispose()
+    shutil.copy(tmp_path / 'tickets.db', tmp_path / 'replica.db')
+    db.session.execute(update(Ticket).where(Ticket.id == 60).values(asunto='Solo en el primario'))
+    db.session.commit()
+
+
+def dashboard(client):
+    return client.get('/dashboard').get_data(as_text=True)
+
+
+def test_read_replica_view_reads_the_replica(replica, login):
+    client = login('admin')
+    with client.session_transaction() as session:
+        session.pop(db_routing.STICKY_KEY, None)
+    html = dashboard(client)
+    assert 'Asunto 59 impresora' in html
+    assert 'Solo en el primario' not in html
+
+
+def test_reads_stick_to_the_primary_after_a_write(replica, login, monkeypatch):
+    client = login('admin')
+    response = client.post('/tickets/60/editar', data={
+        'asunto': 'Editado', 'descripcion': 'd', 'prioridad': 'Alta', 'estado': 'Abierto',
+        'usuario_id': 2, 'tecnico_id': 4,
+    })
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        until = session[db_routing.STICKY_KEY]
+    assert until > time.time()
+    assert 'Editado' in dashboard(client)
+
+    # Pasada la ventana, las lecturas vuelven a la réplica (que aún no tiene la edición)
+    monkeypatch.setattr(db_routing.time, 'time', lambda: until + 1)
+    html = dashboard(client)
+    assert 'Asunto 59 impresora' in html and 'Editado' not in html
+    with client.session_transaction() as session:
+        assert db_routing.STICKY_KEY not in session
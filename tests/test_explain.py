@@ -0,0 +1,14 @@
+from app.explain import INDEX_CHECKS, check_indexes
+
+
+def test_every_query_uses_its_index(app):
+    results = check_indexes()
+    assert [name for name, *_ in results] == list(INDEX_CHECKS)
+    failed = {name: (index, plan) for name, index, ok, plan in results if not ok}
+    assert not failed
+
+
+def test_schema_explain_command(app):
+    result = app.test_cli_runner().invoke(args=['schema', 'explain'])
+    assert result.exit_code == 0, result.output
+    assert result.output.count('[OK]') == len(INDEX_CHECKS)
@@ -0,0 +1,43 @@
+import json
+from app import live
+from app.choices import assignee_choices
+from app.models import db, Ticket
+
+
+def test_event_is_published_with_a_stale_choices_cache(app):
+    broker = live.get_broker()
+    assert app.extensions['live_broker'] is broker
+    subscription = broker.subscribe(['all'])
+    try:
+        assignee_choices.usernames('Técnico')
+        assignee_choices.usernames('Usuario')
+        # Un cambio de usuarios deja la caché desactualizada: recargarla en el
+        # manejador on_commit necesitaría una consulta con la sesión ya confirmada
+        assignee_choices.invalidate()
+
+        ticket = db.session.get(Ticket, 1)
+        ticket.asunto = 'Cambio en vivo'
+        db.session.commit()
+
+        event, data = subscription.get(timeout=1)
+        data = json.loads(data)
+        assert event == 'ticket'
+        assert (data['id'], data['asunto'], data['op']) == (1, 'Cambio en vivo', 'update')
+        assert data['tecnico'] == 'tec' and data['usuario'] == 'user'
+    finally:
+        subscription.close()
+
+
+def test_event_falls_back_to_ids_without_cached_names(app):
+    subscription = live.get_broker().subscribe(['all'])
+    try:
+        assignee_choices._lists.clear()
+        ticket = db.session.get(Ticket, 1)
+        ticket.asunto = 'Sin nombres'
+        db.session.commit()
+
+        _, data = subscription.get(timeout=1)
+        data = json.loads(data)
+        assert (data['tecnico'], data['usuario']) == (data['tecnico_id'], data['usuario_id'])
+    finally:
+        subscription.close()
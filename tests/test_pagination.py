@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import update
+from app import db
+from app.models import Ticket
+from app.pagination import keyset_paginate
+
+
+def walk(per_page, descending):
+    # Recorre todas las páginas hacia adelante y vuelve hacia atrás desde la última
+    query = Ticket.query
+    pages, after = [], None
+    while True:
+        page = keyset_paginate(query, Ticket.fecha_creacion, Ticket.id, per_page, after=after, descending=descending)
+        pages.append([t.id for t in page.items])
+        if not page.has_next:
+            break
+        after = page.next_cursor
+    back, before = [pages[-1]], page.prev_cursor
+    while before:
+        page = keyset_paginate(query, Ticket.fecha_creacion, Ticket.id, per_page, before=before, descending=descending)
+        back.append([t.id for t in page.items])
+        before = page.prev_cursor
+    return pages, back[::-1]
+
+
+@pytest.mark.parametrize('descending', [True, False])
+def test_pages_cover_tickets_without_fecha_creacion(app, descending):
+    db.session.execute(update(Ticket).where(Ticket.id.in_([5, 6, 7, 8, 9, 30])).values(fecha_creacion=None))
+    db.session.commit()
+
+    pages, back = walk(4, descending)
+    ids = [id for page in pages for id in page]
+    assert sorted(ids) == list(range(1, 61))
+    nulls = [5, 6, 7, 8, 9, 30]
+    dated = [id for id in range(1, 61) if id not in nulls]
+    assert ids == (dated[::-1] + nulls[::-1] if descending else nulls + dated)
+    assert back == pages
@@ -0,0 +1,65 @@
+import pytest
+from app.query_budget import QueryBudgetExceeded, count_queries, query_budget
+
+
+def budgeted_view(app, endpoint):
+    # La función envuelta por @query_budget (los decoradores de encima copian el atributo)
+    view = app.view_functions[endpoint]
+    while hasattr(getattr(view, '__wrapped__', None), 'query_budget'):
+        view = view.__wrapped__
+    return view
+
+
+@pytest.mark.parametrize('username', ['admin', 'tec', 'user'])
+def test_dashboard_within_budget(app, login, username):
+    client = login(username)
+    with count_queries() as statements:
+        response = client.get('/dashboard?por_pagina=50')
+    assert response.status_code == 200
+    assert 'Asunto' in response.get_data(as_text=True)
+    # Incluye las consultas de fuera de la vista (sesión, ETag), pero no crece con las filas
+    assert len(statements) <= budgeted_view(app, 'main.dashboard').query_budget + 3
+
+
+@pytest.mark.parametrize('endpoint, url, username', [
+    ('main.dashboard', '/dashboard?por_pagina=50', 'admin'),
+    ('main.dashboard', '/dashboard?por_pagina=50', 'tec'),
+    ('main.dashboard', '/dashboard?por_pagina=50', 'user'),
+    ('main.buscar', '/buscar?q=impresora', 'admin'),
+    ('main.buscar', '/buscar?q=impresora', 'user'),
+    ('main.listar_usuarios', '/usuarios', 'admin'),
+])
+def test_views_within_budget_and_over_budget_fails(app, login, monkeypatch, endpoint, url, username):
+    client = login(username)
+    view = budgeted_view(app, endpoint)
+    # Con TESTING el presupuesto se hace cumplir: pasar de él haría fallar la petición
+    assert client.get(url).status_code == 200
+
+    monkeypatch.setattr(view, 'query_budget', 0)
+    with pytest.raises(QueryBudgetExceeded) as error:
+        client.get(url)
+    assert error.value.limit == 0 and error.value.statements
+
+
+def test_over_budget_only_warns_when_not_enforced(app, login, monkeypatch, caplog):
+    client = login('admin')
+    monkeypatch.setattr(budgeted_view(app, 'main.listar_usuarios'), 'query_budget', 0)
+    app.config['QUERY_BUDGET_ENFORCE'] = False
+    assert client.get('/usuarios').status_code == 200
+    assert 'presupuesto: 0' in caplog.text
+
+
+def test_decorator_counts_statements_of_the_view(app):
+    from app import db
+
+    @query_budget(1)
+    def two_queries():
+        db.session.execute(db.text('SELECT 1'))
+        db.session.execute(db.text('SELECT 2'))
+        return 'ok'
+
+    with app.test_request_context('/'):
+        with pytest.raises(QueryBudgetExceeded):
+            two_queries()
+        two_queries.query_budget = 2
+        assert two_queries() == 'ok'
@@ -0,0 +1,14 @@
+from app.models import db, Ticket
+from app.search import MemorySearchBackend, get_backend
+
+
+def test_backend_is_per_app_and_follows_commits(app, login):
+    client = login('admin')
+    assert '0 resultado' in client.get('/buscar?q=zzunico').get_data(as_text=True)
+    backend = app.extensions['search_backend']
+    assert isinstance(backend, MemorySearchBackend) and get_backend() is backend
+
+    ticket = db.session.get(Ticket, 1)
+    ticket.descripcion = 'zzunico'
+    db.session.commit()
+    assert '1 resultado' in client.get('/buscar?q=zzunico').get_data(as_text=True)
@@ -0,0 +1,40 @@
+from app import db, stats
+from app.models import Ticket
+
+
+def recomputed():
+    # Los contadores que dejaría una reconstrucción desde la tabla ticket
+    db.session.rollback()
+    current = stats.summary()
+    stats.rebuild()
+    try:
+        return current, stats.summary()
+    finally:
+        db.session.rollback()
+
+
+def test_counters_follow_updates_of_expired_columns(app):
+    stats.rebuild()
+    ticket = db.session.get(Ticket, 1)
+    assert ticket.estado == 'Abierto'
+    db.session.commit()
+    # Después del commit las columnas están expiradas: se asignan sin leerlas antes
+    ticket.estado = 'Cerrado'
+    ticket.prioridad = 'Alta'
+    db.session.commit()
+
+    current, rebuilt = recomputed()
+    assert current == rebuilt
+    assert current['estado']['Abierto'] == 19
+
+
+def test_counters_follow_orm_create_and_delete(app):
+    stats.rebuild()
+    ticket = Ticket(asunto='Nuevo', descripcion='d', prioridad='Media', estado='En proceso',
+                    usuario_id=2, tecnico_id=3)
+    db.session.add(ticket)
+    db.session.delete(db.session.get(Ticket, 2))
+    db.session.commit()
+
+    current, rebuilt = recomputed()
+    assert current == rebuilt
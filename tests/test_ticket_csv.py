@@ -0,0 +1,108 @@
+import io
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from app import ticket_csv
+from app.models import db, Ticket
+
+HEADER = 'asunto,descripcion,prioridad,estado,fecha_creacion,tecnico,usuario\n'
+
+
+def import_csv(text, **kwargs):
+    return ticket_csv.import_tickets(io.StringIO(text), **kwargs).to_dict()
+
+
+def imported(asunto_prefix):
+    return db.session.scalars(
+        select(Ticket).where(Ticket.asunto.startswith(asunto_prefix)).order_by(Ticket.id)
+    ).all()
+
+
+def test_errors_are_reported_per_line(app):
+    report = import_csv(HEADER + (
+        'Bien,d,Alta,Abierto,,tec,user\n'
+        'Prioridad,d,Urgente,Abierto,,tec,user\n'
+        ',d,Alta,Abierto,,tec,user\n'
+        'Rol,d,Alta,Abierto,,user,user\n'
+        'Fecha,d,Alta,Abierto,ayer,tec,user\n'
+        'Por id,d,Baja,Cerrado,,4,2\n'
+    ))
+    assert report['creados'] == 2
+    assert report['errores'] == 4
+    assert report['detalle'] == [
+        {'linea': 3, 'error': "prioridad inválida: 'Urgente'"},
+        {'linea': 4, 'error': 'asunto es obligatorio'},
+        {'linea': 5, 'error': "tecnico 'user' no existe o no tiene ese rol"},
+        {'linea': 6, 'error': 'fecha_creacion debe tener el formato AAAA-MM-DD HH:MM:SS'},
+    ]
+    assert [(t.asunto, t.tecnico_id, t.usuario_id) for t in imported('Bien') + imported('Por id')] == [
+        ('Bien', 3, 2), ('Por id', 4, 2)]
+
+
+def test_missing_columns(app):
+    report = import_csv('asunto,descripcion\nA,d\n')
+    assert report == {'creados': 0, 'errores': 1,
+                      'detalle': [{'linea': 1, 'error': 'Faltan columnas: prioridad, estado, tecnico, usuario'}]}
+
+
+def test_semicolon_delimiter_is_detected(app):
+    report = import_csv(HEADER.replace(',', ';') + 'Punto y coma;con, coma;Media;Abierto;;tec2;user\n')
+    assert report['creados'] == 1, report
+    [ticket] = imported('Punto y coma')
+    assert (ticket.descripcion, ticket.tecnico_id) == ('con, coma', 4)
+
+
+def test_formula_prefixes_round_trip(app):
+    values = ['=1+1', '+54 11', '-menos', '@arroba', "'comilla", 'normal']
+    exported = [ticket_csv._cell(value) for value in values]
+    assert exported == ["'=1+1", "'+54 11", "'-menos", "'@arroba", "'comilla", 'normal']
+    # La importación quita solo el apóstrofo que agregó la exportación
+    assert [ticket_csv._text({'v': cell}, 'v') for cell in exported] == values
+
+
+def test_export_then_import_keeps_formula_like_text(app, login):
+    ticket = db.session.get(Ticket, 1)
+    ticket.asunto = '=HYPERLINK("x")'
+    ticket.descripcion = '-2 grados'
+    db.session.commit()
+    body = login('admin').get('/tickets/exportar').get_data(as_text=True).lstrip('\ufeff')
+    line = next(line for line in body.splitlines() if 'HYPERLINK' in line)
+    assert line.startswith('1,"\'=HYPERLINK(""x"")",\'-2 grados,')
+
+    report = import_csv(body.splitlines(keepends=True)[0] + line + '\n')
+    assert report['creados'] == 1, report
+    copy = db.session.scalars(select(Ticket).order_by(Ticket.id.desc())).first()
+    assert (copy.asunto, copy.descripcion) == ('=HYPERLINK("x")', '-2 grados')
+
+
+def test_fecha_creacion_is_naive_utc(app):
+    report = import_csv(HEADER + (
+        'Con zona,d,Alta,Abierto,2025-03-01T10:00:00+02:00,tec,user\n'
+        'Sin zona,d,Alta,Abierto,2025-03-01 10:00:00,tec,user\n'
+        'Sin fecha,d,Alta,Abierto,,tec,user\n'
+    ))
+    assert report['creados'] == 3, report
+    assert imported('Con zona')[0].fecha_creacion == datetime(2025, 3, 1, 8)
+    assert imported('Sin zona')[0].fecha_creacion == datetime(2025, 3, 1, 10)
+    assert imported('Sin fecha')[0].fecha_creacion.tzinfo is None
+
+
+def test_failed_chunk_is_rolled_back(app, monkeypatch):
+    calls = []
+    real_insert = ticket_csv.insert_tickets
+
+    def insert_tickets(rows):
+        # El segundo lote falla después de insertar sus filas
+        calls.append(len(rows))
+        real_insert(rows)
+        if len(calls) == 2:
+            raise SQLAlchemyError('falla simulada')
+
+    monkeypatch.setattr(ticket_csv, 'insert_tickets', insert_tickets)
+    report = import_csv(HEADER + ''.join(f'Lote {i},d,Alta,Abierto,,tec,user\n' for i in range(5)),
+                        chunk_size=2)
+    assert calls == [2, 2, 1]
+    assert report['creados'] == 3
+    assert report['detalle'] == [
+        {'linea': line, 'error': 'Lote revertido: SQLAlchemyError: falla simulada'} for line in (4, 5)]
+    assert [t.asunto for t in imported('Lote ')] == ['Lote 0', 'Lote 1', 'Lote 4']
@@ -0,0 +1,44 @@
+import json
+import pytest
+
+
+@pytest.fixture
+def config():
+    # Endpoints JSON de app/test_routes.py
+    return {'TEST_ROUTES': True}
+
+
+@pytest.mark.parametrize('accept', [
+    None,
+    '*/*',
+    'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'application/json',
+])
+def test_list_defaults_to_json_array(client, accept):
+    headers = {'Accept': accept} if accept else {}
+    response = client.get('/tickets', headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    tickets = json.loads(response.get_data())
+    assert len(tickets) == 60 and tickets[0]['fecha_creacion'] == '2025-01-01T00:00:00'
+
+
+@pytest.mark.parametrize('headers, query', [
+    ({'Accept': 'application/x-ndjson'}, ''),
+    ({'Accept': 'application/x-ndjson, */*;q=0.1'}, ''),
+    ({}, '?formato=ndjson'),
+])
+def test_list_as_ndjson_when_asked(client, headers, query):
+    response = client.get('/tickets' + query, headers=headers)
+    assert response.mimetype == 'application/x-ndjson'
+    assert len(response.get_data(as_text=True).splitlines()) == 60
+
+
+@pytest.mark.parametrize('tecnico_id', [False, True])
+def test_create_rejects_boolean_tecnico_id(client, tecnico_id):
+    response = client.post('/tickets', json={
+        'asunto': 'A', 'descripcion': 'd', 'prioridad': 'Alta', 'estado': 'Abierto',
+        'usuario_id': 2, 'tecnico_id': tecnico_id,
+    })
+    assert response.status_code == 400
+    assert response.json == {'error': 'tecnico_id debe ser un entero'}
@@ -0,0 +1,13 @@
+# Punto de entrada WSGI de producción (sin el modo debug de run.py):
+#
+#   gunicorn -w 4 --threads 8 -b 0.0.0.0:8000 wsgi:app
+#
+# Cada worker importa este módulo y se calienta (app/warmup.py) antes de aceptar
+# conexiones. Con --preload el módulo se importa en el proceso maestro: definir
+# WARMUP_ON_START = False y llamar a warm_up(app) en el hook post_worker_init de gunicorn.
+from app import create_app
+from app.warmup import warm_up
+
+app = create_app()
+if app.config['WARMUP_ON_START']:
+    warm_up(app)